@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""
+Compare the streaming aqu parser with the split()-per-line converter it replaced.
+
+    python benchmarks/bench_aqu.py [cells]
+"""
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from survox_api.demodata.helpers.quota_converter import QuotaConverter
+
+
+def split_from_aqu(filename):
+    # the original QuotaConverter.from_aqu, kept for comparison
+    quotas = {}
+    with open(filename) as aqu:
+        for line in aqu:
+            words = line.split()
+            if words[0] == '#' and words[2] == '=':
+                name = words[1]
+                val = int(words[3])
+                quotas[name] = {'name': name, 'current': val, 'target': 0, 'total': val}
+            elif len(words) == 3 and words[1] == '=':
+                if words[0].endswith('.t'):
+                    name = words[0][:-2]
+                    if name not in quotas:
+                        quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
+                    quotas[name]['target'] = int(words[2])
+                elif words[0].endswith('.r'):
+                    name = words[0][:-2]
+                    if name not in quotas:
+                        quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
+                    quotas[name]['current'] = int(words[2])
+                else:
+                    name = words[0]
+                    if name not in quotas:
+                        quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
+                    quotas[name]['total'] = int(words[2])
+    return list(quotas.values())
+
+
+def peak_memory(func, *args):
+    tracemalloc.start()
+    result = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main(cells):
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'quota.txt')
+        QuotaConverter.to_aqu([{'name': 'cell_{n:06d}'.format(n=n), 'current': n % 97, 'target': n % 13,
+                                'total': n % 101} for n in range(cells)], filename)
+        assert split_from_aqu(filename) == QuotaConverter.from_aqu(filename)
+
+        print('{n} quota cells, {s} bytes'.format(n=cells, s=os.path.getsize(filename)))
+        print('{:<34} {:>10} {:>14}'.format('parser', 'seconds', 'peak bytes'))
+        for label, func in [('split() per line (old from_aqu)', split_from_aqu),
+                            ('QuotaConverter.from_aqu', QuotaConverter.from_aqu),
+                            ('QuotaConverter.read_aqu', QuotaConverter.read_aqu),
+                            ('QuotaConverter.iter_aqu', lambda f: sum(1 for _ in QuotaConverter.iter_aqu(f)))]:
+            seconds = min(timeit.repeat(lambda: func(filename), number=1, repeat=5))
+            print('{:<34} {:>10.4f} {:>14}'.format(label, seconds, peak_memory(func, filename)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""
+Time typical SDK workflows against the in-process stand-in server: requests/sec, p50/p99 request latency and peak
+memory for the demodata installer, quota sync, sample upload and DNC download.
+
+    PYTHONPATH=. python benchmarks/bench_workflows.py [--latency 0.002] [--failure-rate 0.01] [--scale 1]
+                                                      [--only quota_sync,dnc_download] [--repeat 3]
+                                                      [--json results.json] [--compare baseline.json]
+
+Save a run with --json before a change and --compare against it after; anything more than 10% slower is flagged.
+Memory is the tracemalloc peak of a separate run, and includes the stand-in server's share.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from survox_api.survox_api import SurvoxAPI
+from survox_api.resources.retry import SurvoxAPIRetryPolicy
+from survox_api.demodata import demodata
+from survox_api.demodata.helpers.scheduler import InstallScheduler
+
+sys.path.insert(0, os.path.dirname(__file__))
+from standin import SurvoxStandin  # noqa: E402
+
+REGRESSION = 1.10
+INSTALL_THESE = {
+    'clients': ['survoxhealth'],
+    'dncs': ['global'],
+    'sample_setup_rules': ['my_default_us'],
+    'sample_calling_rules': ['my_basic'],
+    'surveys': ['ph_waittime', 'rr_customer_care'],
+    'delete_sample': True
+}
+
+
+class LatencyRecorder:
+    """
+    Request hook subscriber keeping every request latency, for exact percentiles
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def on_end(self, event):
+        with self._lock:
+            self.latencies.append(event.latency)
+            self.retries += event.retries
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def installer(api, server, workdir, scale):
+    # the API half of demodata.installer; the command line half needs a local Survox runtime
+    scheduler = InstallScheduler(max_workers=4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        demodata.plan_install(scheduler, api, None, 'survox', INSTALL_THESE)
+        for name, task in scheduler.tasks.items():
+            if name.startswith('command_line:'):
+                task.func = lambda: None
+        scheduler.run()
+    scheduler.check()
+
+
+def quota_sync(api, server, workdir, scale):
+    server.add_sample('bench_quotas', [])
+    quotas = [{'name': 'q{n:05d}'.format(n=n), 'current': 0, 'target': 100, 'total': 100}
+              for n in range(int(500 * scale))]
+    api.survey('bench_quotas').quotas.sync(quotas)
+    for q in quotas[::10]:
+        q['total'] += 1
+    api.survey('bench_quotas').quotas.sync(quotas)
+
+
+def sample_upload(api, server, workdir, scale):
+    server.add_sample('bench_sample', [])
+    filename = os.path.join(workdir, 'bench_sample.csv')
+    with open(filename, 'w', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['phone', 'string1', 'string2', 'number1'])
+        for n in range(int(20000 * scale)):
+            writer.writerow(['303{n:07d}'.format(n=n), 'one', 'two', n % 10])
+    with contextlib.redirect_stdout(io.StringIO()):
+        conf = demodata.read_survey_config('survoxhealth', 'ph_waittime', 'sample/sample_info.json')
+    api.survey('bench_sample').sample.add(filename, sample_map=conf['sample_map'],
+                                          setup_rules=conf['sample_setup_rules'],
+                                          calling_rules=conf['sample_calling_rules'], exists_okay=True)
+
+
+def dnc_download(api, server, workdir, scale):
+    server.add_dnc('bench', ('303{n:07d}'.format(n=n) for n in range(int(200000 * scale))))
+    api.library.dnc('bench').download(os.path.join(workdir, 'bench_dnc.csv'), resume=False)
+
+
+WORKFLOWS = {'installer': installer, 'quota_sync': quota_sync, 'sample_upload': sample_upload,
+             'dnc_download': dnc_download}
+
+
+def run_once(workflow, args, trace_memory=False):
+    with SurvoxStandin(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        api = SurvoxAPI(server.host, api_key='bench', verbose=False,
+                        retry=SurvoxAPIRetryPolicy(backoff=args.backoff))
+        recorder = api.session.instrumentation.subscribe(LatencyRecorder())
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            WORKFLOWS[workflow](api, server, workdir, args.scale)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            api.close()
+        return elapsed, recorder, peak
+
+
+def bench(workflow, args):
+    runs = [run_once(workflow, args) for _ in range(args.repeat)]
+    _, _, peak = run_once(workflow, args, trace_memory=True)
+    elapsed = statistics.median(r[0] for r in runs)
+    latencies = [lat for r in runs for lat in r[1].latencies]
+    requests = len(runs[0][1].latencies)
+    return {'seconds': elapsed, 'requests': requests, 'req_per_sec': requests / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000, 'p99_ms': percentile(latencies, 99) * 1000,
+            'retries': runs[0][1].retries, 'peak_mb': peak / 1048576.0}
+
+
+def compare(results, baseline):
+    print('\nvs baseline:')
+    for name, now in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for key in ('seconds', 'p50_ms', 'p99_ms', 'peak_mb'):
+            if before[key] and now[key] / before[key] > REGRESSION:
+                print('  {n:<14} {k:<8} {b:10.2f} -> {a:10.2f}  REGRESSION'.format(n=name, k=key, b=before[key],
+                                                                                   a=now[key]))
+            else:
+                print('  {n:<14} {k:<8} {b:10.2f} -> {a:10.2f}'.format(n=name, k=key, b=before[key], a=now[key]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SDK workflows against the stand-in server')
+    parser.add_argument('--only', help='comma separated workflows: ' + ', '.join(WORKFLOWS))
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the server adds to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds, up to this much')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of GET/PUT/DELETE answered 503')
+    parser.add_argument('--backoff', type=float, default=0.01, help='retry backoff, so injected failures stay cheap')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for the number of quotas/records')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per workflow, the median is reported')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(WORKFLOWS)
+    results = {}
+    print('{n:<14} {s:>9} {r:>8} {q:>9} {p50:>9} {p99:>9} {t:>7} {m:>8}'.format(
+        n='workflow', s='seconds', r='requests', q='req/s', p50='p50 ms', p99='p99 ms', t='retries', m='peak MB'))
+    for name in names:
+        result = results[name] = bench(name, args)
+        print('{n:<14} {seconds:9.3f} {requests:8d} {req_per_sec:9.1f} {p50_ms:9.2f} {p99_ms:9.2f} {retries:7d} '
+              '{peak_mb:8.1f}'.format(n=name, **result))
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(results, json.load(fh))
+
+
+if __name__ == '__main__':
+    main()
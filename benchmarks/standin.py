@@ -0,0 +1,459 @@
+"""
+In-process stand-in for the Survox REST API, for benchmarks and load tests that can't run against a real host.
+
+Implements the status/data envelope, api key and login auth, the chunked upload chain used by api_upload, clients,
+library sample maps/setup rules/calling rules, DNC lists with upload and ranged download, surveys with their
+questionnaire, sample, sample selection and quotas, and ETags on GET.  Anything else is kept as plain documents:
+POST to a collection creates a member, GET/PUT/DELETE work on it.
+
+    with SurvoxStandin(latency=0.005, failure_rate=0.01) as server:
+        api = SurvoxAPI(server.host, 'any-key', verbose=False)
+"""
+import csv
+import hashlib
+import io
+import itertools
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = '/survoxapi/v0'
+
+# collections whose members are named by a field other than "name"
+MEMBER_KEYS = {'/clients/': 'client', '/surveys/': 'surveycode'}
+# survey level documents that are the resource itself rather than a collection
+SINGLETONS = re.compile(r'^/surveys/[^/]+/sample/(map|setup-rules|calling-rules)/$')
+# collections listed as [] rather than 404 while they're empty
+COLLECTIONS = re.compile(
+    r'^/(clients|surveys|accounts|sample/(map|setup-rules|calling-rules|dnc)|surveys/[^/]+/quotas)/$')
+
+
+class StandinError(Exception):
+    def __init__(self, status, message):
+        super(StandinError, self).__init__(message)
+        self.status = status
+
+
+class SurvoxStandin:
+    """
+    Threaded HTTP server answering like a Survox API host, with injectable latency and failures
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503,
+                 fail_methods=('GET', 'PUT', 'DELETE'), seed=0, port=0):
+        """
+        :param latency: seconds added to every response
+        :param jitter: extra random seconds, up to this much, added to every response
+        :param failure_rate: fraction of requests answered with failure_status instead of being handled
+        :param failure_status: status of the injected failures, sent with "Retry-After: 0"
+        :param fail_methods: methods failures are injected into, by default the ones the SDK retries
+        :param seed: random seed, so runs inject the same failures
+        :param port: port to listen on, 0 for any free port
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.fail_methods = fail_methods
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.docs = {'/accounts/survox/': {'name': 'survox', 'status': 'running'}}
+        self.samples = {}
+        self.sample_files = {}
+        self.dnc = {}
+        self.uploads = {}
+        self.files = {}
+        self.stats = {'requests': 0, 'failures_injected': 0, 'not_modified': 0}
+        self._ids = itertools.count(1)
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), _StandinHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        self.thread = None
+
+    @property
+    def host(self):
+        return 'http://127.0.0.1:{port}'.format(port=self.server.server_address[1])
+
+    @property
+    def base_url(self):
+        return self.host + API_PREFIX
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def add_dnc(self, name, numbers, dnc_type='phone'):
+        """
+        Create a DNC list directly, without going through the API
+        :param name: DNC list name
+        :param numbers: iterable of phone numbers, prefixes or emails
+        :param dnc_type: phone, prefix or email
+        """
+        with self.lock:
+            self.docs['/sample/dnc/{n}/'.format(n=name)] = {'name': name, 'dnc_type': dnc_type, 'description': '',
+                                                            'account': 'survox', 'realtime': False}
+            self.dnc[name] = list(numbers)
+
+    def add_sample(self, sid, rows):
+        """
+        Load sample records for a survey directly, creating the survey if needed
+        :param sid: surveycode
+        :param rows: list of dictionaries, all with the same keys
+        """
+        with self.lock:
+            self.docs.setdefault('/surveys/{s}/'.format(s=sid), {'surveycode': sid, 'name': sid})
+            self.samples[sid] = list(rows)
+
+    def _next_id(self):
+        return '{n:08x}'.format(n=next(self._ids))
+
+    def _delay(self, method):
+        with self.lock:
+            self.stats['requests'] += 1
+            wait = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            fail = method in self.fail_methods and self.failure_rate and self.random.random() < self.failure_rate
+            if fail:
+                self.stats['failures_injected'] += 1
+        if wait:
+            time.sleep(wait)
+        return fail
+
+    # documents
+
+    def _children(self, path):
+        depth = path.count('/') + 1
+        return [doc for (p, doc) in sorted(self.docs.items()) if p.startswith(path) and p.count('/') == depth]
+
+    def _get(self, path):
+        if path in self.docs:
+            return self.docs[path]
+        children = self._children(path)
+        if children or COLLECTIONS.match(path):
+            return children
+        raise StandinError(404, 'Not found: {p}'.format(p=path))
+
+    def _post(self, path, data):
+        if SINGLETONS.match(path):
+            self.docs[path] = data
+            return data
+        if isinstance(data, list):
+            created = [self._create(path, item) for item in data]
+            return created
+        return self._create(path, data)
+
+    def _create(self, path, data):
+        name = data.get(MEMBER_KEYS.get(path, 'name'))
+        if not name:
+            raise StandinError(400, 'Missing name')
+        member = '{p}{n}/'.format(p=path, n=name)
+        if member in self.docs:
+            raise StandinError(400, 'Already exists: {n}'.format(n=name))
+        self.docs[member] = data
+        return data
+
+    def _put(self, path, data):
+        if path not in self.docs:
+            raise StandinError(404, 'Not found: {p}'.format(p=path))
+        self.docs[path] = dict(self.docs[path], **data)
+        return self.docs[path]
+
+    def _delete(self, path):
+        for p in [p for p in self.docs if p.startswith(path)]:
+            del self.docs[p]
+        m = re.match(r'^/sample/dnc/([^/]+)/$', path)
+        if m:
+            self.dnc.pop(m.group(1), None)
+        m = re.match(r'^/surveys/([^/]+)/$', path)
+        if m:
+            self.samples.pop(m.group(1), None)
+            for key in [k for k in self.sample_files if k[0] == m.group(1)]:
+                del self.sample_files[key]
+        return {}
+
+    # uploads
+
+    def _upload_chunk(self, path, headers, body):
+        m = re.match(r'bytes (\d+)-(\d+)/(\d+)', headers.get('Content-Range', ''))
+        if not m:
+            raise StandinError(400, 'Missing Content-Range')
+        name, content = _multipart_file(headers.get('Content-Type', ''), body)
+        upload_id = path.split('/')[2] if path.startswith('/uploads/') else None
+        if upload_id is None:
+            upload_id = self._next_id()
+            self.uploads[upload_id] = {'target': path, 'name': name, 'size': int(m.group(3)), 'chunks': {}}
+        elif upload_id not in self.uploads:
+            raise StandinError(404, 'No such upload')
+        self.uploads[upload_id]['chunks'][int(m.group(1))] = content
+        return {'url': '{b}/uploads/{u}/'.format(b=self.base_url, u=upload_id)}
+
+    def _upload_finish(self, upload_id, data):
+        upload = self.uploads.pop(upload_id, None)
+        if upload is None:
+            raise StandinError(404, 'No such upload')
+        content = b''
+        for offset in sorted(upload['chunks']):
+            if offset != len(content):
+                raise StandinError(400, 'Missing bytes at {o}'.format(o=len(content)))
+            content += upload['chunks'][offset]
+        md5 = hashlib.md5(content).hexdigest()
+        if len(content) != upload['size'] or data.get('md5') != md5:
+            raise StandinError(400, 'Upload checksum mismatch')
+        target = upload['target']
+        m = re.match(r'^/sample/dnc/([^/]+)/upload/$', target)
+        if m:
+            rows = csv.reader(io.StringIO(content.decode('utf-8')))
+            next(rows, None)
+            self.dnc.setdefault(m.group(1), []).extend(r[0] for r in rows if r)
+        m = re.match(r'^/surveys/([^/]+)/sample/upload/$', target)
+        if m:
+            self.sample_files[(m.group(1), upload['name'])] = content
+        m = re.match(r'^(/surveys/[^/]+/questionnaire/[^/]+/)upload/$', target)
+        if m:
+            self.docs[m.group(1)] = {'filename': upload['name'], 'size': len(content), 'md5': md5}
+        return {'filename': upload['name'], 'size': len(content), 'md5': md5}
+
+    def _file_url(self, content):
+        file_id = self._next_id()
+        self.files[file_id] = content
+        return '{b}/files/{f}/'.format(b=self.base_url, f=file_id)
+
+    # survey sample
+
+    def _import(self, sid, data):
+        content = self.sample_files.get((sid, data.get('samplefile')))
+        if content is None:
+            raise StandinError(404, 'No uploaded sample file {f}'.format(f=data.get('samplefile')))
+        rows = list(csv.DictReader(io.StringIO(content.decode('utf-8'))))
+        self.samples.setdefault(sid, []).extend(rows)
+        return {'imported': len(rows)}
+
+    def _fields(self, sid):
+        rows = self.samples.get(sid) or []
+        return [{'name': name, 'type': 'string'} for name in (rows[0] if rows else {})]
+
+    def _select(self, sid, selection):
+        rows = self.samples.get(sid) or []
+        wanted = {k: str(v) for (k, v) in (selection or {}).items() if rows and k in rows[0]}
+        return [r for r in rows if all(r.get(k) == v for (k, v) in wanted.items())]
+
+    def _selection(self, sid, action, selection):
+        selected = self._select(sid, selection)
+        if action == 'list':
+            out = io.StringIO()
+            if selected:
+                writer = csv.DictWriter(out, fieldnames=list(selected[0]), lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(selected)
+            file_id = self._file_url(out.getvalue().encode('utf-8')).rstrip('/').rsplit('/', 1)[1]
+            return {'fid': file_id, 'count': len(selected)}
+        if action == 'delete':
+            gone = set(map(id, selected))
+            self.samples[sid] = [r for r in self.samples.get(sid) or [] if id(r) not in gone]
+        return {'count': len(selected)}
+
+    def _status(self):
+        return [{'surveycode': doc['surveycode'], 'status': {'sample': bool(self.samples.get(doc['surveycode'])),
+                                                             'deployed': doc.get('deployed', False)}}
+                for doc in self._children('/surveys/')]
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Answer one request
+        :return: (status, payload or raw bytes, extra headers)
+        """
+        if method != 'POST' or path != '/auth/login/':
+            if not headers.get('Authorization'):
+                raise StandinError(401, 'Not authenticated')
+        data = _decode_body(headers.get('Content-Type', ''), body) if body else {}
+        with self.lock:
+            return self._route(method, path, query, headers, body, data)
+
+    def _route(self, method, path, query, headers, body, data):
+        parts = path.strip('/').split('/')
+        if path == '/auth/login/':
+            return {'token': {'access_token': 'standin', 'refresh_token': 'standin'}}
+        if path in ('/status/', '/swagger/'):
+            return {'name': 'survox standin', 'requests': self.stats['requests']}
+        if path == '/surveys-status/':
+            return self._status()
+        if parts[0] == 'files' and method == 'GET':
+            if parts[1] not in self.files:
+                raise StandinError(404, 'No such file')
+            return self.files[parts[1]]
+        if method == 'PUT' and (path.endswith('/upload/') or parts[0] == 'uploads'):
+            return self._upload_chunk(path, headers, body)
+        if method == 'POST' and parts[0] == 'uploads':
+            return self._upload_finish(parts[1], data)
+        if parts[:2] == ['sample', 'dnc'] and len(parts) == 4 and parts[3] == 'download':
+            if parts[2] not in self.dnc:
+                raise StandinError(404, 'No such DNC list')
+            content = '\n'.join(['phone'] + self.dnc[parts[2]]) + '\n'
+            return self._file_url(content.encode('utf-8'))
+        if parts[0] == 'surveys' and len(parts) > 2:
+            sid = parts[1]
+            if '/surveys/{s}/'.format(s=sid) not in self.docs:
+                raise StandinError(404, 'No such survey {s}'.format(s=sid))
+            rest = parts[2:]
+            if rest == ['sample'] and method == 'GET':
+                return {'records': len(self.samples.get(sid) or [])}
+            if rest == ['sample'] and method == 'DELETE':
+                self.samples.pop(sid, None)
+                return {}
+            if rest == ['sample', 'import'] and method == 'POST':
+                return self._import(sid, data)
+            if rest == ['sample', 'fields'] and method == 'GET':
+                return self._fields(sid)
+            if rest[0] == 'sample-selection':
+                if rest[1:] == ['list', 'download']:
+                    if query.get('fid') not in self.files:
+                        raise StandinError(404, 'No such selection')
+                    return self.files[query['fid']]
+                return self._selection(sid, rest[1], data)
+            if rest == ['deploy'] and method == 'POST':
+                self.docs['/surveys/{s}/'.format(s=sid)]['deployed'] = True
+                return {'deployed': True}
+            if rest[0] == 'quotas' and len(rest) == 3 and rest[2] == 'increment':
+                quota = self._get('/surveys/{s}/quotas/{q}/'.format(s=sid, q=rest[1]))
+                quota['current'] = int(quota.get('current', 0)) + int(data.get('increment', 1))
+                return quota
+            if rest == ['quotas-reset']:
+                for quota in self._children('/surveys/{s}/quotas/'.format(s=sid)):
+                    quota['current'] = 0
+                return {}
+            if rest[0] in ('rebuild', 'repair', 'recover') or rest[-1] in ('rebuild', 'repair', 'recover'):
+                return {'started': True}
+        if parts[0] == 'accounts' and len(parts) == 4 and parts[2] == 'server':
+            self.docs['/accounts/{a}/'.format(a=parts[1])]['status'] = 'running' if parts[3] == 'start' else 'stopped'
+            return {'status': self.docs['/accounts/{a}/'.format(a=parts[1])]['status']}
+        if method == 'GET':
+            return self._get(path)
+        if method == 'POST':
+            return self._post(path, data)
+        if method == 'PUT':
+            return self._put(path, data)
+        if method == 'DELETE':
+            return self._delete(path)
+        raise StandinError(405, 'Method not allowed')
+
+
+def _decode_body(content_type, body):
+    if content_type.startswith('multipart/'):
+        return {}
+    text = body.decode('utf-8')
+    if content_type.startswith('application/json') or text[:1] in ('{', '[', '"'):
+        data = json.loads(text)
+        # api_put(json=...) sends a json encoded string of the json
+        return json.loads(data) if isinstance(data, str) else data
+    return {k: v[0] for (k, v) in parse_qs(text, keep_blank_values=True).items()}
+
+
+def _multipart_file(content_type, body):
+    m = re.search(r'boundary=([^;]+)', content_type)
+    if not m:
+        raise StandinError(400, 'Not a multipart body')
+    for part in body.split(b'--' + m.group(1).encode('ascii')):
+        head, _, content = part.partition(b'\r\n\r\n')
+        name = re.search(rb'filename="([^"]*)"', head)
+        if name:
+            return name.group(1).decode('utf-8'), content[:-2] if content.endswith(b'\r\n') else content
+    raise StandinError(400, 'No file in multipart body')
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super(_StandinHandler, self).setup()
+        # headers and body go out in separate writes, don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        standin = self.server.standin
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if standin._delay(method):
+            return self._send(standin.failure_status, {'status': 'error', 'data': 'injected failure'},
+                              {'Retry-After': '0'})
+        url = urlsplit(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        query = {k: v[0] for (k, v) in parse_qs(url.query).items()}
+        try:
+            result = standin.handle(method, path, query, self.headers, body)
+        except StandinError as e:
+            return self._send(e.status, {'status': 'error', 'data': str(e)})
+        except Exception as e:
+            return self._send(500, {'status': 'error', 'data': repr(e)})
+        if isinstance(result, bytes):
+            return self._send_file(result)
+        self._send(200, {'status': 'success', 'data': result}, etag=method == 'GET')
+
+    def _send(self, status, payload, headers=None, etag=False):
+        body = json.dumps(payload).encode('utf-8')
+        extra = dict(headers or {})
+        if etag:
+            extra['ETag'] = '"{h}"'.format(h=hashlib.md5(body).hexdigest())
+            if self.headers.get('If-None-Match') == extra['ETag']:
+                with self.server.standin.lock:
+                    self.server.standin.stats['not_modified'] += 1
+                status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in extra.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, content):
+        status, start, end = 200, 0, len(content)
+        etag = '"{h}"'.format(h=hashlib.md5(content).hexdigest())
+        m = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if m and (if_range is None or if_range == etag):
+            start = int(m.group(1))
+            end = min(len(content), int(m.group(2)) + 1) if m.group(2) else len(content)
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start))
+        if status == 206:
+            self.send_header('Content-Range', 'bytes {s}-{e}/{t}'.format(s=start, e=end - 1, t=len(content)))
+        self.end_headers()
+        self.wfile.write(content[start:end])
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
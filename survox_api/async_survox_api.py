@@ -0,0 +1,171 @@
+from .survox_api import SurvoxAPI
+from .resources.valid import valid_url_field
+from .resources.exception import SurvoxAPIRuntime, SurvoxAPIException
+from .resources.aio.base import SurvoxAPIAsyncBase
+from .resources.aio.session import SurvoxAPIAsyncSession
+from .resources.aio.account import SurvoxAPIAsyncAccountList, SurvoxAPIAsyncAccount
+from .resources.aio.client import SurvoxAPIAsyncClientList, SurvoxAPIAsyncClient
+from .resources.aio.survey import SurvoxAPIAsyncSurveyList, SurvoxAPIAsyncSurvey
+from .resources.aio.library import SurvoxAPIAsyncLibrary
+from .resources.aio.admin import SurvoxAPIAsyncAdmin
+
+
+class AsyncSurvoxAPI(SurvoxAPI):
+    """
+    asyncio version of SurvoxAPI with the same resource navigation, every call that talks to the API is awaitable:
+
+        async with AsyncSurvoxAPI('http://localhost:8000/', 'my_apikey') as api:
+            quotas = await api.survey('my_survey').quotas.list()
+
+    Logging in with username/password happens on "async with", or by awaiting login() yourself.
+    """
+
+    def __init__(self, host=None, api_key=None, username=None, password=None, verbose=True, session=None,
+                 pool_maxsize=100, pool_maxsize_per_host=10, keep_alive=True, survey_cache_ttl=60,
+                 status_refresh=30, retry=None, limiter=None, http_cache=None, preview_ttl=300):
+        """
+        :param host: Survox API host
+        :param api_key: api key to authenticate with
+        :param username: username to log in with, if no api_key
+        :param password: password to log in with, if no api_key
+        :param verbose: print requests and responses
+        :param session: SurvoxAPIAsyncSession to share, otherwise one is created from the pool parameters
+        :param pool_maxsize: max connections open at once, across all hosts
+        :param pool_maxsize_per_host: max connections open at once to any single host
+        :param keep_alive: if False, close the connection after every request
+        :param survey_cache_ttl: seconds a survey's details are trusted before they're fetched again
+        :param status_refresh: seconds survey statuses and account details are reused before they're fetched again
+        :param retry: SurvoxAPIRetryPolicy for transient failures (default 4 attempts with backoff), False to never
+                      retry
+        :param limiter: SurvoxAPIRateLimiter for per endpoint class rate and concurrency limits (default tight for
+                        sample import/rebuild, loose for quotas), False for no limits
+        :param http_cache: SurvoxAPIHTTPCache to revalidate GETs with ETag/Last-Modified instead of fetching them
+                           again (default in memory, 16MB), False for none
+        :param preview_ttl: seconds a sample selection's preview is reused, so download() needn't list it again
+        """
+        if not host:
+            raise SurvoxAPIRuntime('Parameter "host" is required')
+
+        self.host = host
+        self.base_url = self._host_to_base_url()
+        self.verbose = verbose
+        self.oauth2_token = None
+        self.headers = None
+        if session is None:
+            session = SurvoxAPIAsyncSession(pool_maxsize=pool_maxsize, pool_maxsize_per_host=pool_maxsize_per_host,
+                                            keep_alive=keep_alive, survey_cache_ttl=survey_cache_ttl,
+                                            status_refresh=status_refresh, retry=retry,
+                                            limiter=limiter, http_cache=http_cache, preview_ttl=preview_ttl)
+        self.session = session
+        self._base_api = None
+        self._credentials = None
+        if api_key:
+            self.set_authorization_header('ApiKey', api_key)
+        elif username and password:
+            self.clear_authorization_header()
+            self._credentials = {'username': username, 'password': password}
+        else:
+            raise SurvoxAPIRuntime('Missing authentication credentials.  Must provide api_key or username/password')
+
+    async def close(self):
+        """
+        Close the pooled connections shared by this object and every resource created from it
+        :return: None
+        """
+        await self.session.close()
+
+    async def __aenter__(self):
+        if self._credentials:
+            await self.login(**self._credentials)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __enter__(self):
+        raise SurvoxAPIRuntime('AsyncSurvoxAPI must be used with "async with"')
+
+    @property
+    def _api(self):
+        if self._base_api is None or self._base_api.auth_headers is not self.headers:
+            self._base_api = SurvoxAPIAsyncBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose,
+                                                session=self.session)
+        self._base_api.verbose = self.verbose
+        return self._base_api
+
+    async def login(self, username=None, password=None, refresh_token=None):
+        self.clear_authorization_header()
+
+        login_url = "{}/auth/login/".format(self.base_url)
+        if username and password:
+            response = await self.session.post(url=login_url, data={'username': username, 'password': password})
+        elif refresh_token:
+            response = await self.session.post(url=login_url, data={'refresh_token': refresh_token})
+        else:
+            raise SurvoxAPIRuntime("Missing login credentials")
+
+        try:
+            if 'data' in response.json() and 'token' in response.json()['data']:
+                self.oauth2_token = response.json()['data']['token']
+                if 'access_token' in self.oauth2_token:
+                    if 'refresh_token' not in self.oauth2_token:
+                        raise SurvoxAPIRuntime(
+                            'Error[{code}] - {method} {url} - {text}'.format(code='Login Failed', method='POST',
+                                                                             url=login_url, text=response.text))
+                    self.set_authorization_header('Bearer', self.oauth2_token['access_token'])
+        except ValueError:
+            self.oauth2_token = None
+        self._credentials = None
+        return response
+
+    async def swagger(self):
+        r = await self._api.api_get(endpoint='/swagger/', full_response=True)
+        if r.status_code != 200:
+            raise SurvoxAPIException('GET', '/swagger/', r)
+        return r.json()
+
+    @property
+    def accounts(self):
+        return SurvoxAPIAsyncAccountList(base_url=self.base_url, headers=self.headers,
+                                         verbose=self.verbose, session=self.session)
+
+    def account(self, name):
+        valid, msg = valid_url_field('Account name', name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        return SurvoxAPIAsyncAccount(name, base_url=self.base_url, headers=self.headers,
+                                     verbose=self.verbose, session=self.session)
+
+    @property
+    def clients(self):
+        return SurvoxAPIAsyncClientList(base_url=self.base_url, headers=self.headers,
+                                        verbose=self.verbose, session=self.session)
+
+    def client(self, name):
+        valid, msg = valid_url_field('Client name', name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        return SurvoxAPIAsyncClient(name, base_url=self.base_url, headers=self.headers,
+                                    verbose=self.verbose, session=self.session)
+
+    @property
+    def surveys(self):
+        return SurvoxAPIAsyncSurveyList(base_url=self.base_url, headers=self.headers,
+                                        verbose=self.verbose, session=self.session)
+
+    def survey(self, sid):
+        valid, msg = valid_url_field('Survey surveycode', sid, 1, 28)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        return SurvoxAPIAsyncSurvey(sid=sid, base_url=self.base_url, headers=self.headers,
+                                    verbose=self.verbose, session=self.session)
+
+    @property
+    def library(self):
+        return SurvoxAPIAsyncLibrary(base_url=self.base_url, headers=self.headers,
+                                     verbose=self.verbose, session=self.session)
+
+    @property
+    def admin(self):
+        return SurvoxAPIAsyncAdmin(base_url=self.base_url, headers=self.headers,
+                                   verbose=self.verbose, session=self.session)
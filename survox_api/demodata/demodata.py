@@ -6,17 +6,22 @@ import errno
 import stat
 import shutil
 import subprocess
+from functools import partial
 from pprint import pprint
 
 from survox_api.demodata.helpers.survox_account import SurvoxAccount
 from survox_api.demodata.helpers.quota_converter import QuotaConverter
+from survox_api.demodata.helpers.scheduler import InstallScheduler
+from survox_api.demodata.helpers.manifest import InstallManifest
+from survox_api.resources.survey.sample.pipeline import SurvoxAPISamplePipeline
 from survox_api.survox_api import SurvoxAPI
 
 base_directory = os.path.dirname(__file__)
 
 
-def ops_manager_install(account, api_key):
-    return installer(account=account, api_key=api_key, install_these={
+def ops_manager_install(account, api_key, max_workers=4, fail_fast=True, dry_run=False, manifest=None, force=False):
+    return installer(account=account, api_key=api_key, max_workers=max_workers, fail_fast=fail_fast,
+                     dry_run=dry_run, manifest=manifest, force=force, install_these={
         'clients': ['survoxhealth'],
         'dncs': ['global'],
         'sample_setup_rules': ['my_default_us'],
@@ -26,26 +31,84 @@ def ops_manager_install(account, api_key):
     })
 
 
-def installer(account, api_key, install_these):
+def installer(account, api_key, install_these, max_workers=4, fail_fast=True, dry_run=False, manifest=None,
+              force=False):
+    """
+    Install demo data, running independent steps in parallel: each survey waits only for its own client, and its
+    sample only for the templates and DNC lists it may use
+    :param account: Survox runtime account
+    :param api_key: api key to authenticate with
+    :param install_these: dictionary of clients, dncs, sample_setup_rules, sample_calling_rules and surveys to install
+    :param max_workers: max install steps run at the same time
+    :param fail_fast: stop starting steps after the first failure, otherwise only skip the steps depending on it
+    :param dry_run: print the plan without installing anything
+    :param manifest: install manifest file, questionnaires, sample, quotas and runtime files whose content hasn't
+                     changed since they were last installed from it, and which the server still has, are skipped;
+                     without one every step runs; True for the default, ~/.survox_api/install_manifest.json
+    :param force: push everything again, whatever the manifest says
+    :return: list of InstallTask with their status and timing, in the order they were started
+    """
     api = SurvoxAPI('localhost', api_key)
-    cli = SurvoxAccount(account)
-    pre_install_tasks(api, account)
-
-    if 'clients' in install_these and install_these['clients']:
-        api_install_clients(api, install_these['clients'])
-    if 'dncs' in install_these and install_these['dncs']:
-        api_install_dncfiles(api, install_these['dncs'])
-    if 'sample_setup_rules' in install_these and install_these['sample_setup_rules']:
-        api_install_setup_rule_templates(api, install_these['sample_setup_rules'])
-    if 'sample_calling_rules' in install_these and install_these['sample_calling_rules']:
-        api_install_calling_rule_templates(api, install_these['sample_calling_rules'])
-    if 'surveys' in install_these and install_these['surveys']:
-        for surveycode in install_these['surveys']:
-            survey_conf = read_config('survey', surveycode)
-            api_install_surveys(api, survey_conf, install_these.get('delete_sample', True))
-            command_line_install_survey(cli, survey_conf)
-    post_install_tasks(api, account)
+    cli = None if dry_run else SurvoxAccount(account)
+    scheduler = InstallScheduler(max_workers=max_workers, fail_fast=fail_fast)
+    install_manifest = None
+    if manifest:
+        install_manifest = InstallManifest(None if manifest is True else manifest,
+                                           scope='{u} {a}'.format(u=api.base_url, a=account), force=force)
+    with SurvoxAPISamplePipeline(max_workers=max_workers) as pipeline:
+        plan_install(scheduler, api, cli, account, install_these, install_manifest, pipeline)
+        if dry_run:
+            scheduler.print_plan()
+            return []
+        order = scheduler.run()
+    scheduler.print_timings(order)
+    scheduler.check()
     print("All Done!")
+    return order
+
+
+def plan_install(scheduler, api, cli, account, install_these, manifest=None, pipeline=None):
+    """
+    Add the install steps and their dependencies to a scheduler, the surveys' sample steps sharing pipeline's workers
+    """
+    scheduler.add('pre_install', lambda: pre_install_tasks(api, account))
+    templates = ['pre_install']
+    for client in install_these.get('clients') or []:
+        scheduler.add('client:' + client, partial(api_install_clients, api, [client]), ['pre_install'])
+    for dnc in install_these.get('dncs') or []:
+        templates.append('dnc:' + dnc)
+        scheduler.add('dnc:' + dnc, partial(api_install_dncfiles, api, [dnc]), ['pre_install'])
+    for rule in install_these.get('sample_setup_rules') or []:
+        templates.append('setup_rules:' + rule)
+        scheduler.add('setup_rules:' + rule, partial(api_install_setup_rule_templates, api, [rule]), ['pre_install'])
+    for rule in install_these.get('sample_calling_rules') or []:
+        templates.append('calling_rules:' + rule)
+        scheduler.add('calling_rules:' + rule, partial(api_install_calling_rule_templates, api, [rule]),
+                      ['pre_install'])
+
+    last_install = {}
+    for surveycode in install_these.get('surveys') or []:
+        survey_conf = read_config('survey', surveycode)
+        client = survey_conf['create_data']['client']
+        delete = install_these.get('delete_sample', True)
+        survey = 'survey:' + surveycode
+        # two configs installing the same survey must not run at the same time
+        previous = last_install.get(survey_conf['create_data']['surveycode'])
+        scheduler.add(survey, partial(api_install_survey, api, survey_conf),
+                      ['pre_install', 'client:' + client] + ([previous] if previous else []))
+        scheduler.add('questionnaire:' + surveycode,
+                      partial(api_install_survey_questionnaires, api, survey_conf, manifest), [survey])
+        scheduler.add('sample:' + surveycode,
+                      partial(api_install_survey_sample_if_needed, api, survey_conf, delete, manifest, pipeline),
+                      [survey] + templates)
+        scheduler.add('quotas:' + surveycode, partial(api_install_survey_quota_targets, api, survey_conf, manifest),
+                      [survey])
+        scheduler.add('deploy:' + surveycode, partial(api_deploy_survey, api, survey_conf, manifest),
+                      [s + surveycode for s in ('questionnaire:', 'sample:', 'quotas:')])
+        scheduler.add('command_line:' + surveycode, partial(command_line_install_survey, cli, survey_conf, manifest),
+                      ['deploy:' + surveycode])
+        last_install[survey_conf['create_data']['surveycode']] = 'command_line:' + surveycode
+    scheduler.add('post_install', lambda: post_install_tasks(api, account), list(scheduler.tasks))
 
 
 def pre_install_tasks(api, account):
@@ -116,32 +179,102 @@ def api_install_dncfiles(api, dnc_list):
         pprint(x)
 
 
-def api_install_surveys(api, survey_info, delete=True):
+def api_install_surveys(api, survey_info, delete=True, manifest=None):
+    api_install_survey(api, survey_info)
+    api_install_survey_questionnaires(api, survey_info, manifest)
+    api_install_survey_sample_if_needed(api, survey_info, delete, manifest)
+    api_install_survey_quota_targets(api, survey_info, manifest)
+    api_deploy_survey(api, survey_info, manifest)
+
+
+def unchanged(manifest, key, fingerprint):
+    # steps always run without a manifest
+    return manifest is not None and manifest.unchanged(key, fingerprint)
+
+
+def record(manifest, key, fingerprint):
+    if manifest is not None:
+        manifest.record(key, fingerprint)
+
+
+def fingerprint(manifest, files=(), data=None):
+    return manifest.fingerprint(files, data) if manifest is not None else None
+
+
+def survey_questionnaires(survey_info):
     surveycode = survey_info['create_data']['surveycode']
+    qpx = [survey_datafile(survey_info['create_data']['client'], surveycode, "{m}/{s}.qpx".format(m=mode, s=surveycode))
+           for mode in ['cati', 'online']]
+    return [q for q in qpx if os.path.isfile(q)]
 
+
+def survey_sample_files(survey_info):
+    client = survey_info['create_data']['client']
+    surveycode = survey_info['create_data']['surveycode']
+    configfile = survey_datafile(client, surveycode, survey_info['survey_sample'])
+    with open(configfile) as fh:
+        conf = json.load(fh)
+    return [configfile, survey_datafile(client, surveycode, os.path.join('sample', conf['sample_file']))]
+
+
+def survey_quota_inputs(survey_info):
+    quota_file = survey_datafile(survey_info['create_data']['client'], survey_info['create_data']['surveycode'],
+                                 survey_info['quota_file'])
+    targets = {'target': survey_info['create_data']['survox_complete_target'],
+               'total': survey_info['survox_complete_total']}
+    return [quota_file], targets
+
+
+def api_install_survey(api, survey_info):
+    surveycode = survey_info['create_data']['surveycode']
     print("Installing survey: {s}".format(s=surveycode))
     c = api.surveys.create(survey_info['create_data'], exists_okay=True)
     print(c)
 
-    # upload questionnaires
-    for mode in ['cati', 'online']:
-        qpx = survey_datafile(survey_info['create_data']['client'], surveycode, "{m}/{s}.qpx".format(m=mode, s=surveycode))
-        if os.path.isfile(qpx):
-            print("  Uploading questionnaire: {q}".format(q=qpx))
-            c = api.survey(surveycode).questionnaire.cati.upload(filename=qpx)
-            print(c)
 
+def api_install_survey_questionnaires(api, survey_info, manifest=None):
+    surveycode = survey_info['create_data']['surveycode']
+    for qpx in survey_questionnaires(survey_info):
+        key = 'questionnaire:{s}:{q}'.format(s=surveycode, q=os.path.basename(os.path.dirname(qpx)))
+        digest = fingerprint(manifest, [qpx])
+        # a survey deleted or recreated on the server has lost its questionnaire, whatever the manifest says
+        if unchanged(manifest, key, digest) and api.survey(surveycode).questionnaire.cati.get():
+            print("  Questionnaire unchanged: {q}".format(q=qpx))
+            continue
+        print("  Uploading questionnaire: {q}".format(q=qpx))
+        c = api.survey(surveycode).questionnaire.cati.upload(filename=qpx)
+        print(c)
+        record(manifest, key, digest)
+
+
+def api_install_survey_sample_if_needed(api, survey_info, delete=True, manifest=None, pipeline=None):
     # install the sample, if not already there
+    surveycode = survey_info['create_data']['surveycode']
+    key = 'sample:' + surveycode
+    digest = fingerprint(manifest, survey_sample_files(survey_info)) if manifest is not None else None
+    if unchanged(manifest, key, digest) and api.survey(surveycode).status()['status']['sample']:
+        print("sample unchanged for {s}".format(s=surveycode))
+        return
     if delete:
         api.survey(surveycode).sample.delete()
     c = api.survey(surveycode).status()
     if not c['status']['sample']:
-        api_install_survey_sample(api, survey_info['create_data']['client'], surveycode, survey_info['survey_sample'])
+        api_install_survey_sample(api, survey_info['create_data']['client'], surveycode, survey_info['survey_sample'],
+                                  pipeline)
+        record(manifest, key, digest)
     else:
         print("sample already exists for {s}".format(s=surveycode))
         print(c)
 
+
+def api_install_survey_quota_targets(api, survey_info, manifest=None):
     # install quotas, set survox_completes
+    surveycode = survey_info['create_data']['surveycode']
+    key = 'quotas:' + surveycode
+    digest = fingerprint(manifest, *survey_quota_inputs(survey_info))
+    if unchanged(manifest, key, digest) and survey_has_quota(api, surveycode, 'survox_complete'):
+        print("quotas unchanged for {s}".format(s=surveycode))
+        return
     api_install_survey_quotas(api, survey_info['create_data']['client'], surveycode, survey_info['quota_file'])
     qlist = api.survey(surveycode).quotas.list()
     if 'survox_complete' not in qlist:
@@ -152,17 +285,41 @@ def api_install_surveys(api, survey_info, delete=True):
             'total': survey_info['survox_complete_total']
         }])
     api.survey(surveycode).quota('survox_complete').set(total=survey_info['survox_complete_total'])
+    record(manifest, key, digest)
+
+
+def survey_has_quota(api, surveycode, name):
+    return any(q.get('name') == name for q in api.survey(surveycode).quotas.list() or [])
+
+
+def survey_deployed(api, surveycode):
+    # surveys-status is snapshotted, refresh it so a survey reset since the snapshot counts as not deployed
+    return api.survey(surveycode).status(refresh=True).get('status', {}).get('deployed', False)
+
+
+def api_deploy_survey(api, survey_info, manifest=None):
+    surveycode = survey_info['create_data']['surveycode']
+    key = 'deploy:' + surveycode
+    digest = None
+    if manifest is not None:
+        quota_files, targets = survey_quota_inputs(survey_info)
+        digest = fingerprint(manifest, survey_questionnaires(survey_info) + survey_sample_files(survey_info) +
+                             quota_files, [survey_info, targets])
+    if unchanged(manifest, key, digest) and survey_deployed(api, surveycode):
+        print(" --- survey {s} unchanged".format(s=surveycode))
+        return
     api.survey(surveycode).deploy()
+    record(manifest, key, digest)
     print(" --- survey {s} installed".format(s=surveycode))
 
 
-def api_install_survey_sample(api, client, surveycode, sample_configfile):
+def api_install_survey_sample(api, client, surveycode, sample_configfile, pipeline=None):
     conf = read_survey_config(client, surveycode, sample_configfile)
     csv_sample = survey_datafile(client, surveycode, os.path.join('sample', conf['sample_file']))
     print("Uploading csv sample file: {file}".format(file=csv_sample))
 
     api.survey(surveycode).sample.add(csv_sample, sample_map=conf['sample_map'], setup_rules=conf['sample_setup_rules'],
-                                      calling_rules=conf['sample_calling_rules'], exists_okay=True)
+                                      calling_rules=conf['sample_calling_rules'], exists_okay=True, pipeline=pipeline)
     c = api.survey(surveycode).status()
     print(c)
 
@@ -172,15 +329,12 @@ def api_install_survey_quotas(api, client, surveycode, quota_aqu):
     print("Installing/updating quotas from file: {file}".format(file=quota_file))
     qlist = QuotaConverter.from_aqu(quota_file)
     print("    {n} quotas".format(n=len(qlist)))
-    created = api.survey(surveycode).quotas.create(qlist)
-    print("    {n} quotas created - updating {u} ...".format(n=len(created), u=len(qlist) - len(created)))
-    created_qnames = [x['name'] for x in created]
-    for q in qlist:
-        if not q['name'] in created_qnames:
-            api.survey(surveycode).quota(q['name']).set(quota=q)
+    report = api.survey(surveycode).quotas.sync(qlist)
+    print("    {c} quotas created, {u} updated, {n} unchanged".format(c=len(report['created']), u=len(report['updated']),
+                                                                   n=len(report['unchanged'])))
 
 
-def command_line_install_survey(cli, survey_info):
+def command_line_install_survey(cli, survey_info, manifest=None):
     print("  updating {s} from command line".format(s=survey_info['create_data']['surveycode']))
 
     sourcebase = os.path.join(base_directory, 'data', 'surveys')
@@ -190,6 +344,8 @@ def command_line_install_survey(cli, survey_info):
     targetdir = os.path.join(targetbase, survey_info['create_data']['client'], survey_info['create_data']['surveycode'])
 
     print("       copying files from {s} to {t}".format(s=sourcedir, t=targetdir))
+    copied = 0
+    digests = []
     for here, dirs, files in os.walk(sourcedir):
         there = here.replace(sourcedir, targetdir)
         try:
@@ -197,13 +353,30 @@ def command_line_install_survey(cli, survey_info):
         except OSError as e:
             if e.errno != errno.EEXIST:
                 raise
-        for f in files:
+        for f in sorted(files):
             src = os.path.join(here, f)
             tgt = os.path.join(there, f)
+            key = 'copy:' + tgt
+            digest = fingerprint(manifest, [src])
+            digests.append(digest)
+            # the copy is only trusted if it's still there, copystat keeps its size and mtime equal to the source
+            if unchanged(manifest, key, digest) and os.path.isfile(tgt):
+                st_src, st_tgt = os.stat(src), os.stat(tgt)
+                if st_src.st_size == st_tgt.st_size and st_src.st_mtime_ns == st_tgt.st_mtime_ns:
+                    continue
             shutil.copyfile(src, tgt)
             shutil.copystat(src, tgt)
+            record(manifest, key, digest)
+            copied += 1
+    print("       {n} files copied".format(n=copied))
     if os.path.isfile(os.path.join(targetdir, 'configure_survey.sh')):
-        run_command_line_script(cli, targetdir, 'configure_survey.sh')
+        key = 'configure:' + targetdir
+        digest = fingerprint(manifest, data=digests)
+        if unchanged(manifest, key, digest):
+            print("   configure_survey.sh already run for these files")
+            return
+        if run_command_line_script(cli, targetdir, 'configure_survey.sh') == 0:
+            record(manifest, key, digest)
 
 
 def run_command_line_script(cli, survey_dir, script):
@@ -212,7 +385,7 @@ def run_command_line_script(cli, survey_dir, script):
     script_path = os.path.join(survey_dir, script)
     st = os.stat(script_path)
     os.chmod(script_path, st.st_mode | stat.S_IEXEC)
-    subprocess.call(script_path, shell=True, cwd=survey_dir)
+    return subprocess.call(script_path, shell=True, cwd=survey_dir)
 
 
 if __name__ == '__main__':
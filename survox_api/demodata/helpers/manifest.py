@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_MANIFEST = os.path.join(os.path.expanduser('~'), '.survox_api', 'install_manifest.json')
+
+
+class InstallManifest:
+    """
+    Record of what an install pushed, as content hashes, so running the installer again can skip the steps whose
+    inputs haven't changed.  File hashes are remembered with the file's size and mtime and only recomputed when
+    those change.  Entries are kept per scope (host and account), and the file is rewritten after every record so
+    an interrupted install keeps what it finished.
+    """
+
+    def __init__(self, filename=None, scope='', force=False):
+        """
+        :param filename: manifest file, defaults to ~/.survox_api/install_manifest.json
+        :param scope: what the install targets, e.g. host and account; entries of other scopes are kept apart
+        :param force: treat everything as changed, but still record what's installed
+        """
+        self.filename = filename or DEFAULT_MANIFEST
+        self.scope = scope
+        self.force = force
+        self._lock = threading.Lock()
+        try:
+            with open(self.filename) as fh:
+                self.data = json.load(fh)
+        except (OSError, ValueError):
+            self.data = {}
+        self.data.setdefault('files', {})
+        self.data.setdefault('installed', {})
+        self.installed = self.data['installed'].setdefault(scope, {})
+
+    def file_hash(self, filename):
+        """
+        :param filename: file to hash
+        :return: sha256 hex digest of the file's content
+        """
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        with self._lock:
+            known = self.data['files'].get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        sha = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b''):
+                sha.update(block)
+        with self._lock:
+            self.data['files'][path] = [st.st_size, st.st_mtime_ns, sha.hexdigest()]
+        return sha.hexdigest()
+
+    def fingerprint(self, files=(), data=None):
+        """
+        Hash the inputs of an install step
+        :param files: files the step pushes, missing ones count as empty
+        :param data: json serializable configuration the step uses
+        :return: hex digest
+        """
+        sha = hashlib.sha256()
+        for filename in files:
+            digest = self.file_hash(filename) if os.path.isfile(filename) else '-'
+            sha.update('{f}\0{d}\0'.format(f=os.path.basename(filename), d=digest).encode('utf-8'))
+        sha.update(json.dumps(data, sort_keys=True, default=str).encode('utf-8'))
+        return sha.hexdigest()
+
+    def unchanged(self, key, fingerprint):
+        """
+        :param key: name of the install step
+        :param fingerprint: hash of its inputs now
+        :return: True if the step was last done with the same inputs
+        """
+        with self._lock:
+            return not self.force and self.installed.get(key) == fingerprint
+
+    def record(self, key, fingerprint):
+        """
+        Remember that a step was done, call once it succeeded
+        :param key: name of the install step
+        :param fingerprint: hash of its inputs
+        :return: None
+        """
+        with self._lock:
+            self.installed[key] = fingerprint
+            self._save()
+
+    def forget(self, key):
+        with self._lock:
+            if self.installed.pop(key, None) is not None:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        temp = '{f}.{p}.tmp'.format(f=self.filename, p=os.getpid())
+        with open(temp, 'w') as fh:
+            json.dump(self.data, fh, indent=1, sort_keys=True)
+        os.replace(temp, self.filename)
@@ -1,28 +1,157 @@
+class QuotaFileError(ValueError):
+    """
+    A line of a quota file that can't be parsed
+    """
+
+    def __init__(self, filename, lineno, line, reason):
+        self.filename = filename
+        self.lineno = lineno
+        self.line = line
+        self.reason = reason
+
+    def __str__(self):
+        return '{f}:{n}: {r}: {l!r}'.format(f=self.filename, n=self.lineno, r=self.reason, l=self.line)
+
+
+class QuotaLine:
+    """
+    One "name = value" line of an aqu file.  field is 'total', 'current', 'target', or 'both' for the
+    "# name = value" form that sets current and total.
+    """
+    __slots__ = ('lineno', 'name', 'field', 'value')
+
+    def __init__(self, lineno, name, field, value):
+        self.lineno = lineno
+        self.name = name
+        self.field = field
+        self.value = value
+
+    def __repr__(self):
+        return 'QuotaLine({n}, {name!r}, {f!r}, {v})'.format(n=self.lineno, name=self.name, f=self.field, v=self.value)
+
+
+class QuotaRecord:
+    """
+    A quota cell with the same fields as the api's quota dictionaries
+    """
+    __slots__ = ('name', 'current', 'target', 'total')
+
+    def __init__(self, name, current=0, target=0, total=0):
+        self.name = name
+        self.current = current
+        self.target = target
+        self.total = total
+
+    def as_dict(self):
+        return {'name': self.name, 'current': self.current, 'target': self.target, 'total': self.total}
+
+    def __eq__(self, other):
+        return isinstance(other, QuotaRecord) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return 'QuotaRecord({q})'.format(q=self.as_dict())
+
+
 class QuotaConverter:
+    suffixes = {'.t': 'target', '.r': 'current'}
+
     @classmethod
-    def from_aqu(cls, filename):
-        quotas = {}
+    def _parse(cls, filename):
+        # the common "name = value" line is checked first with a single split(), only odd lines fall through
+        suffixes = cls.suffixes
         with open(filename) as aqu:
-            for line in aqu:
+            for lineno, line in enumerate(aqu, 1):
                 words = line.split()
-                if words[0] == '#' and words[2] == '=':
-                    name = words[1]
-                    val = int(words[3])
-                    quotas[name] = {'name': name, 'current': val, 'target': 0, 'total': val}
-                elif len(words) == 3 and words[1] == '=':
-                    if words[0].endswith('.t'):
-                        name = words[0][:-2]
-                        if name not in quotas:
-                            quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
-                        quotas[name]['target'] = int(words[2])
-                    elif words[0].endswith('.r'):
-                        name = words[0][:-2]
-                        if name not in quotas:
-                            quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
-                        quotas[name]['current'] = int(words[2])
-                    else:
-                        name = words[0]
-                        if name not in quotas:
-                            quotas[name] = {'name': name, 'current': 0, 'target': 0, 'total': 0}
-                        quotas[name]['total'] = int(words[2])
+                if len(words) == 3 and words[1] == '=':
+                    name, value = words[0], words[2]
+                elif len(words) == 4 and words[0] == '#' and words[2] == '=':
+                    name, value = '#' + words[1], words[3]
+                elif not words or words[0].startswith("''"):
+                    continue
+                elif words == ['end']:
+                    break
+                else:
+                    name, sep, value = line.partition('=')
+                    name = name.strip()
+                    if not sep or not name or len(name.split()) > (2 if name.startswith('#') else 1):
+                        raise QuotaFileError(filename, lineno, line, 'expected "name = value"')
+                    name = name.replace(' ', '').replace('\t', '')
+                field = 'total'
+                if name[0] == '#':
+                    # numbered quota, "# number = value" sets both current and total
+                    name = name[1:]
+                    field = 'both'
+                elif name[-2:] in suffixes:
+                    field = suffixes[name[-2:]]
+                    name = name[:-2]
+                if not name:
+                    raise QuotaFileError(filename, lineno, line, 'missing quota name')
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise QuotaFileError(filename, lineno, line, 'value is not an integer')
+                yield lineno, name, field, value
+
+    @classmethod
+    def iter_aqu(cls, filename):
+        """
+        Stream the lines of an aqu file, skipping blank lines and '' comments and stopping at "end"
+        :param filename: aqu file
+        :return: iterator of QuotaLine, raises QuotaFileError on a malformed line
+        """
+        for lineno, name, field, value in cls._parse(filename):
+            yield QuotaLine(lineno, name, field, value)
+
+    @classmethod
+    def read_aqu(cls, filename):
+        """
+        Read an aqu file into one record per quota, in the order the quotas first appear
+        :param filename: aqu file
+        :return: list of QuotaRecord, raises QuotaFileError on a malformed line
+        """
+        quotas = {}
+        for _, name, field, value in cls._parse(filename):
+            record = quotas.get(name)
+            if record is None:
+                record = quotas[name] = QuotaRecord(name)
+            if field == 'total':
+                record.total = value
+            elif field == 'current':
+                record.current = value
+            elif field == 'target':
+                record.target = value
+            else:
+                # same as the "# number = value" line always did: replaces anything set before
+                record.current = record.total = value
+                record.target = 0
         return list(quotas.values())
+
+    @classmethod
+    def from_aqu(cls, filename):
+        """
+        Read an aqu file into quota dictionaries as used by the api
+        :param filename: aqu file
+        :return: list of {'name', 'current', 'target', 'total'} dictionaries
+        """
+        return [q.as_dict() for q in cls.read_aqu(filename)]
+
+    @classmethod
+    def to_aqu(cls, quotas, filename):
+        """
+        Write quotas to an aqu file, e.g. to snapshot api.survey(sid).quotas.list()
+        :param quotas: QuotaRecords or quota dictionaries
+        :param filename: aqu file to write
+        :return: number of quotas written
+        """
+        records = [q if isinstance(q, QuotaRecord) else
+                   QuotaRecord(q['name'], q.get('current', 0), q.get('target', 0), q.get('total', 0)) for q in quotas]
+        line = '{name:<30} = {value:>10}\n'
+        numbered = [q for q in records if q.name.isdigit() and q.current == q.total and not q.target]
+        named = [q for q in records if not (q.name.isdigit() and q.current == q.total and not q.target)]
+        with open(filename, 'w') as aqu:
+            aqu.writelines(line.format(name=q.name, value=q.total) for q in named)
+            aqu.writelines(line.format(name=q.name + '.r', value=q.current) for q in named)
+            aqu.writelines(line.format(name=q.name + '.t', value=q.target) for q in named)
+            aqu.writelines('#     {name:<11}= {value:>10}\n'.format(name=q.name, value=q.total) for q in numbered)
+            aqu.write('end\n')
+        return len(records)
@@ -0,0 +1,165 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class InstallTask:
+    """
+    One step of an install: a callable and the names of the tasks that have to finish before it
+    """
+    __slots__ = ('name', 'func', 'deps', 'status', 'started', 'seconds', 'error')
+
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.status = 'pending'
+        self.started = None
+        self.seconds = None
+        self.error = None
+
+    def __repr__(self):
+        return 'InstallTask({n!r}, {s})'.format(n=self.name, s=self.status)
+
+
+class InstallError(RuntimeError):
+    """
+    Raised once an install is over if any of its tasks failed
+    """
+
+    def __init__(self, failed):
+        self.failed = failed
+        super(InstallError, self).__init__('{n} install task(s) failed: {t}'.format(
+            n=len(failed), t=', '.join('{n} ({e!r})'.format(n=t.name, e=t.error) for t in failed)))
+
+
+class InstallScheduler:
+    """
+    Runs install tasks on a bounded pool of worker threads, each as soon as the tasks it depends on are done.
+
+    With fail_fast a failure stops new tasks from starting; otherwise only the tasks that depend on the failed one
+    are skipped and everything else carries on.
+    """
+
+    def __init__(self, max_workers=4, fail_fast=True):
+        """
+        :param max_workers: max tasks run at the same time
+        :param fail_fast: stop starting tasks after the first failure
+        """
+        self.max_workers = max(1, max_workers)
+        self.fail_fast = fail_fast
+        self.tasks = {}
+
+    def add(self, name, func, deps=()):
+        """
+        Add a task
+        :param name: unique task name
+        :param func: callable run with no arguments
+        :param deps: names of the tasks it waits for, unknown names are ignored so optional steps can be left out
+        :return: InstallTask
+        """
+        if name in self.tasks:
+            raise ValueError('Duplicate install task: {n}'.format(n=name))
+        task = self.tasks[name] = InstallTask(name, func, deps)
+        return task
+
+    def _deps(self, task):
+        return [d for d in task.deps if d in self.tasks]
+
+    def plan(self):
+        """
+        Order the tasks in waves: every task of a wave only depends on tasks of earlier waves
+        :return: list of lists of InstallTask
+        """
+        level = {}
+        visiting = set()
+
+        def depth(task):
+            if task.name in level:
+                return level[task.name]
+            if task.name in visiting:
+                raise ValueError('Install tasks depend on each other: {n}'.format(n=task.name))
+            visiting.add(task.name)
+            level[task.name] = 1 + max([depth(self.tasks[d]) for d in self._deps(task)] or [-1])
+            visiting.discard(task.name)
+            return level[task.name]
+
+        waves = []
+        for task in self.tasks.values():
+            n = depth(task)
+            while len(waves) <= n:
+                waves.append([])
+            waves[n].append(task)
+        return waves
+
+    def print_plan(self):
+        for n, wave in enumerate(self.plan()):
+            print('wave {n}:'.format(n=n + 1))
+            for task in wave:
+                deps = self._deps(task)
+                print('    {t}{d}'.format(t=task.name, d=' <- ' + ', '.join(deps) if deps else ''))
+
+    def _skip_dependents(self):
+        changed = True
+        while changed:
+            changed = False
+            for task in self.tasks.values():
+                if task.status == 'pending' and any(self.tasks[d].status in ('failed', 'skipped')
+                                                    for d in self._deps(task)):
+                    task.status = 'skipped'
+                    changed = True
+
+    @staticmethod
+    def _run(task):
+        task.started = time.perf_counter()
+        try:
+            task.func()
+        finally:
+            task.seconds = time.perf_counter() - task.started
+
+    def run(self):
+        """
+        Run every task
+        :return: list of InstallTask in the order they were started, with status, seconds and error filled in
+        """
+        self.plan()
+        order = []
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                stop = self.fail_fast and any(t.status == 'failed' for t in self.tasks.values())
+                if not stop:
+                    for task in self.tasks.values():
+                        if len(running) >= self.max_workers:
+                            break
+                        if task.status == 'pending' and all(self.tasks[d].status == 'done' for d in self._deps(task)):
+                            task.status = 'running'
+                            order.append(task)
+                            running[pool.submit(self._run, task)] = task
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    task.error = future.exception()
+                    task.status = 'failed' if task.error is not None else 'done'
+                if not self.fail_fast:
+                    self._skip_dependents()
+        for task in self.tasks.values():
+            if task.status == 'pending':
+                task.status = 'skipped'
+        return order
+
+    def print_timings(self, order):
+        print('{t:<48} {s:>8} {sec:>9}'.format(t='task', s='status', sec='seconds'))
+        for task in order + [t for t in self.tasks.values() if t.status == 'skipped']:
+            print('{t:<48} {s:>8} {sec:>9}'.format(t=task.name, s=task.status,
+                                                    sec='{x:.2f}'.format(x=task.seconds) if task.seconds is not None
+                                                    else '-'))
+
+    def check(self):
+        """
+        :return: None, raises InstallError if any task failed
+        """
+        failed = [t for t in self.tasks.values() if t.status == 'failed']
+        if failed:
+            raise InstallError(failed)
@@ -9,8 +9,8 @@ class SurvoxAPIAccountList(SurvoxAPIBase):
     Class to manage a list of Survox accounts
     """
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAccountList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAccountList, self).__init__(base_url, headers, verbose, session)
 
     def list(self):
         """
@@ -21,25 +21,23 @@ class SurvoxAPIAccountList(SurvoxAPIBase):
 
 
 class SurvoxAPIAccount(SurvoxAPIBase):
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAccount, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAccount, self).__init__(base_url, headers, verbose, session)
         self.name = name
         valid, msg = valid_url_field('Account name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
 
-    def get(self):
+    def get(self, refresh=False):
         """
         Fetch details about the specified account
+        :param refresh: fetch the accounts even if the session's snapshot of them is still fresh
         :return:
         """
-        for x in self.api_get(endpoint='/accounts/'):
-            if x['name'] == self.name:
-                return x
-        return None
+        return self.api_get_snapshot('/accounts/', 'name', '/accounts/', refresh=refresh).get(self.name)
 
     @property
     def server(self):
         return SurvoxAPIAccountServer(account=self.name, base_url=self.base_url, headers=self.auth_headers,
-                                        verbose=self.verbose)
+                                        verbose=self.verbose, session=self.session)
 
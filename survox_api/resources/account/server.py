@@ -1,8 +1,8 @@
 from survox_api.resources.base import SurvoxAPIBase
 
 class SurvoxAPIAccountServer(SurvoxAPIBase):
-    def __init__(self, account, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAccountServer, self).__init__(base_url, headers, verbose)
+    def __init__(self, account, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAccountServer, self).__init__(base_url, headers, verbose, session)
         self.account = account
         self.endpoint = '/accounts/{account}/server/'.format(account=self.account)
         self.start_endpoint = '{b}start/'.format(b=self.endpoint)
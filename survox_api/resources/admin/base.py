@@ -14,67 +14,79 @@ class SurvoxAPIAdmin(SurvoxAPIBase):
     api.library.dnc{name}.delete(), etc.
     """
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAdmin, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAdmin, self).__init__(base_url, headers, verbose, session)
         self.url = '/admin/'
 
     @property
     def locations(self):
-        return SurvoxAPIAdminLocationList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIAdminLocationList(base_url=self.base_url, headers=self.auth_headers,
+                                          verbose=self.verbose, session=self.session)
 
     def location(self, name):
         valid, msg = valid_url_field('location name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPIAdminLocation(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIAdminLocation(name, base_url=self.base_url, headers=self.auth_headers,
+                                      verbose=self.verbose, session=self.session)
 
     @property
     def organizational_units(self):
-        return SurvAPIAdminOrgUnitList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminOrgUnitList(base_url=self.base_url, headers=self.auth_headers,
+                                       verbose=self.verbose, session=self.session)
 
     def organizational_unit(self, name):
         valid, msg = valid_url_field('organizational unit name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvAPIAdminOrgUnit(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminOrgUnit(name, base_url=self.base_url, headers=self.auth_headers,
+                                   verbose=self.verbose, session=self.session)
 
     @property
     def languages(self):
-        return SurvAPIAdminLanguageList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminLanguageList(base_url=self.base_url, headers=self.auth_headers,
+                                        verbose=self.verbose, session=self.session)
 
     def language(self, name):
         valid, msg = valid_url_field('language name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvAPIAdminLanguage(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminLanguage(name, base_url=self.base_url, headers=self.auth_headers,
+                                    verbose=self.verbose, session=self.session)
 
     @property
     def qualifications(self):
-        return SurvAPIAdminQualificationList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminQualificationList(base_url=self.base_url, headers=self.auth_headers,
+                                             verbose=self.verbose, session=self.session)
 
     def qualification(self, name):
         valid, msg = valid_url_field('qualification name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvAPIAdminQualification(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminQualification(name, base_url=self.base_url, headers=self.auth_headers,
+                                         verbose=self.verbose, session=self.session)
 
     @property
     def skills(self):
-        return SurvAPIAdminSkillList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminSkillList(base_url=self.base_url, headers=self.auth_headers,
+                                     verbose=self.verbose, session=self.session)
 
     def skill(self, name):
         valid, msg = valid_url_field('skill name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvAPIAdminSkill(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvAPIAdminSkill(name, base_url=self.base_url, headers=self.auth_headers,
+                                 verbose=self.verbose, session=self.session)
 
     @property
     def special_types(self):
-        return SurvoxAPIAdminLocationList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIAdminLocationList(base_url=self.base_url, headers=self.auth_headers,
+                                          verbose=self.verbose, session=self.session)
 
     def special_type(self, name):
         valid, msg = valid_url_field('special_type name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPIAdminLocation(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIAdminLocation(name, base_url=self.base_url, headers=self.auth_headers,
+                                      verbose=self.verbose, session=self.session)
 
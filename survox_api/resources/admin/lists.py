@@ -10,8 +10,8 @@ class SurvoxAPIAdminLocationList(SurvoxAPIBase):
     capability = 'location'
     list_endpoint = '/admin/locations/'
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAdminLocationList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAdminLocationList, self).__init__(base_url, headers, verbose, session)
 
     def list(self):
         return self.api_get(endpoint=self.list_endpoint)
@@ -38,8 +38,8 @@ class SurvoxAPIAdminLocation(SurvoxAPIBase):
     capability = 'location'
     list_endpoint = '/admin/locations/'
 
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIAdminLocation, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIAdminLocation, self).__init__(base_url, headers, verbose, session)
         self.name = name
 
     @property
@@ -0,0 +1,34 @@
+from ..account.base import SurvoxAPIAccountList, SurvoxAPIAccount
+from ..account.server import SurvoxAPIAccountServer
+from .base import SurvoxAPIAsyncBase
+
+
+class SurvoxAPIAsyncAccountList(SurvoxAPIAccountList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAccountList
+    """
+
+
+class SurvoxAPIAsyncAccount(SurvoxAPIAccount, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAccount
+    """
+
+    async def get(self, refresh=False):
+        """
+        Fetch details about the specified account
+        :param refresh: fetch the accounts even if the session's snapshot of them is still fresh
+        :return:
+        """
+        return (await self.api_get_snapshot('/accounts/', 'name', '/accounts/', refresh=refresh)).get(self.name)
+
+    @property
+    def server(self):
+        return SurvoxAPIAsyncAccountServer(account=self.name, base_url=self.base_url, headers=self.auth_headers,
+                                           verbose=self.verbose, session=self.session)
+
+
+class SurvoxAPIAsyncAccountServer(SurvoxAPIAccountServer, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAccountServer
+    """
@@ -0,0 +1,150 @@
+from ..admin.base import SurvoxAPIAdmin
+from ..admin.lists import SurvoxAPIAdminLocationList, SurvoxAPIAdminLocation
+from ..exception import SurvoxAPIRuntime, SurvoxAPIMissingParameter, SurvoxAPINotFound
+from ..valid import valid_url_field
+from .base import SurvoxAPIAsyncBase
+
+
+class SurvoxAPIAsyncAdminLocationList(SurvoxAPIAdminLocationList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAdminLocationList
+    """
+
+    async def create(self, name, description, exists_okay=False):
+        valid, msg = valid_url_field('{cap} name'.format(cap=self.capability), name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        try:
+            s = await self.api_get(endpoint='{base}{name}/'.format(base=self.list_endpoint, name=name))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('{cap} already exists: {name}'.format(cap=self.capability, name=name))
+            return s
+        except SurvoxAPINotFound:
+            pass
+        return await self.api_post(endpoint=self.list_endpoint, data={
+            'name': name,
+            'description': description
+        })
+
+
+class SurvoxAPIAsyncAdminLocation(SurvoxAPIAdminLocation, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAdminLocation
+    """
+
+    async def get(self):
+        try:
+            return await self.api_get(endpoint=self.endpoint)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, data):
+        """
+        update a client entry
+        :param data: dictionary for list {name: item-name, description: item-description}
+        :return: return the item added
+        """
+        if not data:
+            raise SurvoxAPIMissingParameter(self.capability)
+        c = await self.get()
+        if not c:
+            raise SurvoxAPIRuntime('No {cap} available named: {name}'.format(cap=self.capability, name=self.name))
+        return await self.api_put(endpoint=self.endpoint, data=data)
+
+
+class SurvAPIAsyncAdminOrgUnitList(SurvoxAPIAsyncAdminLocationList):
+    capability = 'location'
+    list_endpoint = '/admin/organizational-unit/'
+
+
+class SurvAPIAsyncAdminOrgUnit(SurvoxAPIAsyncAdminLocation):
+    capability = 'location'
+    list_endpoint = '/admin/organizational-unit/'
+
+
+class SurvAPIAsyncAdminLanguageList(SurvoxAPIAsyncAdminLocationList):
+    capability = 'language'
+    list_endpoint = '/admin/languages/'
+
+
+class SurvAPIAsyncAdminLanguage(SurvoxAPIAsyncAdminLocation):
+    capability = 'language'
+    list_endpoint = '/admin/languages/'
+
+
+class SurvAPIAsyncAdminQualificationList(SurvoxAPIAsyncAdminLocationList):
+    capability = 'location'
+    list_endpoint = '/admin/qualifications/'
+
+
+class SurvAPIAsyncAdminQualification(SurvoxAPIAsyncAdminLocation):
+    capability = 'location'
+    list_endpoint = '/admin/qualifications/'
+
+
+class SurvAPIAsyncAdminSkillList(SurvoxAPIAsyncAdminLocationList):
+    capability = 'skills'
+    list_endpoint = '/admin/skills/'
+
+
+class SurvAPIAsyncAdminSkill(SurvoxAPIAsyncAdminLocation):
+    capability = 'skills'
+    list_endpoint = '/admin/skills/'
+
+
+class SurvoxAPIAsyncAdmin(SurvoxAPIAdmin, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIAdmin, access it via api.admin.locations.list(), api.admin.skill(name).get(), etc.
+    """
+
+    def _child(self, cls, *args):
+        return cls(*args, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose,
+                   session=self.session)
+
+    def _named(self, label, cls, name):
+        valid, msg = valid_url_field(label, name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        return self._child(cls, name)
+
+    @property
+    def locations(self):
+        return self._child(SurvoxAPIAsyncAdminLocationList)
+
+    def location(self, name):
+        return self._named('location name', SurvoxAPIAsyncAdminLocation, name)
+
+    @property
+    def organizational_units(self):
+        return self._child(SurvAPIAsyncAdminOrgUnitList)
+
+    def organizational_unit(self, name):
+        return self._named('organizational unit name', SurvAPIAsyncAdminOrgUnit, name)
+
+    @property
+    def languages(self):
+        return self._child(SurvAPIAsyncAdminLanguageList)
+
+    def language(self, name):
+        return self._named('language name', SurvAPIAsyncAdminLanguage, name)
+
+    @property
+    def qualifications(self):
+        return self._child(SurvAPIAsyncAdminQualificationList)
+
+    def qualification(self, name):
+        return self._named('qualification name', SurvAPIAsyncAdminQualification, name)
+
+    @property
+    def skills(self):
+        return self._child(SurvAPIAsyncAdminSkillList)
+
+    def skill(self, name):
+        return self._named('skill name', SurvAPIAsyncAdminSkill, name)
+
+    @property
+    def special_types(self):
+        return self._child(SurvoxAPIAsyncAdminLocationList)
+
+    def special_type(self, name):
+        return self._named('special_type name', SurvoxAPIAsyncAdminLocation, name)
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import errno
+from json import dumps as json_dumps
+
+from requests.structures import CaseInsensitiveDict
+
+from ..base import SurvoxAPIBase
+from ..upload import SurvoxAPIUploadJournal, SurvoxAPIFileChunks
+from ..download import DEFAULT_BUFFER_SIZE
+from ..exception import SurvoxAPINotFound
+from ..instrument import log
+from .session import SurvoxAPIAsyncSession, SurvoxAPIAsyncResponse
+
+
+class SurvoxAPIAsyncBase(SurvoxAPIBase):
+    """
+    Base class to use aiohttp to interact with the Survox API.  Endpoint construction and response checking are
+    inherited from SurvoxAPIBase, only the transport calls are awaitable.
+    """
+
+    def __init__(self, base_url, headers, verbose=True, session=None):
+        if session is None:
+            session = SurvoxAPIAsyncSession()
+        super(SurvoxAPIAsyncBase, self).__init__(base_url, headers, verbose, session)
+
+    async def api_get(self, endpoint, headers=None, full_response=False, retry=None, idempotency_key=None, **kwargs):
+        """
+        Make a GET request to the specified endpoint
+        :param endpoint: api endpoint
+        :param headers: extra headers to pass with request
+        :param full_response: return the response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
+        :return: api response data, or full response structure
+        """
+        endpoint, headers = self._update_request_info('GET', endpoint, headers)
+
+        query = {k: v for (k, v) in kwargs.items() if v is not None}
+        key, entry, headers = self._cache_lookup(endpoint, query, headers)
+        r = await self.session.get(url=endpoint, headers=headers, params=query, retry=retry,
+                                   idempotency_key=idempotency_key)
+        r = self._cache_update(key, entry, r)
+        if full_response:
+            return r
+        return self._check_response(r, 'GET', endpoint)
+
+    async def api_post(self, endpoint, data=None, json=None, headers=None, full_response=False, retry=None,
+                       idempotency_key=None, **kwargs):
+        """
+        Make a POST request to the specified endpoint
+        :param endpoint: api endpoint
+        :param data: data to post
+        :param json: data to post in json format
+        :param headers: extra headers to pass with request
+        :param full_response: return the response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
+        :return: api response data, or full response structure
+        """
+        endpoint, headers = self._update_request_info('POST', endpoint, headers)
+        query = {k: v for (k, v) in kwargs.items() if v is not None}
+        if json:
+            headers = dict(headers)
+            headers.update({"Content-Type": "application/json"})
+            r = await self.session.post(endpoint, data=json_dumps(json), headers=headers, params=query, retry=retry,
+                                        idempotency_key=idempotency_key)
+        else:
+            r = await self.session.post(url=endpoint, data=data, headers=headers, params=query, retry=retry,
+                                        idempotency_key=idempotency_key)
+        if full_response:
+            return r
+        return self._check_response(r, 'POST', endpoint)
+
+    async def api_put(self, endpoint, data=None, json=None, headers=None, files=None, full_response=False, retry=None,
+                      idempotency_key=None, **kwargs):
+        """
+        Make a PUT request to the specified endpoint
+        :param endpoint: api endpoint
+        :param data: data to post, works for simple dictionaries
+        :param json: data to post using json for nested dictionaries, etc.
+        :param headers: extra headers to pass with request
+        :param files: files to upload, requests style [(field, (name, content))]
+        :param full_response: return the response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
+        :return: api response data, or full response structure
+        """
+        endpoint, headers = self._update_request_info('PUT', endpoint, headers)
+        query = {k: v for (k, v) in kwargs.items() if v is not None}
+        if files:
+            return await self.session.put(url=endpoint, data=data, headers=headers, files=files, params=query,
+                                          retry=retry, idempotency_key=idempotency_key)
+        if json:
+            r = await self.session.put(url=endpoint, json=json_dumps(json), headers=headers, params=query, retry=retry,
+                                       idempotency_key=idempotency_key)
+        else:
+            r = await self.session.put(url=endpoint, data=data, headers=headers, params=query, retry=retry,
+                                       idempotency_key=idempotency_key)
+        if full_response:
+            return r
+        return self._check_response(r, 'PUT', endpoint)
+
+    async def api_delete(self, endpoint, headers=None, full_response=False, retry=None, idempotency_key=None, **kwargs):
+        """
+        Make a DELETE request to the specified endpoint
+        :param endpoint: api endpoint
+        :param headers: extra headers to pass with request
+        :param full_response: return the response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
+        :return: api response data, or full response structure
+        """
+        endpoint, headers = self._update_request_info('DELETE', endpoint, headers)
+        query = {k: v for (k, v) in kwargs.items() if v is not None}
+        r = await self.session.delete(url=endpoint, headers=headers, params=query, retry=retry,
+                                      idempotency_key=idempotency_key)
+        if full_response:
+            return r
+        return self._check_response(r, 'DELETE', endpoint)
+
+    async def api_get_snapshot(self, endpoint, key, scope, refresh=False):
+        """
+        GET a list endpoint through the session's snapshot of it, only fetching it again once it's stale
+        :param endpoint: api endpoint of the list
+        :param key: row field to index the list by
+        :param scope: endpoint prefix whose changes make the list stale
+        :param refresh: fetch the list even if the snapshot is still fresh
+        :return: SurvoxAPISnapshot
+        """
+        snapshot = self.session.snapshots.get(self.base_url + endpoint, key, self.base_url + scope)
+        if refresh or not snapshot.fresh:
+            snapshot.update(await self.api_get(endpoint=endpoint))
+        return snapshot
+
+    async def api_upload(self, endpoint, filename, block_size=None, max_in_flight=None, resume=True):
+        """
+        Upload a file to the specified endpoint in blocks.  Blocks are sent one at a time; run several uploads
+        concurrently instead of using max_in_flight, which is accepted for compatibility with the sync client.
+        :param endpoint: api endpoint
+        :param filename: name of the file to upload
+        :param block_size: max size of a file block to send at a time
+        :param max_in_flight: ignored
+        :param resume: continue an interrupted upload of this file from its journal, and journal this one
+        :return: api response data
+        """
+        if not os.path.isfile(filename):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+
+        if not block_size:
+            block_size = 1000000
+        journal = SurvoxAPIUploadJournal() if resume else None
+        journal_key = '{base}{endpoint}'.format(base=self.base_url, endpoint=endpoint)
+        state = journal.load(journal_key, filename) if journal else None
+
+        with SurvoxAPIFileChunks(filename, block_size) as chunks:
+            if state and state.get('offset'):
+                log.info('Resuming upload of %s at byte %s', filename, state['offset'])
+                try:
+                    return await self._upload_from(chunks, filename, state['url'], state['offset'], journal,
+                                                   journal_key)
+                except RuntimeError:
+                    current = journal.load(journal_key, filename)
+                    if current and current.get('offset') != state['offset']:
+                        raise
+                # the server refused the first request of the resumed upload, most likely because the upload
+                # session expired: forget it and send the whole file again
+                log.info('Upload of %s could not be resumed, starting again', filename)
+                journal.clear(journal_key, filename)
+            return await self._upload_from(chunks, filename, endpoint, 0, journal, journal_key)
+
+    async def _upload_from(self, chunks, filename, endpoint, offset, journal, journal_key):
+        # send the blocks from offset on, endpoint being the url the block at offset goes to, then finalize
+        hash_md5 = hashlib.md5()
+        file_size = chunks.size
+        upload_name = os.path.basename(filename)
+        if offset:
+            # re-hash what the server already has
+            for _, block in chunks.blocks(0, offset):
+                hash_md5.update(block)
+        for offset, block in chunks.blocks(offset):
+            hash_md5.update(block)
+            chunk_end = offset + len(block)
+            my_headers = {
+                'CONTENT-RANGE': "bytes {offset}-{chunk_end}/{filesize}".format(offset=offset,
+                                                                                chunk_end=chunk_end,
+                                                                                filesize=file_size)
+            }
+            cur_data = {'filename': upload_name}
+            file = [('file', (upload_name, block))]
+            res = await self.api_put(endpoint=endpoint, headers=my_headers, data=cur_data, files=file,
+                                     full_response=True)
+            content = self._upload_content(res)
+            endpoint = content['data']['url']
+            if journal:
+                journal.save(journal_key, filename, endpoint, chunk_end)
+
+        # Finalize this thing
+        cur_data = {"md5": "{hash}".format(hash=hash_md5.hexdigest())}
+        res = await self.api_post(endpoint=endpoint, data=cur_data, full_response=True)
+        result = self._upload_content(res)['data']
+        if journal:
+            journal.clear(journal_key, filename)
+        return result
+
+    @staticmethod
+    async def _download_failed(endpoint, response):
+        if response.status == 404:
+            raise SurvoxAPINotFound('DOWNLOAD', endpoint, SurvoxAPIAsyncResponse(
+                response.status, response.headers, await response.read(), endpoint))
+        raise RuntimeError("Unable to download file from {url}".format(url=endpoint))
+
+    async def api_download(self, endpoint, filename, headers=None):
+        """
+        Download a file from the API endpoint
+        :param endpoint: api endpoint
+        :param filename:  file to save response in
+        :param headers: any additional headers to send when making request
+        :return: response headers
+        """
+        endpoint, headers = self._update_request_info('DOWNLOAD', endpoint, headers)
+        with open(filename, 'wb') as handle:
+            async with self.session.stream('GET', endpoint, headers=headers) as response:
+                if response.status >= 400:
+                    await self._download_failed(endpoint, response)
+                return_headers = CaseInsensitiveDict(response.headers)
+                async for block in response.content.iter_chunked(DEFAULT_BUFFER_SIZE):
+                    handle.write(block)
+        return return_headers
+
+    async def api_iter_lines(self, endpoint, headers=None, buffer_size=None, encoding='utf-8'):
+        """
+        Stream a file from the API endpoint one line at a time, without saving it
+        :param endpoint: api endpoint
+        :param headers: any additional headers to send when making request
+        :param buffer_size: bytes read from the socket at a time
+        :param encoding: text encoding of the file
+        :return: async iterator of lines, without line endings
+        """
+        endpoint, headers = self._update_request_info('DOWNLOAD', endpoint, headers)
+        pending = b''
+        async with self.session.stream('GET', endpoint, headers=headers) as response:
+            if response.status >= 400:
+                await self._download_failed(endpoint, response)
+            async for block in response.content.iter_chunked(buffer_size or DEFAULT_BUFFER_SIZE):
+                lines = (pending + block).split(b'\n')
+                pending = lines.pop()
+                for line in lines:
+                    yield line.rstrip(b'\r').decode(encoding)
+        if pending:
+            yield pending.rstrip(b'\r').decode(encoding)
@@ -0,0 +1,109 @@
+from ..client.base import SurvoxAPIClientList, SurvoxAPIClient
+from ..client.credentials import SurvoxAPIClientCredentialList, SurvoxAPIClientCredential
+from ..exception import SurvoxAPIRuntime, SurvoxAPIMissingParameter, SurvoxAPINotFound
+from ..valid import valid_url_field
+from .base import SurvoxAPIAsyncBase
+
+
+class SurvoxAPIAsyncClientList(SurvoxAPIClientList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIClientList
+    """
+
+    async def create(self, name, client_description, exists_okay=False):
+        valid, msg = valid_url_field('Client name', name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        try:
+            s = await self.api_get(endpoint='{base}{client}/'.format(base=self.url, client=name))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('Client already exists: {client}'.format(client=name))
+            return s
+        except SurvoxAPINotFound:
+            pass
+        return await self.api_post(endpoint=self.url, data={
+            'client': name,
+            'name': client_description
+        })
+
+
+class SurvoxAPIAsyncClient(SurvoxAPIClient, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIClient
+    """
+
+    async def get(self):
+        try:
+            return await self.api_get(endpoint=self.url)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, client):
+        """
+        update a client entry
+        :param client: client dictionary
+        :return: return the client properties
+        """
+        if not client:
+            raise SurvoxAPIMissingParameter('client')
+        c = await self.get()
+        if not c:
+            raise SurvoxAPIRuntime('No client available named: {name}'.format(name=self.name))
+        return await self.api_put(endpoint=self.url, data=client)
+
+    @property
+    def credentials(self):
+        return SurvoxAPIAsyncClientCredentialList(client=self.name, base_url=self.base_url, headers=self.auth_headers,
+                                                  verbose=self.verbose, session=self.session)
+
+    def credential(self, third_party):
+        return SurvoxAPIAsyncClientCredential(third_party=third_party, client=self.name, base_url=self.base_url,
+                                              headers=self.auth_headers, verbose=self.verbose, session=self.session)
+
+
+class SurvoxAPIAsyncClientCredentialList(SurvoxAPIClientCredentialList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIClientCredentialList
+    """
+
+    async def create(self, third_party, credentials, exists_okay=False):
+        valid, msg = valid_url_field('Client name', third_party, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        try:
+            s = await self.api_get(endpoint='{base}{third_party}/'.format(base=self.url, third_party=third_party))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('Credentials already exist for: {third_party}'.format(third_party=third_party))
+            return s
+        except SurvoxAPINotFound:
+            pass
+        return await self.api_post(endpoint=self.url, data={
+            'third_party': third_party,
+            'credentials': credentials
+        })
+
+
+class SurvoxAPIAsyncClientCredential(SurvoxAPIClientCredential, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIClientCredential
+    """
+
+    async def get(self):
+        try:
+            return await self.api_get(endpoint=self.url)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, credentials):
+        """
+        update a client credentials entry
+        :param credentials: third-party credentials as a json string
+        :return: return updated json string of the clients third-party credentials
+        """
+        if not credentials:
+            raise SurvoxAPIMissingParameter('client')
+        c = await self.get()
+        if not c:
+            raise SurvoxAPIRuntime(
+                'No client credential available named: {third_party}'.format(third_party=self.third_party))
+        return await self.api_put(endpoint=self.url, data=credentials)
@@ -0,0 +1,238 @@
+import csv
+import os
+
+from ..exception import SurvoxAPIRuntime, SurvoxAPINotFound
+from ..valid import valid_url_field
+from ..library.base import SurvoxAPILibrary
+from ..library.sample_dnc import SurvoxAPIDncList, SurvoxAPIDnc
+from ..library.sample_map import SurvoxAPISampleMapList, SurvoxAPISampleMap
+from ..library.sample_setup_rules import SurvoxAPISampleSetupRulesList, SurvoxAPISampleSetupRules
+from ..library.sample_calling_rules import SurvoxAPISampleCallingRulesList, SurvoxAPISampleCallingRules
+from .base import SurvoxAPIAsyncBase
+
+
+class SurvoxAPIAsyncDncList(SurvoxAPIDncList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIDncList
+    """
+
+    async def create(self, name, description, dnc_type, account, filename=None, exists_okay=False):
+        """
+        Create a new DNC list
+        :param name: new DNC list name
+        :param dnc_type: DNC list type
+        :param description: DNC description
+        :param account: Survox runtime account to put the DNC list into
+        :param filename: csv file containing dnc information
+        :param exists_okay: return existing list if True, else raise exception
+        :return: dnc list information
+        """
+        valid, msg = valid_url_field('Do-Not-Contact', name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        valid_dnc_types = ['phone', 'prefix', 'email']
+        if dnc_type not in valid_dnc_types:
+            raise SurvoxAPIRuntime('Unknown DNC type "{type}".  Must be one of {opts}'.format(
+                type=dnc_type, opts=', '.join(valid_dnc_types)))
+        try:
+            s = await self.api_get(endpoint='{base}{name}/'.format(base=self.url, name=name))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('Do-Not-Contact already exists: {name}'.format(name=name))
+        except SurvoxAPINotFound:
+            s = await self.api_post(endpoint=self.url, data={
+                'name': name,
+                'dnc_type': dnc_type,
+                'description': description,
+                'account': account
+            })
+        if s and filename:
+            if not os.path.isfile(filename):
+                raise SurvoxAPIRuntime('No such filename for Do-Not-Contact: {name}'.format(name=filename))
+            x = SurvoxAPIAsyncDnc(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose,
+                                  session=self.session)
+            s['upload_result'] = await x.upload(filename)
+        return s
+
+
+class SurvoxAPIAsyncDnc(SurvoxAPIDnc, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPIDnc
+    """
+
+    async def get(self):
+        try:
+            return await self.api_get(endpoint=self.url)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, description=None, realtime=None):
+        """
+        update a DNC entry
+        :param description: new description for DNC list
+        :param realtime: if True, set DNC list as realtime, unset as realtime if False
+        :return: return the DNC list properties
+        """
+        dnc = await self.get()
+        if not dnc:
+            raise SurvoxAPIRuntime('No DNC available named: {name}'.format(name=self.name))
+        if not description and not realtime:
+            raise SurvoxAPIRuntime('No properties passed to set for DNC named: {name}'.format(name=self.name))
+
+        changes = {}
+        if description and description != dnc['description']:
+            changes['description'] = description
+        if realtime and realtime != dnc['realtime']:
+            changes['realtime'] = realtime
+
+        if changes:
+            return await self.api_put(endpoint=self.url, data=changes)
+        else:
+            return dnc
+
+    async def _download_location(self):
+        download_location = await self.api_get(self.download_url)
+        if not download_location:
+            raise SurvoxAPIRuntime('No DNC available for download: {name}'.format(name=self.name))
+        return download_location
+
+    async def download(self, filename):
+        """
+        Download a dnc file in csv format
+        :param filename: file to save as
+        :return:
+        """
+        return await self.api_download(await self._download_location(), filename)
+
+    async def iter_records(self, buffer_size=None):
+        """
+        Stream the dnc list in csv format without saving it, use as "async for record in dnc.iter_records():"
+        :param buffer_size: bytes read from the socket at a time
+        :return: async iterator of csv records, each a list of fields
+        """
+        async for line in self.api_iter_lines(await self._download_location(), buffer_size=buffer_size):
+            for record in csv.reader([line]):
+                yield record
+
+
+class SurvoxAPIAsyncTemplateList:
+    """
+    Mixin with the shared create() of the async library template lists, which are all keyed by template 'name'
+    """
+    label = 'Template'
+
+    async def create(self, template, exists_okay=False):
+        """
+        Create a new template
+        :param template: parameters for the template, including its 'name'
+        :param exists_okay: if template exists and True skip create, otherwise raise exception
+        :return: template
+        """
+        valid, msg = valid_url_field(self.label, template['name'], 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        try:
+            s = await self.api_get(endpoint='{base}{name}/'.format(base=self.url, name=template['name']))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('{label} already exists: {name}'.format(label=self.label,
+                                                                                 name=template['name']))
+            return s
+        except SurvoxAPINotFound:
+            return await self.api_post(endpoint=self.url, data=template)
+
+
+class SurvoxAPIAsyncTemplate:
+    """
+    Mixin with the shared get()/set() of a specific async library template
+    """
+    label = 'Template'
+
+    async def get(self):
+        """
+        Fetch the template
+        :return: template, or None
+        """
+        try:
+            return await self.api_get(endpoint=self.url)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, template):
+        """
+        Update the template
+        :param template: new template parameters
+        :return: updated template
+        """
+        existing = await self.get()
+        if not existing:
+            raise SurvoxAPIRuntime('No {label}: {name}'.format(label=self.label.lower(), name=self.name))
+        return await self.api_put(endpoint=self.url, data=template)
+
+
+class SurvoxAPIAsyncSampleMapList(SurvoxAPIAsyncTemplateList, SurvoxAPISampleMapList, SurvoxAPIAsyncBase):
+    label = 'Sample map template'
+
+
+class SurvoxAPIAsyncSampleMap(SurvoxAPIAsyncTemplate, SurvoxAPISampleMap, SurvoxAPIAsyncBase):
+    label = 'Sample map template'
+
+
+class SurvoxAPIAsyncSampleSetupRulesList(SurvoxAPIAsyncTemplateList, SurvoxAPISampleSetupRulesList,
+                                         SurvoxAPIAsyncBase):
+    label = 'Sample setup rule'
+
+
+class SurvoxAPIAsyncSampleSetupRules(SurvoxAPIAsyncTemplate, SurvoxAPISampleSetupRules, SurvoxAPIAsyncBase):
+    label = 'Sample setup rule'
+
+
+class SurvoxAPIAsyncSampleCallingRulesList(SurvoxAPIAsyncTemplateList, SurvoxAPISampleCallingRulesList,
+                                           SurvoxAPIAsyncBase):
+    label = 'Sample calling rule'
+
+
+class SurvoxAPIAsyncSampleCallingRules(SurvoxAPIAsyncTemplate, SurvoxAPISampleCallingRules, SurvoxAPIAsyncBase):
+    label = 'Sample calling rule'
+
+
+class SurvoxAPIAsyncLibrary(SurvoxAPILibrary, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPILibrary, access it via api.library.dncs.list(), api.library.dnc(name).delete(), etc.
+    """
+
+    def _named(self, label, cls, name):
+        valid, msg = valid_url_field(label, name, 1, 256)
+        if not valid:
+            raise SurvoxAPIRuntime(msg)
+        return cls(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose,
+                   session=self.session)
+
+    def _child(self, cls):
+        return cls(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose, session=self.session)
+
+    @property
+    def dncs(self):
+        return self._child(SurvoxAPIAsyncDncList)
+
+    def dnc(self, name):
+        return self._named('DNC setup name', SurvoxAPIAsyncDnc, name)
+
+    @property
+    def sample_maps(self):
+        return self._child(SurvoxAPIAsyncSampleMapList)
+
+    def sample_map(self, name):
+        return self._named('Sample map name', SurvoxAPIAsyncSampleMap, name)
+
+    @property
+    def sample_setup_rules(self):
+        return self._child(SurvoxAPIAsyncSampleSetupRulesList)
+
+    def sample_setup_rule(self, name):
+        return self._named('Sample setup name', SurvoxAPIAsyncSampleSetupRules, name)
+
+    @property
+    def sample_calling_rules(self):
+        return self._child(SurvoxAPIAsyncSampleCallingRulesList)
+
+    def sample_calling_rule(self, name):
+        return self._named('Sample setup name', SurvoxAPIAsyncSampleCallingRules, name)
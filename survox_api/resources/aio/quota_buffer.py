@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from ..exception import SurvoxAPIRuntime
+from ..survey.quota_buffer import SurvoxAPIQuotaIncrementBuffer, DEFAULT_MAX_PENDING, DEFAULT_MAX_DELAY, \
+    DEFAULT_FLUSH_IN_FLIGHT
+
+
+class SurvoxAPIAsyncQuotaIncrementBuffer(SurvoxAPIQuotaIncrementBuffer):
+    """
+    Async version of SurvoxAPIQuotaIncrementBuffer, flushed by a task on the running event loop:
+
+        async with api.survey('my_survey').quotas.increment_buffer() as quotas:
+            quotas.increment('q_male')
+
+    There's no event loop left at interpreter exit, so pending increments are only guaranteed to be sent by
+    awaiting close() or leaving the "async with" block.
+    """
+
+    def __init__(self, quotas, max_pending=None, max_delay=None, max_in_flight=None, on_flush=None):
+        self.quotas = quotas
+        self.max_pending = max_pending or DEFAULT_MAX_PENDING
+        self.max_delay = max_delay or DEFAULT_MAX_DELAY
+        self.max_in_flight = max(1, max_in_flight or DEFAULT_FLUSH_IN_FLIGHT)
+        self.on_flush = on_flush
+        self.error = None
+        self.dropped = []
+        self._pending = defaultdict(int)
+        self._counts = defaultdict(int)
+        self._retries = []
+        self._count = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = None
+        self._wake = None
+        self._closed = False
+        self._task = None
+
+    def _start(self):
+        # asyncio primitives have to be made inside the running loop
+        if self._task is None:
+            self._flush_lock = asyncio.Lock()
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def increment(self, name, amount=1):
+        """
+        Queue an increment of a quota, must be called from inside the event loop
+        :param name: quota name
+        :param amount: how much to increment, may be negative
+        :return: None
+        """
+        self._start()
+        with self._lock:
+            if self._closed:
+                raise SurvoxAPIRuntime('quota increment buffer is closed')
+            self._pending[name] += int(amount)
+            self._counts[name] += 1
+            self._count += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = self._count >= self.max_pending
+        if full:
+            self._wake.set()
+
+    async def flush(self):
+        """
+        Send everything pending now
+        :return: list of updated quotas
+        """
+        self._start()
+        async with self._flush_lock:
+            sends, count, oldest = self._take()
+            if not count:
+                return []
+            started = time.monotonic()
+            in_flight = asyncio.Semaphore(self.max_in_flight)
+
+            async def send(name, amount, key):
+                async with in_flight:
+                    return await self._send(name, amount, key)
+
+            outcomes = await asyncio.gather(*[send(name, amount, key) for (name, amount, _, key) in sends],
+                                            return_exceptions=True)
+            results, failed, dropped, error = self._settle(sends, outcomes, oldest)
+            self._sent(sends, count, oldest, started, failed, dropped)
+            if error is not None:
+                raise error
+            return results
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.max_delay / 4)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closed:
+                break
+            if self._due():
+                try:
+                    await self.flush()
+                    self.error = None
+                except Exception as e:
+                    # kept for the caller to inspect, the increments are retried on the next flush
+                    self.error = e
+
+    async def close(self):
+        """
+        Stop the background flusher and send whatever is still pending
+        :return: None
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._task is not None:
+            self._wake.set()
+            await self._task
+        await self.flush()
+
+    def __enter__(self):
+        raise RuntimeError('SurvoxAPIAsyncQuotaIncrementBuffer must be used with "async with"')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
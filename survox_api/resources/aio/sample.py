@@ -0,0 +1,239 @@
+import asyncio
+import csv
+import ntpath
+import os
+import tempfile
+import time
+
+from ..exception import SurvoxAPIRuntime, SurvoxAPIMissingParameter, SurvoxAPINotFound
+from ..survey.sample.sample import SurvoxAPISurveySample
+from ..survey.sample.map import SurvoxAPISurveySampleMap
+from ..survey.sample.setup_rules import SurvoxAPISurveySampleSetupRules
+from ..survey.sample.calling_rules import SurvoxAPISurveySampleCallingRules
+from ..survey.sample.selection import SurvoxAPISurveySampleSelection
+from ..survey.sample.preflight import SurvoxAPISamplePreflight
+from ..survey.sample.pipeline import CONFIGS, DEFAULT_WORKERS
+from ..survey.sample.records import DEFAULT_BATCH_SIZE, column_types, make_batch
+from ..survey.sample.store import SurvoxAPISampleStoreWriter
+from ..survey.sample.timezones import SurvoxAPITimezoneSlots
+from .base import SurvoxAPIAsyncBase
+
+
+class SurvoxAPIAsyncSurveySampleConfig:
+    """
+    Mixin with the shared create() of the per survey sample map, setup rules and calling rules
+    """
+    label = 'Sample configuration'
+
+    async def create(self, config, exists_okay=False):
+        if not config:
+            raise SurvoxAPIMissingParameter(self.label.lower())
+        s = None
+        try:
+            s = await self.api_get(endpoint=self.url)
+            if s and not exists_okay:
+                raise SurvoxAPIRuntime('{label} already exist for survey: {sid}'.format(label=self.label,
+                                                                                        sid=self.sid))
+        except SurvoxAPINotFound:
+            pass
+        if not s:
+            s = await self.api_post(endpoint=self.url, json=config)
+        return s
+
+
+class SurvoxAPIAsyncSurveySampleMap(SurvoxAPIAsyncSurveySampleConfig, SurvoxAPISurveySampleMap,
+                                    SurvoxAPIAsyncBase):
+    label = 'Sample map'
+
+
+class SurvoxAPIAsyncSurveySampleSetupRules(SurvoxAPIAsyncSurveySampleConfig, SurvoxAPISurveySampleSetupRules,
+                                           SurvoxAPIAsyncBase):
+    label = 'Sample setup rules'
+
+
+class SurvoxAPIAsyncSurveySampleCallingRules(SurvoxAPIAsyncSurveySampleConfig, SurvoxAPISurveySampleCallingRules,
+                                             SurvoxAPIAsyncBase):
+    label = 'Sample calling rules'
+
+
+class SurvoxAPIAsyncSurveySampleSelection(SurvoxAPISurveySampleSelection, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveySampleSelection
+    """
+
+    @property
+    def sample(self):
+        return SurvoxAPIAsyncSurveySample(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                          verbose=self.verbose, session=self.session)
+
+    async def list(self, selection):
+        preview = await self.api_post(endpoint=self._selection_url('list'), json=selection)
+        return self.session.previews.set(self.preview_scope, selection, preview)
+
+    async def preview(self, selection, refresh=False):
+        preview = None if refresh else self.session.previews.get(self.preview_scope, selection)
+        return preview or await self.list(selection)
+
+    async def iter_records(self, selection, batch_size=None, fields=None, buffer_size=None):
+        """
+        Async version of SurvoxAPISurveySampleSelection.iter_records(), an async iterator of SurvoxAPIRecordBatch
+        """
+        types = column_types(await self.sample.fields(system=True) if fields is None else fields)
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        preview = await self.preview(selection)
+        try:
+            lines = self.api_iter_lines(self._download_link(preview), buffer_size=buffer_size)
+            header = await lines.__anext__()
+        except SurvoxAPINotFound:
+            preview = await self.preview(selection, refresh=True)
+            lines = self.api_iter_lines(self._download_link(preview), buffer_size=buffer_size)
+            header = await lines.__anext__()
+        except StopAsyncIteration:
+            return
+        header = next(csv.reader([header]))
+        pending = []
+        async for line in lines:
+            pending.append(line)
+            if len(pending) >= batch_size:
+                yield make_batch(header, list(csv.reader(pending)), types)
+                pending = []
+        if pending:
+            yield make_batch(header, list(csv.reader(pending)), types)
+
+    async def store(self, directory, selection=None, batch_size=None, fields=None):
+        """
+        Async version of SurvoxAPISurveySampleSelection.store()
+        """
+        fields = await self.sample.fields(system=True) if fields is None else fields
+        writer = SurvoxAPISampleStoreWriter(directory, fields)
+        try:
+            async for batch in self.iter_records(selection or {}, batch_size=batch_size, fields=fields):
+                writer.add(batch)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.finish()
+
+    async def download(self, selection, filename):
+        preview = await self.preview(selection)
+        try:
+            return await self.api_download(endpoint=self._download_link(preview), filename=filename)
+        except SurvoxAPINotFound:
+            preview = await self.preview(selection, refresh=True)
+            return await self.api_download(endpoint=self._download_link(preview), filename=filename)
+
+
+class SurvoxAPIAsyncSurveySample(SurvoxAPISurveySample, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveySample
+    """
+
+    def _child(self, cls):
+        return cls(sid=self.sid, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose,
+                   session=self.session)
+
+    @property
+    def map(self):
+        return self._child(SurvoxAPIAsyncSurveySampleMap)
+
+    @property
+    def setup_rules(self):
+        return self._child(SurvoxAPIAsyncSurveySampleSetupRules)
+
+    @property
+    def calling_rules(self):
+        return self._child(SurvoxAPIAsyncSurveySampleCallingRules)
+
+    @property
+    def selection(self):
+        return self._child(SurvoxAPIAsyncSurveySampleSelection)
+
+    async def preflight(self, filename, output, sample_map=None, setup_rules=None, fix=False, rejects=None,
+                        batch_size=None):
+        if sample_map is None:
+            sample_map = await self.map.get()
+        if setup_rules is None:
+            setup_rules = await self.setup_rules.get()
+        checker = SurvoxAPISamplePreflight(sample_map, setup_rules, fix=fix, batch_size=batch_size)
+        return checker.run(filename, output, rejects=rejects)
+
+    async def timezones(self, setup_rules=None, table=None):
+        if setup_rules is None:
+            setup_rules = await self.setup_rules.get()
+        return SurvoxAPITimezoneSlots(setup_rules, table=table)
+
+    async def add(self, filename, sample_map, setup_rules, calling_rules, exists_okay=False, block_size=100000,
+                  preflight=False, fix=False, semaphore=None):
+        """
+        Async version of SurvoxAPISurveySample.add(), with semaphore an asyncio.Semaphore shared by the surveys
+        whose sample is added at the same time, in place of a pipeline
+        """
+        with tempfile.TemporaryDirectory() as workdir:
+            preflight_results = None
+            if preflight:
+                clean = os.path.join(workdir, ntpath.basename(filename))
+                preflight_results = await self.preflight(filename, clean, sample_map=sample_map,
+                                                         setup_rules=setup_rules, fix=fix)
+                if self.verbose:
+                    print('sample preflight: {r} records, {w} clean, {x} rejected'.format(
+                        r=preflight_results['records'], w=preflight_results['written'],
+                        x=preflight_results['rejected']))
+                filename = clean
+            results = await self._add(filename, sample_map, setup_rules, calling_rules, exists_okay, block_size,
+                                      semaphore)
+        if preflight:
+            results['sample_preflight_result'] = preflight_results
+        return results
+
+    async def _add(self, filename, sample_map, setup_rules, calling_rules, exists_okay, block_size, semaphore):
+        configs = (sample_map, setup_rules, calling_rules)
+        for (_, _, label), config in zip(CONFIGS, configs):
+            if not config:
+                raise SurvoxAPIRuntime('missing required parameter: {p}'.format(p=label.lower()))
+        semaphore = semaphore or asyncio.Semaphore(DEFAULT_WORKERS)
+        started = time.perf_counter()
+        timings = {}
+
+        async def step(coroutine, stage=None):
+            async with semaphore:
+                began = time.perf_counter()
+                try:
+                    return await coroutine
+                finally:
+                    if stage:
+                        timings[stage] = time.perf_counter() - began
+
+        async def existing(resource):
+            try:
+                return await resource.get()
+            except SurvoxAPINotFound:
+                return None
+
+        async def configure():
+            resources = [getattr(self, attr) for _, attr, _ in CONFIGS]
+            began = time.perf_counter()
+            current = await asyncio.gather(*(step(existing(r)) for r in resources))
+            timings['check'] = time.perf_counter() - began
+            if not exists_okay:
+                for (_, _, label), found in zip(CONFIGS, current):
+                    if found:
+                        raise SurvoxAPIRuntime('{label} already exist for survey: {sid}'.format(label=label,
+                                                                                                sid=self.sid))
+            began = time.perf_counter()
+            created = await asyncio.gather(*(step(r.api_post(endpoint=r.url, json=config))
+                                             for r, config, found in zip(resources, configs, current) if not found))
+            timings['create'] = time.perf_counter() - began
+            created = iter(created)
+            return {key: found or next(created) for (key, _, _), found in zip(CONFIGS, current)}
+
+        if self.verbose:
+            print('uploading sample file: {file}, sample map and rules'.format(file=filename))
+        upload, results = await asyncio.gather(step(self.upload(filename=filename, block_size=block_size), 'upload'),
+                                               configure())
+        results['sample_upload_result'] = upload
+        if self.verbose:
+            print('generating sample from file: {x}'.format(x=filename))
+        results['sample_import_result'] = await step(self.import_csv(filename), 'import')
+        timings['total'] = time.perf_counter() - started
+        results['timings'] = timings
+        return results
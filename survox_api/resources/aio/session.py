@@ -0,0 +1,232 @@
+import asyncio
+import time
+from json import loads as json_loads
+
+from requests.structures import CaseInsensitiveDict
+
+from ..exception import SurvoxAPIRuntime
+from ..cache import SurvoxAPITTLCache, SurvoxAPISnapshots, SurvoxAPIPreviews
+from ..session import SurvoxAPISession
+from ..instrument import SurvoxAPIInstrumentation
+
+
+class SurvoxAPIAsyncResponse:
+    """
+    Fully read aiohttp response, exposing the parts of the requests response interface the SDK relies on
+    (status_code, headers, text, json()) so the sync error handling can be reused as-is.
+    """
+
+    def __init__(self, status_code, headers, content, url, encoding=None):
+        self.status_code = status_code
+        # case-insensitive like requests' headers, so shared code such as the retry policy finds Retry-After however
+        # the server spells it
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+        self.encoding = encoding or 'utf-8'
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json_loads(self.text)
+
+
+class SurvoxAPIAsyncSession:
+    """
+    Pooled aiohttp transport shared by an AsyncSurvoxAPI object and every resource created from it.
+    aiohttp is only needed when this class is used: pip install survox_api_sdk[async]
+    """
+
+    def __init__(self, pool_maxsize=100, pool_maxsize_per_host=10, keep_alive=True, keepalive_timeout=15,
+                 survey_cache_ttl=60, status_refresh=30, retry=None, limiter=None, http_cache=None, preview_ttl=300):
+        """
+        :param pool_maxsize: max connections open at once, across all hosts
+        :param pool_maxsize_per_host: max connections open at once to any single host
+        :param keep_alive: if False, close the connection after every request
+        :param keepalive_timeout: seconds an idle connection is kept for reuse
+        :param survey_cache_ttl: seconds a survey's details are trusted before they're fetched again, 0 to always fetch
+        :param status_refresh: seconds a snapshot of /surveys-status/ or /accounts/ is used before it's fetched
+                               again, 0 to always fetch
+        :param retry: SurvoxAPIRetryPolicy for transient failures, False to never retry
+        :param limiter: SurvoxAPIRateLimiter capping request rates and concurrency per endpoint class, False for
+                        no limits
+        :param http_cache: SurvoxAPIHTTPCache revalidating GET responses with ETag/Last-Modified, False for none
+        :param preview_ttl: seconds a sample selection's list() preview is reused, e.g. by download(), 0 to never
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise SurvoxAPIRuntime('AsyncSurvoxAPI requires aiohttp - pip install aiohttp')
+        self._aiohttp = aiohttp
+        self.retry = SurvoxAPISession._retry_policy(retry)
+        self.limiter = SurvoxAPISession._rate_limiter(limiter)
+        self.http_cache = SurvoxAPISession._http_cache(http_cache)
+        self.surveys = SurvoxAPITTLCache(survey_cache_ttl)
+        self.snapshots = SurvoxAPISnapshots(status_refresh)
+        self.previews = SurvoxAPIPreviews(preview_ttl)
+        self.instrumentation = SurvoxAPIInstrumentation()
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.keep_alive = keep_alive
+        self.keepalive_timeout = keepalive_timeout
+        self.http = None
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _client(self):
+        # aiohttp wants its session created from inside the running event loop, so it's built on first use
+        if self._closed:
+            raise SurvoxAPIRuntime('HTTP session is closed')
+        if self.http is None:
+            connector = self._aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize_per_host,
+                                                   force_close=not self.keep_alive,
+                                                   keepalive_timeout=self.keepalive_timeout if self.keep_alive
+                                                   else None)
+            self.http = self._aiohttp.ClientSession(connector=connector)
+        return self.http
+
+    @staticmethod
+    def _params(params):
+        # aiohttp refuses non-string query values, requests just str() them
+        if not params:
+            return None
+        return {k: v if isinstance(v, str) else str(v) for (k, v) in params.items()}
+
+    def _form(self, data, files):
+        form = self._aiohttp.FormData()
+        for k, v in (data or {}).items():
+            form.add_field(k, v if isinstance(v, str) else str(v))
+        for field, (name, content) in files:
+            form.add_field(field, content, filename=name)
+        return form
+
+    def _kwargs(self, kwargs):
+        # a FormData body can only be sent once, so this builds a fresh one for every attempt
+        kwargs = dict(kwargs)
+        kwargs['params'] = self._params(kwargs.get('params'))
+        files = kwargs.pop('files', None)
+        if files:
+            kwargs['data'] = self._form(kwargs.get('data'), files)
+        return kwargs
+
+    @staticmethod
+    def cached_response(entry, response):
+        """
+        Turn a cache entry into a response, after the server answered 304 Not Modified
+        :param entry: SurvoxAPICacheEntry
+        :param response: the 304 response
+        :return: SurvoxAPIAsyncResponse
+        """
+        cached = SurvoxAPIAsyncResponse(entry.status_code, entry.headers, entry.content, response.url)
+        cached.attempts = getattr(response, 'attempts', 1)
+        cached.from_cache = True
+        return cached
+
+    def policy(self, retry=None):
+        return self.retry if retry is None else SurvoxAPISession._retry_policy(retry)
+
+    async def request(self, method, url, retry=None, idempotency_key=None, **kwargs):
+        """
+        Send a request over the pooled connections and read the whole response, retrying transient failures as
+        the retry policy allows
+        :param method: HTTP method
+        :param url: full url of the request
+        :param retry: per-call retry override, None for the session's policy, False to send once, or a policy
+        :param idempotency_key: sent as the Idempotency-Key header, lets a POST be retried
+        :param kwargs: headers, params, data, json and requests style files=[(field, (name, content))]
+        :return: SurvoxAPIAsyncResponse
+        """
+        hooks = self.instrumentation
+        if not hooks.subscribers:
+            return await self._request(method, url, retry, idempotency_key, kwargs)
+        event = hooks.start(method, url)
+        started = time.perf_counter()
+        try:
+            r = await self._request(method, url, retry, idempotency_key, kwargs)
+            hooks.response(event, r)
+            return r
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.latency = time.perf_counter() - started
+            hooks.end(event)
+
+    async def _request(self, method, url, retry, idempotency_key, kwargs):
+        policy = self.policy(retry)
+        if idempotency_key:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Idempotency-Key': idempotency_key})
+        retryable = policy.retryable(method, idempotency_key)
+        policy.count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            policy.count('attempts')
+            try:
+                async with self.limiter.acquire_async(url):
+                    async with self._client().request(method, url, **self._kwargs(kwargs)) as r:
+                        content = await r.read()
+                        response = SurvoxAPIAsyncResponse(r.status, r.headers, content, str(r.url),
+                                                          r.charset)
+            except (self._aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                wait = policy.delay(attempt) if retryable else None
+                if wait is None:
+                    if retryable:
+                        policy.count('gave_up')
+                    raise
+            else:
+                wait = policy.delay(attempt, response) if retryable else None
+                if wait is None:
+                    if retryable and response.status_code in policy.statuses:
+                        policy.count('gave_up')
+                    response.attempts = attempt
+                    return response
+            policy.count('retries')
+            await asyncio.sleep(wait)
+
+    def stream(self, method, url, **kwargs):
+        """
+        Send a request and hand back the unread aiohttp response, use as "async with session.stream(...) as r:"
+        :param method: HTTP method
+        :param url: full url of the request
+        :param kwargs: same as request()
+        :return: aiohttp response context manager
+        """
+        return self._client().request(method, url, **self._kwargs(kwargs))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request('PUT', url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request('DELETE', url, **kwargs)
+
+    async def close(self):
+        """
+        Close every pooled connection
+        :return: None
+        """
+        self._closed = True
+        if self.http is not None:
+            await self.http.close()
+            self.http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,243 @@
+import asyncio
+
+from ..exception import SurvoxAPIRuntime, SurvoxAPINotFound
+from ..survey.base import SurvoxAPISurveyList, SurvoxAPISurvey
+from ..survey.quota import SurvoxAPISurveyQuotaList, SurvoxAPISurveyQuota, DEFAULT_SYNC_IN_FLIGHT
+from ..survey.questionnaire.base import SurvoxAPISurveyQuestionnaire
+from ..survey.questionnaire.modes import SurvoxAPISurveyQuestionnaireModeCati, SurvoxAPISurveyQuestionnaireModeOnline
+from .base import SurvoxAPIAsyncBase
+from .sample import SurvoxAPIAsyncSurveySample
+from .quota_buffer import SurvoxAPIAsyncQuotaIncrementBuffer
+
+
+class SurvoxAPIAsyncSurveyList(SurvoxAPISurveyList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveyList
+    """
+
+    async def status(self, refresh=False):
+        """
+        return a list of surveys statuses from the API
+        :param refresh: fetch the statuses even if the session's snapshot of them is still fresh
+        """
+        return (await self.api_get_snapshot('/surveys-status/', 'surveycode', self.url, refresh=refresh)).rows
+
+    async def create(self, survey_info, exists_okay=False):
+        """
+        Create a new survey
+        :param survey_info:  dictionary containing survey information
+        :param exists_okay:  if True will silently not create survey if it already exists
+        :return: survey information dictionary
+        """
+        if not survey_info:
+            raise SurvoxAPIRuntime('missing required parameter: survey_info')
+        try:
+            s = await self.api_get(endpoint='{base}{sid}/'.format(base=self.url, sid=survey_info['surveycode']))
+            if not exists_okay:
+                raise SurvoxAPIRuntime('Survey already exists: {sid}'.format(sid=survey_info['surveycode']))
+            return s
+        except SurvoxAPINotFound:
+            pass
+        s = await self.api_post(endpoint=self.url, data=survey_info)
+        self.session.surveys.invalidate(self._cache_key(survey_info['surveycode']))
+        return s
+
+
+class SurvoxAPIAsyncSurvey(SurvoxAPISurvey, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurvey.  Properties can't be awaited, so navigating to sample, questionnaire and
+    quotas doesn't check the survey exists first; a missing survey raises SurvoxAPINotFound on the call itself.
+    """
+
+    async def get(self):
+        """
+        Retrieve the details of the given survey
+        :return: survey details dictionary or None
+        """
+        try:
+            return await self._get_required(refresh=True)
+        except SurvoxAPINotFound:
+            return None
+
+    async def _get_required(self, refresh=False):
+        if not refresh:
+            survey = self.session.surveys.get(self._cache_key)
+            if survey is not None:
+                return survey
+        self.session.surveys.invalidate(self._cache_key)
+        return self.session.surveys.set(self._cache_key, await self.api_get(endpoint=self.survey_url))
+
+    async def delete(self):
+        """
+        Delete the survey
+        :return: api response data
+        """
+        self.session.surveys.invalidate(self._cache_key)
+        return await self.api_delete(endpoint=self.survey_url)
+
+    async def status(self, refresh=False):
+        """
+        Fetch status information about survey state
+        :param refresh: fetch the statuses even if the session's snapshot of them is still fresh
+        :return: status dictionary
+        """
+        snapshot = await self.api_get_snapshot('/surveys-status/', 'surveycode', self.list_url, refresh=refresh)
+        return snapshot.get(self.sid) or {}
+
+    async def deploy(self):
+        await self._get_required()
+        try:
+            return await self.api_post(endpoint=self.deploy_endpoint)
+        finally:
+            self.session.surveys.invalidate(self._cache_key)
+
+    @property
+    def sample(self):
+        return SurvoxAPIAsyncSurveySample(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                          verbose=self.verbose, session=self.session)
+
+    @property
+    def questionnaire(self):
+        return SurvoxAPIAsyncSurveyQuestionnaire(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                                 verbose=self.verbose, session=self.session)
+
+    @property
+    def quotas(self):
+        return SurvoxAPIAsyncSurveyQuotaList(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                             verbose=self.verbose, session=self.session)
+
+    def quota(self, name):
+        return SurvoxAPIAsyncSurveyQuota(name, sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                         verbose=self.verbose, session=self.session)
+
+
+class SurvoxAPIAsyncSurveyQuotaList(SurvoxAPISurveyQuotaList, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveyQuotaList
+    """
+
+    async def create(self, quota_list):
+        """
+        Create a list of quotas, to create a single quota call 'create([quota])'.  Will only create quotas that
+        don't already exist.
+        :param quota_list: a list of quotas to create for the survey
+        :return: the quotas created
+        """
+        if not quota_list:
+            raise SurvoxAPIRuntime('missing required parameter: quota_list')
+        if not isinstance(quota_list, list):
+            raise SurvoxAPIRuntime('specified quota_list is not type list')
+        current = {x['name']: 1 for x in await self.list()}
+        create = [q for q in quota_list if q['name'] not in current]
+        if len(create):
+            return await self.api_post(endpoint=self.endpoint, json=create)
+        return []
+
+    def increment_buffer(self, max_pending=None, max_delay=None, max_in_flight=None, on_flush=None):
+        """
+        Batch quota increments, see SurvoxAPISurveyQuotaList.increment_buffer()
+        :return: SurvoxAPIAsyncQuotaIncrementBuffer
+        """
+        return SurvoxAPIAsyncQuotaIncrementBuffer(self, max_pending=max_pending, max_delay=max_delay,
+                                                  max_in_flight=max_in_flight, on_flush=on_flush)
+
+    async def sync(self, quota_list, max_in_flight=None):
+        """
+        Make the survey quotas match a list: quotas that don't exist are created in a single request, quotas whose
+        current/total/target differ are updated, max_in_flight at a time.  Quotas not in quota_list are left alone.
+        Every update is sent even if some fail; the failed ones are then raised as a SurvoxAPIRuntime whose
+        kwargs['report'] is the report below, so it is known which updates were applied.
+        :param quota_list: a list of quotas for the survey
+        :param max_in_flight: max updates sent at the same time
+        :return: {'created': [quotas], 'updated': [quotas], 'unchanged': [quotas], 'failed': []}
+        """
+        create, update, unchanged = self._sync_plan(quota_list, await self.list())
+        created = await self.api_post(endpoint=self.endpoint, json=create) if create else []
+        in_flight = asyncio.Semaphore(max(1, max_in_flight or DEFAULT_SYNC_IN_FLIGHT))
+
+        async def put(q):
+            async with in_flight:
+                return await self.api_put(endpoint=self._quota_endpoint(q['name']),
+                                          data=SurvoxAPISurveyQuota._qfill(q))
+
+        report = {'created': created, 'updated': [], 'unchanged': unchanged, 'failed': []}
+        outcomes = await asyncio.gather(*[put(q) for q in update], return_exceptions=True)
+        for q, outcome in zip(update, outcomes):
+            if isinstance(outcome, BaseException):
+                report['failed'].append({'quota': q, 'error': outcome})
+            else:
+                report['updated'].append(outcome)
+        return self._sync_report(report)
+
+
+class SurvoxAPIAsyncSurveyQuota(SurvoxAPISurveyQuota, SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveyQuota
+    """
+
+    async def get(self):
+        """
+        Fetch a specific survey quota
+        :return: quota or None
+        """
+        try:
+            return await self.api_get(endpoint=self.endpoint)
+        except SurvoxAPINotFound:
+            return None
+
+    async def set(self, current=None, total=None, target=None, quota=None):
+        """
+        Set the different values for a given survey quota
+        :param current: new current value of quota
+        :param total: new total value of quota
+        :param target: new target value of quota
+        :param quota: new quota dictionary instead of individual values
+        :return: updated survey quota
+        """
+        if not quota:
+            quota = await self.get()
+        if not current and not total and not target and not quota:
+            raise SurvoxAPIRuntime('must specify at least on component of the quota')
+        q = self._qfill(quota, current, total, target)
+        return await self.api_put(endpoint=self.endpoint, data=q)
+
+
+class SurvoxAPIAsyncSurveyQuestionnaireMode:
+    """
+    Mixin with the async get() of a questionnaire mode
+    """
+
+    async def get(self):
+        try:
+            return await self.api_get(endpoint=self.endpoint)
+        except SurvoxAPINotFound:
+            return None
+
+
+class SurvoxAPIAsyncSurveyQuestionnaireModeCati(SurvoxAPIAsyncSurveyQuestionnaireMode,
+                                                SurvoxAPISurveyQuestionnaireModeCati, SurvoxAPIAsyncBase):
+    pass
+
+
+class SurvoxAPIAsyncSurveyQuestionnaireModeOnline(SurvoxAPIAsyncSurveyQuestionnaireMode,
+                                                  SurvoxAPISurveyQuestionnaireModeOnline, SurvoxAPIAsyncBase):
+    pass
+
+
+class SurvoxAPIAsyncSurveyQuestionnaire(SurvoxAPIAsyncSurveyQuestionnaireMode, SurvoxAPISurveyQuestionnaire,
+                                        SurvoxAPIAsyncBase):
+    """
+    Async version of SurvoxAPISurveyQuestionnaire
+    """
+
+    @property
+    def cati(self):
+        return SurvoxAPIAsyncSurveyQuestionnaireModeCati(sid=self.sid, base_url=self.base_url,
+                                                         headers=self.auth_headers, verbose=self.verbose,
+                                                         session=self.session)
+
+    @property
+    def online(self):
+        return SurvoxAPIAsyncSurveyQuestionnaireModeOnline(sid=self.sid, base_url=self.base_url,
+                                                           headers=self.auth_headers, verbose=self.verbose,
+                                                           session=self.session)
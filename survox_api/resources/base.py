@@ -1,11 +1,13 @@
-import hashlib
 import os
 import errno
-import tempfile
+import logging
 from json import dumps as json_dumps
-import requests
 
 from .exception import SurvoxAPIException, SurvoxAPINotFound
+from .session import SurvoxAPISession
+from .upload import SurvoxAPIUpload, SurvoxAPIUploadJournal
+from .download import SurvoxAPIDownload
+from .instrument import log
 
 
 class SurvoxAPIBase:
@@ -13,28 +15,37 @@ class SurvoxAPIBase:
     Base class to use requests to interact with the Survox API
     """
 
-    def __init__(self, base_url, headers, verbose=True):
+    def __init__(self, base_url, headers, verbose=True, session=None):
         self.base_url = base_url
         self.auth_headers = headers
         self.verbose = verbose
+        if session is None:
+            session = SurvoxAPISession()
+        self.session = session
 
-    def api_get(self, endpoint, headers=None, full_response=False, **kwargs):
+    def api_get(self, endpoint, headers=None, full_response=False, retry=None, idempotency_key=None, **kwargs):
         """
         Make a GET request to the specified endpoint
         :param endpoint: api endpoint
         :param headers: extra headers to pass with request
         :param full_response: return the requests response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
         :return: api response data, or full requests response structure
         """
         endpoint, headers = self._update_request_info('GET', endpoint, headers)
 
         query = {k: v for (k, v) in kwargs.items() if v is not None}
-        r = requests.get(url=endpoint, headers=headers, params=query)
+        key, entry, headers = self._cache_lookup(endpoint, query, headers)
+        r = self.session.get(url=endpoint, headers=headers, params=query, retry=retry,
+                             idempotency_key=idempotency_key)
+        r = self._cache_update(key, entry, r)
         if full_response:
             return r
         return self._check_response(r, 'GET', endpoint)
 
-    def api_post(self, endpoint, data=None, json=None, headers=None, full_response=False, **kwargs):
+    def api_post(self, endpoint, data=None, json=None, headers=None, full_response=False, retry=None,
+                 idempotency_key=None, **kwargs):
         """
         Make a POST request to the specified endpoint
         :param endpoint: api endpoint
@@ -42,20 +53,25 @@ class SurvoxAPIBase:
         :param json: data to post in json format
         :param headers: extra headers to pass with request
         :param full_response: return the requests response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
         :return: api response data, or full requests response structure
         """
         endpoint, headers = self._update_request_info('POST', endpoint, headers)
         query = {k: v for (k, v) in kwargs.items() if v is not None}
         if json:
             headers.update({"Content-Type": "application/json"})
-            r = requests.post(endpoint, data=json_dumps(json), headers=headers, params=query)
+            r = self.session.post(endpoint, data=json_dumps(json), headers=headers, params=query, retry=retry,
+                                  idempotency_key=idempotency_key)
         else:
-            r = requests.post(url=endpoint, data=data, headers=headers, params=query)
+            r = self.session.post(url=endpoint, data=data, headers=headers, params=query, retry=retry,
+                                  idempotency_key=idempotency_key)
         if full_response:
             return r
         return self._check_response(r, 'POST', endpoint)
 
-    def api_put(self, endpoint, data=None, json=None, headers=None, files=None, full_response=False, **kwargs):
+    def api_put(self, endpoint, data=None, json=None, headers=None, files=None, full_response=False, retry=None,
+                idempotency_key=None, **kwargs):
         """
         Make a PUT request to the specified endpoint
         :param endpoint: api endpoint
@@ -64,53 +80,111 @@ class SurvoxAPIBase:
         :param headers: extra headers to pass with request
         :param files: files object to upload
         :param full_response: return the requests response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
         :return: api response data, or full requests response structure
         """
         endpoint, headers = self._update_request_info('PUT', endpoint, headers)
         query = {k: v for (k, v) in kwargs.items() if v is not None}
         if files:
-            return requests.put(url=endpoint, data=data, headers=headers, files=files, params=query)
+            return self.session.put(url=endpoint, data=data, headers=headers, files=files, params=query, retry=retry,
+                                    idempotency_key=idempotency_key)
         if json:
-            r = requests.put(url=endpoint, json=json_dumps(json), headers=headers, params=query)
+            r = self.session.put(url=endpoint, json=json_dumps(json), headers=headers, params=query, retry=retry,
+                                 idempotency_key=idempotency_key)
         else:
-            r = requests.put(url=endpoint, data=data, headers=headers, params=query)
+            r = self.session.put(url=endpoint, data=data, headers=headers, params=query, retry=retry,
+                                 idempotency_key=idempotency_key)
         if full_response:
             return r
         return self._check_response(r, 'PUT', endpoint)
 
-    def api_delete(self, endpoint, headers=None, full_response=False, **kwargs):
+    def api_delete(self, endpoint, headers=None, full_response=False, retry=None, idempotency_key=None, **kwargs):
         """
         Make a DELETE request to the specified endpoint
         :param endpoint: api endpoint
         :param headers: extra headers to pass with request
         :param full_response: return the requests response structure
+        :param retry: retry policy override, False to send the request only once
+        :param idempotency_key: unique key for this request, lets a POST be retried safely
         :return: api response data, or full requests response structure
         """
         endpoint, headers = self._update_request_info('DELETE', endpoint, headers)
         query = {k: v for (k, v) in kwargs.items() if v is not None}
-        r = requests.delete(url=endpoint, headers=headers, params=query)
+        r = self.session.delete(url=endpoint, headers=headers, params=query, retry=retry,
+                                idempotency_key=idempotency_key)
         if full_response:
             return r
         return self._check_response(r, 'DELETE', endpoint)
 
+    def _cache_lookup(self, endpoint, query, headers):
+        """
+        Find the cached response of a GET, if any, and add the headers to revalidate it
+        :return: (cache key, SurvoxAPICacheEntry, request headers)
+        """
+        cache = self.session.http_cache
+        if cache is None:
+            return None, None, headers
+        key = cache.key(endpoint, query, headers)
+        entry = cache.get(key)
+        if entry is not None:
+            headers = dict(headers or {}, **entry.conditional_headers())
+        return key, entry, headers
+
+    def _cache_update(self, key, entry, r):
+        """
+        Serve a 304 from the cache, or keep a fresh 200 for next time
+        :return: response structure
+        """
+        if key is None:
+            return r
+        cache = self.session.http_cache
+        if r.status_code == 304 and entry is not None:
+            cache.count('hits')
+            return self.session.cached_response(entry, r)
+        cache.count('misses')
+        if r.status_code == 200:
+            cache.store(key, r)
+        return r
+
+    def api_get_snapshot(self, endpoint, key, scope, refresh=False):
+        """
+        GET a list endpoint through the session's snapshot of it, only fetching it again once it's stale
+        :param endpoint: api endpoint of the list
+        :param key: row field to index the list by
+        :param scope: endpoint prefix whose changes make the list stale
+        :param refresh: fetch the list even if the snapshot is still fresh
+        :return: SurvoxAPISnapshot
+        """
+        snapshot = self.session.snapshots.get(self.base_url + endpoint, key, self.base_url + scope)
+        with snapshot.lock:
+            if refresh or not snapshot.fresh:
+                snapshot.update(self.api_get(endpoint=endpoint))
+        return snapshot
+
     def _update_request_info(self, method, endpoint, headers):
         if not (endpoint.startswith(self.base_url) or endpoint.startswith("http")):
             if not endpoint.startswith('/'):
                 endpoint = self.base_url + '/' + endpoint
             else:
                 endpoint = self.base_url + endpoint
+        if method in ('POST', 'PUT', 'DELETE'):
+            self.session.snapshots.invalidate(endpoint)
+            self.session.previews.invalidate(endpoint)
+            if self.session.http_cache is not None:
+                self.session.http_cache.invalidate(endpoint)
         if headers:
             headers.update(self.auth_headers)
         else:
-            headers = self.auth_headers
+            # a copy, api_post adds Content-Type to it
+            headers = dict(self.auth_headers)
         if self.verbose:
-            print('Request {method} {endpoint}'.format(method=method, endpoint=endpoint))
+            log.debug('Request %s %s', method, endpoint)
         return endpoint, headers
 
     def _check_response(self, r, method, endpoint):
-        if self.verbose:
-            print('Response {method} {endpoint} {result} {length}'.format(method=method, endpoint=endpoint,
-                                                                          result=r.status_code, length=len(r.text)))
+        if self.verbose and log.isEnabledFor(logging.DEBUG):
+            log.debug('Response %s %s %s %s', method, endpoint, r.status_code, len(r.content))
         if not 200 <= r.status_code < 300:
             if r.status_code == 404:
                 raise SurvoxAPINotFound(method, endpoint, r)
@@ -126,79 +200,57 @@ class SurvoxAPIBase:
             raise SurvoxAPIException(method, endpoint, r)
         return payload['data']
 
-    def api_upload(self, endpoint, filename, block_size=None):
+    def api_upload(self, endpoint, filename, block_size=None, max_in_flight=None, resume=True):
         """
-        Make a DELETE request to the specified endpoint
+        Upload a file to the specified endpoint in blocks
         :param endpoint: api endpoint
         :param filename: name of the file to upload
         :param block_size: max size of a file block to send at a time
-        :return: api response data, or full requests response structure
+        :param max_in_flight: max blocks sent at the same time, once the server hands out a stable block url
+        :param resume: continue an interrupted upload of this file from its journal, and journal this one
+        :return: api response data
         """
         if not os.path.isfile(filename):
             raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+        journal = SurvoxAPIUploadJournal() if resume else None
+        return SurvoxAPIUpload(self, endpoint, filename, block_size=block_size, max_in_flight=max_in_flight,
+                               journal=journal).run()
 
-        hash_md5 = hashlib.md5()
-        file_size = os.path.getsize(filename)
-        upload_name = os.path.basename(filename)
-        if not block_size:
-            block_size = 1000000
-
-        with open(filename, "rb") as f:
-            offset = 0
-            for block in iter(lambda: f.read(block_size), b""):
-                hash_md5.update(block)
-                temp = tempfile.NamedTemporaryFile()
-                temp.write(block)
-                temp.seek(0)
-                chunk_end = offset + len(block)
-                my_headers = {
-                    'CONTENT-RANGE': "bytes {offset}-{chunk_end}/{filesize}".format(offset=offset,
-                                                                                    chunk_end=chunk_end,
-                                                                                    filesize=file_size)
-                }
-                cur_data = {'filename': upload_name}
-                file = [('file', (temp.name, block))]
-                res = self.api_put(endpoint=endpoint, headers=my_headers, data=cur_data, files=file, full_response=True)
-                temp.close()
-                try:
-                    content = res.json()
-                except ValueError:
-                    raise RuntimeError('Content' + res.text)
-                if content['status'] != "success":
-                    raise RuntimeError(content['data'])
-                offset = chunk_end
-                endpoint = content['data']['url']
-
-        md5hash = hash_md5.hexdigest()
-
-        # Finalize this thing
-        cur_data = {"md5": "{hash}".format(hash=md5hash)}
-        res = self.api_post(endpoint=endpoint, data=cur_data, full_response=True)
+    @staticmethod
+    def _upload_content(res):
         try:
             content = res.json()
         except ValueError:
             raise RuntimeError('Content' + res.text)
-
         if content['status'] != "success":
             raise RuntimeError(content['data'])
-        return content['data']
+        return content
 
-    def api_download(self, endpoint, filename, headers=None):
+    def api_download(self, endpoint, filename, headers=None, buffer_size=None, resume=True, parallel=None,
+                     md5=None):
         """
         Download a file from the API endpoint
         :param endpoint: api endpoint
         :param filename:  file to save response in
         :param headers: any additional headers to send when making request
-        :return: None
+        :param buffer_size: bytes read from the socket at a time
+        :param resume: resume an interrupted download of this file from its ".part" file
+        :param parallel: max byte ranges fetched at once, if the server supports ranges
+        :param md5: expected md5 hex digest of the file
+        :return: response headers
+        """
+        endpoint, headers = self._update_request_info('DOWNLOAD', endpoint, headers)
+        return SurvoxAPIDownload(self, endpoint, headers=headers, buffer_size=buffer_size, parallel=parallel,
+                                 md5=md5).save(filename, resume=resume)
+
+    def api_iter_lines(self, endpoint, headers=None, buffer_size=None, encoding='utf-8'):
+        """
+        Stream a file from the API endpoint one line at a time, without saving it
+        :param endpoint: api endpoint
+        :param headers: any additional headers to send when making request
+        :param buffer_size: bytes read from the socket at a time
+        :param encoding: text encoding of the file
+        :return: iterator of lines, without line endings
         """
         endpoint, headers = self._update_request_info('DOWNLOAD', endpoint, headers)
-        return_headers = {}
-        with open(filename, 'wb') as handle:
-            response = requests.get(endpoint, headers=headers, stream=True)
-            if not response.ok:
-                raise RuntimeError("Unable to download file from {url}".format(url=endpoint))
-            for h, v in response.headers.items():
-                return_headers[h] = v
-            for block in response.iter_content(1024):
-                handle.write(block)
-        return return_headers
+        return SurvoxAPIDownload(self, endpoint, headers=headers, buffer_size=buffer_size).iter_lines(encoding)
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import threading
+import time
+
+PREVIEW_ENDPOINT = '/sample-selection/list/'
+
+
+class SurvoxAPITTLCache:
+    """
+    Thread-safe dictionary whose entries expire ttl seconds after they were stored.  Lives on the shared session,
+    so every resource created from one SurvoxAPI object sees the same entries.
+    """
+
+    def __init__(self, ttl=60):
+        """
+        :param ttl: seconds an entry stays valid, 0 or None disables the cache
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Fetch a cached value
+        :param key: cache key
+        :return: the value, or None if it isn't cached or has expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value
+        :param key: cache key
+        :param value: value to cache, None is not cached
+        :return: value
+        """
+        if self.ttl and value is not None:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop a cached value
+        :param key: cache key, or None to drop everything
+        :return: None
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class SurvoxAPISnapshot:
+    """
+    Copy of a list endpoint (e.g. /surveys-status/) indexed by one field of its rows, so looking up one entry
+    doesn't mean downloading and scanning the whole list each time.  The resource fetches the list and hands it
+    to update(); the snapshot only says whether it's still fresh.
+    """
+
+    def __init__(self, key, scope, refresh=30):
+        """
+        :param key: row field to index by, e.g. surveycode
+        :param scope: url prefix whose POST/PUT/DELETE requests make the snapshot stale
+        :param refresh: seconds before the list is fetched again, 0 to fetch it every time
+        """
+        self.key = key
+        self.scope = scope
+        self.refresh = refresh
+        self.rows = []
+        self.index = {}
+        self.lock = threading.Lock()
+        self._expires = None
+
+    @property
+    def fresh(self):
+        return self._expires is not None and self._expires >= time.monotonic()
+
+    def update(self, rows):
+        """
+        Replace the snapshot with a freshly fetched list
+        :param rows: list of dictionaries from the api
+        :return: rows
+        """
+        self.index = {x[self.key]: x for x in rows if self.key in x}
+        self.rows = rows
+        self._expires = time.monotonic() + self.refresh if self.refresh else None
+        return rows
+
+    def get(self, name):
+        return self.index.get(name)
+
+    def invalidate(self):
+        self._expires = None
+
+
+class SurvoxAPISnapshots:
+    """
+    The snapshots kept on a session, one per list url
+    """
+
+    def __init__(self, refresh=30):
+        """
+        :param refresh: seconds before a snapshot's list is fetched again, 0 to fetch it every time
+        """
+        self.refresh = refresh
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, key, scope):
+        """
+        Fetch the snapshot of a list url, creating an empty one the first time
+        :param url: full url of the list
+        :param key: row field to index by
+        :param scope: url prefix whose POST/PUT/DELETE requests make the snapshot stale
+        :return: SurvoxAPISnapshot
+        """
+        with self._lock:
+            if url not in self._snapshots:
+                self._snapshots[url] = SurvoxAPISnapshot(key, scope, self.refresh)
+            return self._snapshots[url]
+
+    def invalidate(self, url=None):
+        """
+        Mark snapshots stale after a change was made
+        :param url: full url that was changed, or None for every snapshot
+        :return: None
+        """
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        for snapshot in snapshots:
+            if url is None or url.startswith(snapshot.scope):
+                snapshot.invalidate()
+
+
+class SurvoxAPIPreviews:
+    """
+    Sample selection previews (the fid and count sample-selection/list/ returns) by survey and selection, so a
+    download of a selection that was just listed reuses its fid.  A survey's previews are dropped as soon as a
+    request changes its sample, and expire after ttl seconds in any case, as the server discards the files.
+    """
+
+    def __init__(self, ttl=300):
+        """
+        :param ttl: seconds a preview is reused, 0 or None to list the selection again every time
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(selection):
+        """
+        :param selection: selection dictionary
+        :return: key that's the same for equal selections, whatever the order of their fields
+        """
+        return hashlib.sha1(json.dumps(selection, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, scope, selection):
+        """
+        :param scope: full url prefix of the survey's sample, e.g. .../surveys/<sid>/sample
+        :param selection: selection dictionary
+        :return: the cached preview, or None
+        """
+        key = (scope, self.fingerprint(selection))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, scope, selection, preview):
+        """
+        :param scope: full url prefix of the survey's sample
+        :param selection: selection dictionary
+        :param preview: list() result, only cached if it has a fid
+        :return: preview
+        """
+        if self.ttl and isinstance(preview, dict) and preview.get('fid'):
+            with self._lock:
+                self._entries[(scope, self.fingerprint(selection))] = (time.monotonic() + self.ttl, preview)
+        return preview
+
+    def invalidate(self, url=None):
+        """
+        Drop the previews of the survey a change was made to
+        :param url: full url that was changed, or None to drop every preview
+        :return: None
+        """
+        if url is not None and url.endswith(PREVIEW_ENDPOINT):
+            # listing a selection changes nothing
+            return
+        with self._lock:
+            for key in [k for k in self._entries if url is None or url.startswith(k[0])]:
+                del self._entries[key]
@@ -7,8 +7,8 @@ from survox_api.resources.client.credentials import SurvoxAPIClientCredentialLis
 
 
 class SurvoxAPIClientList(SurvoxAPIBase):
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIClientList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIClientList, self).__init__(base_url, headers, verbose, session)
         self.url = '/clients/'
 
     def list(self):
@@ -33,8 +33,8 @@ class SurvoxAPIClientList(SurvoxAPIBase):
 
 
 class SurvoxAPIClient(SurvoxAPIBase):
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIClient, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIClient, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.url = '/clients/{client}/'.format(client=self.name)
 
@@ -63,18 +63,18 @@ class SurvoxAPIClient(SurvoxAPIBase):
     @property
     def credentials(self):
         return SurvoxAPIClientCredentialList(client=self.name, base_url=self.base_url, headers=self.auth_headers,
-                                             verbose=self.verbose)
+                                             verbose=self.verbose, session=self.session)
 
     # @property
     # def quotas(self):
     #     self._get_required()
     #     return SurvoxAPISurveyQuotaList(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-    #                                     verbose=self.verbose)
+    #                                     verbose=self.verbose, session=self.session)
     #
     def credential(self, third_party):
         return SurvoxAPIClientCredential(third_party=third_party, client=self.name, base_url=self.base_url,
                                          headers=self.auth_headers,
-                                         verbose=self.verbose)
+                                         verbose=self.verbose, session=self.session)
 
     def get_credentials(self):
         return self.api_get(endpoint='{base}credentials/'.format(base=self.url))
@@ -5,8 +5,8 @@ from survox_api.resources.valid import valid_url_field
 
 
 class SurvoxAPIClientCredentialList(SurvoxAPIBase):
-    def __init__(self, client, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIClientCredentialList, self).__init__(base_url, headers, verbose)
+    def __init__(self, client, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIClientCredentialList, self).__init__(base_url, headers, verbose, session)
         self.client = client
         self.url = '/clients/{client}/credentials/'.format(client=self.client)
 
@@ -32,8 +32,8 @@ class SurvoxAPIClientCredentialList(SurvoxAPIBase):
 
 
 class SurvoxAPIClientCredential(SurvoxAPIBase):
-    def __init__(self, third_party, client, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIClientCredential, self).__init__(base_url, headers, verbose)
+    def __init__(self, third_party, client, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIClientCredential, self).__init__(base_url, headers, verbose, session)
         self.client = client
         self.third_party = third_party
         self.url = '/clients/{client}/credentials/{third_party}/'.format(client=client, third_party=third_party)
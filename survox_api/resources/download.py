@@ -0,0 +1,297 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .exception import SurvoxAPIRuntime, SurvoxAPINotFound
+from .instrument import log
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_PARALLEL_MIN_SIZE = 8 * 1024 * 1024
+
+
+class SurvoxAPIDownload:
+    """
+    Streaming download of a file from the Survox API.
+
+    save() writes into "<filename>.part" and only renames it once the download is complete and verified, so an
+    interrupted download is resumed with an HTTP Range request next time.  The resumed request carries If-Range
+    with the ETag (or Last-Modified) of the first response, kept in "<filename>.part.validator", so a file that
+    changed on the server in between is downloaded again from the start rather than appended to the old part; a
+    part without a validator is never resumed.  If parallel is more than 1 and the
+    server advertises "Accept-Ranges: bytes", large files are fetched as that many ranges at once.
+    iter_content()/iter_lines() hand the data to the caller without touching disk.
+    """
+
+    def __init__(self, api, url, headers=None, buffer_size=None, parallel=None, md5=None):
+        """
+        :param api: SurvoxAPIBase whose session makes the requests
+        :param url: full url to download
+        :param headers: headers to send with every request
+        :param buffer_size: bytes read from the socket at a time
+        :param parallel: max ranges fetched at the same time
+        :param md5: expected md5 hex digest of the file, otherwise taken from Content-MD5/Digest headers if sent
+        """
+        self.api = api
+        self.url = url
+        self.headers = headers or {}
+        self.buffer_size = buffer_size or DEFAULT_BUFFER_SIZE
+        self.parallel = max(1, parallel or 1)
+        self.md5 = md5
+
+    def _get(self, extra_headers=None):
+        headers = dict(self.headers)
+        if extra_headers:
+            headers.update(extra_headers)
+        return self.api.session.get(self.url, headers=headers, stream=True)
+
+    def _failed(self, response):
+        if response.status_code == 404:
+            # read the (short) error body while the connection is still open
+            response.content
+            response.close()
+            raise SurvoxAPINotFound('DOWNLOAD', self.url, response)
+        response.close()
+        raise RuntimeError("Unable to download file from {url}".format(url=self.url))
+
+    def iter_content(self):
+        """
+        Iterate over the downloaded data
+        :return: iterator of bytes blocks
+        """
+        response = self._get()
+        if not response.ok:
+            self._failed(response)
+        try:
+            for block in response.iter_content(self.buffer_size):
+                yield block
+        finally:
+            response.close()
+
+    def iter_lines(self, encoding='utf-8'):
+        """
+        Iterate over the downloaded data one line at a time
+        :param encoding: text encoding of the data
+        :return: iterator of lines, without line endings
+        """
+        pending = b''
+        for block in self.iter_content():
+            lines = (pending + block).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b'\r').decode(encoding)
+        if pending:
+            yield pending.rstrip(b'\r').decode(encoding)
+
+    @staticmethod
+    def _total(response, offset):
+        if response.headers.get('Content-Encoding', 'identity').lower() != 'identity':
+            # requests decodes the body, so its size won't match the headers
+            return None
+        content_range = response.headers.get('Content-Range')
+        if content_range:
+            m = re.match(r'bytes \d+-\d+/(\d+)', content_range)
+            if m:
+                return int(m.group(1))
+        length = response.headers.get('Content-Length')
+        if length is None:
+            return None
+        return int(length) + offset
+
+    def save(self, filename, resume=True):
+        """
+        Download to a file
+        :param filename: file to save the download in
+        :param resume: pick up an earlier, interrupted download of this file
+        :return: response headers
+        """
+        part = filename + '.part'
+        ranges_file = part + '.json'
+        validator_file = part + '.validator'
+        if not resume:
+            self._remove(part, ranges_file, validator_file)
+        if os.path.isfile(ranges_file):
+            headers = self._save_parallel(filename, part, ranges_file)
+            if headers is not None:
+                return headers
+            # the file changed on the server, or there's no telling whether it did: start over
+            self._remove(part, ranges_file)
+
+        offset = os.path.getsize(part) if os.path.isfile(part) else 0
+        validator = self._load_validator(validator_file) if offset else None
+        # byte offsets only mean something if the server doesn't compress the body
+        extra = {'Accept-Encoding': 'identity'}
+        if offset and validator:
+            extra['Range'] = 'bytes={offset}-'.format(offset=offset)
+            extra['If-Range'] = validator
+        response = self._get(extra)
+        if response.status_code == 416 and 'Range' in extra:
+            # the part file doesn't match what the server has, start over
+            response.close()
+            del extra['Range'], extra['If-Range']
+            response = self._get(extra)
+        if not response.ok:
+            self._failed(response)
+        if response.status_code != 206:
+            # a fresh download, or the server sent the whole file because it changed since the part was written
+            offset = 0
+            self._save_validator(validator_file, self._validator(response.headers))
+        else:
+            log.info('Resuming download of %s at byte %s', filename, offset)
+        return_headers = dict(response.headers)
+        total = self._total(response, offset)
+
+        # ranges of a file that can't be checked for changes could be stitched from two versions of it
+        if (not offset and self.parallel > 1 and total and total >= DEFAULT_PARALLEL_MIN_SIZE and
+                response.headers.get('Accept-Ranges', '').lower() == 'bytes' and self._validator(response.headers)):
+            response.close()
+            self._remove(validator_file)
+            self._start_parallel(part, ranges_file, total, return_headers, self._validator(response.headers))
+            headers = self._save_parallel(filename, part, ranges_file)
+            if headers is None:
+                self._remove(part, ranges_file)
+                raise SurvoxAPIRuntime('Download of {url} changed on the server while it was being downloaded - '
+                                       'run it again'.format(url=self.url))
+            return headers
+
+        try:
+            with open(part, 'ab' if offset else 'wb') as handle:
+                for block in response.iter_content(self.buffer_size):
+                    handle.write(block)
+        finally:
+            response.close()
+        self._finish(filename, part, total, return_headers)
+        return return_headers
+
+    @staticmethod
+    def _validator(headers):
+        # what If-Range can check the file against later; weak ETags can't be used with ranges
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return headers.get('Last-Modified')
+
+    @staticmethod
+    def _load_validator(validator_file):
+        try:
+            with open(validator_file) as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def _save_validator(self, validator_file, validator):
+        if not validator:
+            self._remove(validator_file)
+            return
+        with open(validator_file, 'w') as fh:
+            fh.write(validator)
+
+    def _start_parallel(self, part, ranges_file, total, headers, validator):
+        with open(part, 'wb') as handle:
+            handle.truncate(total)
+        step = max(self.buffer_size, -(-total // self.parallel))
+        state = {'total': total, 'todo': [[x, min(x + step, total) - 1] for x in range(0, total, step)],
+                 'headers': headers, 'validator': validator}
+        self._save_ranges(ranges_file, state)
+
+    @staticmethod
+    def _save_ranges(ranges_file, state):
+        temp = ranges_file + '.tmp'
+        with open(temp, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(temp, ranges_file)
+
+    def _fetch_range(self, part, first, last, validator):
+        """
+        :return: True once the range is written, False if the file changed since the download started
+        """
+        response = self._get({'Accept-Encoding': 'identity', 'If-Range': validator,
+                              'Range': 'bytes={first}-{last}'.format(first=first, last=last)})
+        if response.status_code == 200:
+            response.close()
+            return False
+        if response.status_code != 206:
+            self._failed(response)
+        written = 0
+        try:
+            with open(part, 'r+b') as handle:
+                handle.seek(first)
+                for block in response.iter_content(self.buffer_size):
+                    handle.write(block)
+                    written += len(block)
+        finally:
+            response.close()
+        if written != last - first + 1:
+            raise SurvoxAPIRuntime('Download of {url} incomplete, range {first}-{last} got {n} bytes - run it '
+                                   'again to resume'.format(url=self.url, first=first, last=last, n=written))
+        return True
+
+    def _save_parallel(self, filename, part, ranges_file):
+        """
+        Fetch the ranges still to do
+        :return: response headers, or None if the file changed on the server or can't be checked for changes
+        """
+        with open(ranges_file) as fh:
+            state = json.load(fh)
+        if not state.get('validator'):
+            return None
+        log.info('Downloading %s in %s ranges', filename, len(state['todo']))
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            futures = {pool.submit(self._fetch_range, part, first, last, state['validator']): [first, last]
+                       for (first, last) in state['todo']}
+            try:
+                for future in futures:
+                    if not future.result():
+                        return None
+                    state['todo'].remove(futures[future])
+                    self._save_ranges(ranges_file, state)
+            finally:
+                for future in futures:
+                    future.cancel()
+        os.remove(ranges_file)
+        self._finish(filename, part, state['total'], state['headers'])
+        return state['headers']
+
+    def _expected_md5(self, headers):
+        if self.md5:
+            return self.md5.lower()
+        candidates = [headers.get('Content-MD5')]
+        for digest in headers.get('Digest', '').split(','):
+            algorithm, _, value = digest.strip().partition('=')
+            if algorithm.lower() == 'md5':
+                candidates.append(value)
+        for value in candidates:
+            if value:
+                try:
+                    return binascii.hexlify(base64.b64decode(value)).decode('ascii')
+                except (binascii.Error, ValueError):
+                    continue
+        return None
+
+    def _finish(self, filename, part, total, headers):
+        size = os.path.getsize(part)
+        if total is not None and size != total:
+            raise SurvoxAPIRuntime('Download of {url} incomplete, {size} of {total} bytes - run it again to '
+                                   'resume'.format(url=self.url, size=size, total=total))
+        expected = self._expected_md5(headers)
+        if expected:
+            hash_md5 = hashlib.md5()
+            with open(part, 'rb') as handle:
+                for block in iter(lambda: handle.read(self.buffer_size), b""):
+                    hash_md5.update(block)
+            if hash_md5.hexdigest() != expected:
+                self._remove(part, part + '.validator')
+                raise SurvoxAPIRuntime('Download of {url} failed md5 check'.format(url=self.url))
+        os.replace(part, filename)
+        self._remove(part + '.validator')
+
+    @staticmethod
+    def _remove(*filenames):
+        for filename in filenames:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode, urlparse
+
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class SurvoxAPICacheEntry:
+    """
+    A cached GET response along with the validators used to revalidate it
+    """
+    __slots__ = ('key', 'path', 'status_code', 'headers', 'content', 'etag', 'last_modified')
+
+    def __init__(self, key, path, status_code, headers, content):
+        self.key = key
+        self.path = path
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        lower = {k.lower(): v for (k, v) in headers.items()}
+        self.etag = lower.get('etag')
+        self.last_modified = lower.get('last-modified')
+
+    @property
+    def size(self):
+        return len(self.content) + len(self.key) + 256
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class SurvoxAPIHTTPCache:
+    """
+    Conditional GET cache.  Responses sent with an ETag or Last-Modified header are kept, and the next GET of the
+    same url asks the server with If-None-Match/If-Modified-Since whether they changed; a 304 answer is served
+    from the cache without the body being sent again.  Entries live in an LRU bounded by max_bytes, and also on
+    disk if a directory is given.  A PUT/POST/DELETE made through the SDK drops the entries for its path and
+    the collections above it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, directory=None):
+        """
+        :param max_bytes: memory budget of the cached bodies
+        :param directory: directory to also keep entries in, so they survive the process
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(url, params=None, headers=None):
+        """
+        :param url: full url of the request
+        :param params: query parameters
+        :param headers: request headers, the Authorization header is part of the key
+        :return: cache key
+        """
+        query = urlencode(sorted((k, str(v)) for (k, v) in (params or {}).items()))
+        auth = (headers or {}).get('Authorization', '')
+        return '{url}?{query}#{auth}'.format(url=url, query=query,
+                                             auth=hashlib.sha1(auth.encode('utf-8')).hexdigest())
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _file(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        """
+        :param key: cache key
+        :return: SurvoxAPICacheEntry or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.directory:
+            return self._load(key)
+        return None
+
+    def _load(self, key):
+        filename = self._file(key)
+        try:
+            with open(filename + '.json') as fh:
+                meta = json.load(fh)
+            with open(filename + '.body', 'rb') as fh:
+                content = fh.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('key') != key:
+            return None
+        entry = SurvoxAPICacheEntry(key, meta['path'], meta['status_code'], meta['headers'], content)
+        self._remember(entry)
+        return entry
+
+    def store(self, key, response):
+        """
+        Keep a response if it can be revalidated later
+        :param key: cache key
+        :param response: 200 response structure of the GET
+        :return: SurvoxAPICacheEntry or None if the response has no validators
+        """
+        headers = dict(response.headers)
+        entry = SurvoxAPICacheEntry(key, urlparse(key).path, response.status_code, headers, response.content)
+        if not entry.etag and not entry.last_modified:
+            return None
+        self.count('stores')
+        self._remember(entry)
+        if self.directory:
+            filename = self._file(key)
+            with open(filename + '.body.tmp', 'wb') as fh:
+                fh.write(entry.content)
+            os.replace(filename + '.body.tmp', filename + '.body')
+            with open(filename + '.json.tmp', 'w') as fh:
+                json.dump({'key': key, 'path': entry.path, 'status_code': entry.status_code, 'headers': headers}, fh)
+            os.replace(filename + '.json.tmp', filename + '.json')
+            with self._lock:
+                self._disk_index()[filename] = entry.path
+        return entry
+
+    def _disk_index(self):
+        # path of every entry on disk, including ones written by an earlier process, read once
+        if self._disk is None:
+            self._disk = {}
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as fh:
+                        self._disk[os.path.join(self.directory, name[:-5])] = json.load(fh)['path']
+                except (OSError, ValueError, KeyError):
+                    continue
+        return self._disk
+
+    def _remember(self, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[entry.key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.stats['evictions'] += 1
+
+    def invalidate(self, url=None):
+        """
+        Drop the entries a change to a url makes stale: the url itself, anything below it, and the collections
+        above it
+        :param url: full url that was changed, or None to drop everything
+        :return: None
+        """
+        path = urlparse(url).path if url else None
+        with self._lock:
+            stale = [k for (k, e) in self._entries.items()
+                     if path is None or e.path.startswith(path) or path.startswith(e.path)]
+            for key in stale:
+                self.bytes -= self._entries.pop(key).size
+            if stale:
+                self.stats['invalidations'] += len(stale)
+        if self.directory:
+            with self._lock:
+                index = self._disk_index()
+                stale = [f for (f, p) in index.items() if path is None or p.startswith(path) or path.startswith(p)]
+                for filename in stale:
+                    del index[filename]
+            for filename in stale:
+                for ext in ('.json', '.body'):
+                    try:
+                        os.remove(filename + ext)
+                    except OSError:
+                        pass
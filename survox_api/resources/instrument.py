@@ -0,0 +1,184 @@
+import bisect
+import logging
+import re
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse
+
+log = logging.getLogger('survox_api')
+
+# collections whose next path segment is the name/id of one of their members
+_NAMED_COLLECTIONS = {'surveys', 'quotas', 'clients', 'accounts', 'dnc', 'map', 'setup-rules', 'calling-rules',
+                      'locations', 'organizational-unit', 'languages', 'qualifications', 'skills', 'credentials'}
+_API_PREFIX = re.compile(r'^.*?/v\d+(?=/)')
+_OPAQUE = re.compile(r'^(\d+|[0-9a-fA-F-]{16,}|.*\d.*\d.*\d.{5,})$')
+
+
+@lru_cache(maxsize=4096)
+def endpoint_template(url):
+    """
+    Reduce a request url to the endpoint it calls, e.g. .../v0/surveys/my_survey/quotas/q1/ gives
+    /surveys/{name}/quotas/{name}/, so requests can be grouped by endpoint
+    :param url: full url or path
+    :return: endpoint template
+    """
+    path = _API_PREFIX.sub('', urlparse(url).path)
+    template = []
+    previous = None
+    for segment in path.split('/'):
+        if segment and (previous in _NAMED_COLLECTIONS or _OPAQUE.match(segment)):
+            template.append('{name}')
+            previous = None
+        else:
+            template.append(segment)
+            previous = segment
+    return '/'.join(template)
+
+
+class SurvoxAPIRequestEvent:
+    """
+    What's known about one request: method, url and endpoint template at the start; status, bytes (response
+    body size, None if unknown), latency (seconds, including retries), retries, cache_hit and error at the end
+    """
+    __slots__ = ('method', 'url', 'endpoint', 'status', 'bytes', 'latency', 'retries', 'cache_hit', 'error')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_template(url)
+        self.status = None
+        self.bytes = None
+        self.latency = None
+        self.retries = 0
+        self.cache_hit = False
+        self.error = None
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class SurvoxAPIInstrumentation:
+    """
+    Request hooks of a session.  Subscribers get on_start(event) before a request is sent and on_end(event) once
+    it finished or failed; with no subscribers a request costs one attribute check.
+
+        api.session.instrumentation.subscribe(SurvoxAPILatencyHistogram())
+    """
+
+    def __init__(self):
+        self.subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        """
+        :param subscriber: object with on_start(event) and/or on_end(event) methods
+        :return: subscriber
+        """
+        with self._lock:
+            self.subscribers = self.subscribers + (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers = tuple(s for s in self.subscribers if s is not subscriber)
+
+    def start(self, method, url):
+        event = SurvoxAPIRequestEvent(method, url)
+        for subscriber in self.subscribers:
+            if hasattr(subscriber, 'on_start'):
+                subscriber.on_start(event)
+        return event
+
+    @staticmethod
+    def response(event, r, streamed=False):
+        """
+        Fill in what the response says about the request, without reading a streamed body
+        """
+        event.status = r.status_code
+        event.retries = getattr(r, 'attempts', 1) - 1
+        event.cache_hit = r.status_code == 304
+        length = r.headers.get('Content-Length')
+        if length is not None and length.isdigit():
+            event.bytes = int(length)
+        elif not streamed:
+            event.bytes = len(r.content)
+
+    def end(self, event):
+        for subscriber in self.subscribers:
+            if hasattr(subscriber, 'on_end'):
+                subscriber.on_end(event)
+
+
+class SurvoxAPILoggingSubscriber:
+    """
+    Logs every finished request, one line each
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        :param logger: logger to write to, defaults to the "survox_api" logger
+        :param level: level of the log records
+        """
+        self.logger = logger or log
+        self.level = level
+
+    def on_end(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s %s %s %s bytes %.1fms retries=%d cache_hit=%s%s', event.method,
+                            event.endpoint, event.status, event.bytes, (event.latency or 0) * 1000, event.retries,
+                            event.cache_hit, ' error={e!r}'.format(e=event.error) if event.error else '')
+
+
+class SurvoxAPILatencyHistogram:
+    """
+    In-process latency histogram per endpoint template, to find the slow endpoints
+    """
+    bounds = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, event):
+        if event.latency is None:
+            return
+        key = '{m} {e}'.format(m=event.method, e=event.endpoint)
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+                                               'buckets': [0] * (len(self.bounds) + 1)}
+            stats['count'] += 1
+            stats['total'] += event.latency
+            stats['max'] = max(stats['max'], event.latency)
+            stats['buckets'][bisect.bisect_left(self.bounds, event.latency)] += 1
+            if event.error or (event.status or 0) >= 400:
+                stats['errors'] += 1
+
+    def percentile(self, key, p):
+        """
+        :param key: "METHOD /endpoint/template/"
+        :param p: percentile, 0-100
+        :return: upper bound in seconds of the bucket the percentile falls in, None if there's no data
+        """
+        stats = self.endpoints.get(key)
+        if not stats:
+            return None
+        wanted = stats['count'] * p / 100.0
+        seen = 0
+        for i, n in enumerate(stats['buckets']):
+            seen += n
+            if seen >= wanted and n:
+                return self.bounds[i] if i < len(self.bounds) else stats['max']
+        return stats['max']
+
+    def summary(self):
+        """
+        :return: list of {endpoint, count, errors, mean, p50, p99, max} dictionaries, slowest mean first
+        """
+        rows = []
+        for key, stats in list(self.endpoints.items()):
+            rows.append({'endpoint': key, 'count': stats['count'], 'errors': stats['errors'],
+                         'mean': stats['total'] / stats['count'], 'p50': self.percentile(key, 50),
+                         'p99': self.percentile(key, 99), 'max': stats['max']})
+        return sorted(rows, key=lambda r: -r['mean'])
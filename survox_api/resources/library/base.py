@@ -13,47 +13,54 @@ class SurvoxAPILibrary(SurvoxAPIBase):
     api.library.dnc{name}.delete(), etc.
     """
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPILibrary, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPILibrary, self).__init__(base_url, headers, verbose, session)
         self.url = '/surveys/'
 
     @property
     def dncs(self):
-        return SurvoxAPIDncList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIDncList(base_url=self.base_url, headers=self.auth_headers,
+                                verbose=self.verbose, session=self.session)
 
     def dnc(self, name):
         valid, msg = valid_url_field('DNC setup name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPIDnc(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPIDnc(name, base_url=self.base_url, headers=self.auth_headers,
+                            verbose=self.verbose, session=self.session)
 
     @property
     def sample_maps(self):
-        return SurvoxAPISampleMapList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPISampleMapList(base_url=self.base_url, headers=self.auth_headers,
+                                      verbose=self.verbose, session=self.session)
 
     def sample_map(self, name):
         valid, msg = valid_url_field('Sample map name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPISampleMap(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPISampleMap(name, base_url=self.base_url, headers=self.auth_headers,
+                                  verbose=self.verbose, session=self.session)
 
     @property
     def sample_setup_rules(self):
-        return SurvoxAPISampleSetupRulesList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPISampleSetupRulesList(base_url=self.base_url, headers=self.auth_headers,
+                                             verbose=self.verbose, session=self.session)
 
     def sample_setup_rule(self, name):
         valid, msg = valid_url_field('Sample setup name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPISampleSetupRules(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPISampleSetupRules(name, base_url=self.base_url, headers=self.auth_headers,
+                                         verbose=self.verbose, session=self.session)
 
     @property
     def sample_calling_rules(self):
-        return SurvoxAPISampleCallingRulesList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+        return SurvoxAPISampleCallingRulesList(base_url=self.base_url, headers=self.auth_headers,
+                                               verbose=self.verbose, session=self.session)
 
     def sample_calling_rule(self, name):
         valid, msg = valid_url_field('Sample setup name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
         return SurvoxAPISampleCallingRules(name, base_url=self.base_url, headers=self.auth_headers,
-                                           verbose=self.verbose)
+                                           verbose=self.verbose, session=self.session)
@@ -0,0 +1,289 @@
+import csv
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from ..exception import SurvoxAPIRuntime
+
+DNC_TYPES = ('phone', 'prefix', 'email')
+INDEX_MAGIC = b'SVXDNC02'
+# magic, dnc type, byte order, number of keys, bitmap of the prefix lengths present
+INDEX_HEADER = struct.Struct('<8s8s8sQQ')
+# phone and prefix keys are the digits with their count above them, so leading zeros count; E.164 numbers have at
+# most 15 digits, which keeps the digits below 2^50 and clear of the count
+PREFIX_SHIFT = 59
+MAX_DIGITS = 15
+SORT_RUN = 1000000
+DEFAULT_BATCH_SIZE = 10000
+# str.translate() table deleting the punctuation, spaces and letters numbers are written with
+_NOT_DIGITS = {c: None for c in range(128) if not chr(c).isdigit()}
+
+
+def phone_digits(value):
+    """
+    :param value: phone number in any format
+    :return: its digits, without the +1/1 country code of 11 digit numbers, or '' if it has none
+    """
+    digits = value if value.isdigit() else value.translate(_NOT_DIGITS)
+    if not digits.isascii():
+        digits = ''.join(c for c in digits if '0' <= c <= '9')
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    return digits
+
+
+class SurvoxAPIDncIndex:
+    """
+    Local, read-only copy of a DNC list for checking sample against it before it's uploaded.
+
+    Entries are kept as a sorted array of 64 bit keys: the digits plus their count for phone and prefix lists
+    (entries of more than MAX_DIGITS digits can't be phone numbers and are left out), and an 8 byte blake2b hash
+    of the lower-cased address for email lists (so a false match is possible, but at about 1 in 2^64 per lookup).
+    save() writes the array to disk as-is and load() maps it back with mmap, so an index of millions of numbers
+    opens instantly and is shared by every process using it.
+    """
+
+    def __init__(self, dnc_type, keys, lengths=0, source=None):
+        """
+        :param dnc_type: phone, prefix or email
+        :param keys: sorted, de-duplicated array('Q') or memoryview of keys
+        :param lengths: for prefix lists, bitmap of the prefix lengths present
+        :param source: the mmap the keys are a view of, if any
+        """
+        if dnc_type not in DNC_TYPES:
+            raise SurvoxAPIRuntime('Unknown DNC type "{t}".  Must be one of {o}'.format(t=dnc_type, o=DNC_TYPES))
+        self.dnc_type = dnc_type
+        self.keys = keys
+        self.lengths = [n for n in range(64) if lengths >> n & 1]
+        self._lengths = lengths
+        self._source = source
+        # entries build() left out, having no digits or too many
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def key(dnc_type, value):
+        """
+        :param dnc_type: phone, prefix or email
+        :param value: DNC list entry
+        :return: its 64 bit key, or None if the value is empty or has more than MAX_DIGITS digits
+        """
+        if dnc_type == 'email':
+            value = value.strip().lower()
+            if not value:
+                return None
+            return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+        digits = phone_digits(value)
+        if not digits or len(digits) > MAX_DIGITS:
+            return None
+        return len(digits) << PREFIX_SHIFT | int(digits)
+
+    @classmethod
+    def build(cls, dnc_type, values):
+        """
+        Build an index from DNC entries, sorting them in runs so only the keys are ever held in memory
+        :param dnc_type: phone, prefix or email
+        :param values: iterable of entries
+        :return: SurvoxAPIDncIndex, with the number of entries left out in skipped
+        """
+        runs = []
+        run = []
+        lengths = 0
+        skipped = 0
+        for value in values:
+            k = cls.key(dnc_type, value)
+            if k is None:
+                skipped += 1
+                continue
+            run.append(k)
+            if dnc_type == 'prefix':
+                lengths |= 1 << (k >> PREFIX_SHIFT)
+            if len(run) >= SORT_RUN:
+                run.sort()
+                runs.append(array('Q', run))
+                run = []
+        run.sort()
+        runs.append(array('Q', run))
+        keys = array('Q')
+        last = None
+        for k in heapq.merge(*runs) if len(runs) > 1 else runs[0]:
+            if k != last:
+                keys.append(k)
+                last = k
+        index = cls(dnc_type, keys, lengths)
+        index.skipped = skipped
+        return index
+
+    @classmethod
+    def from_csv(cls, filename, dnc_type, column=0):
+        """
+        Build an index from a DNC csv file, as saved by SurvoxAPIDnc.download()
+        :param filename: csv file
+        :param dnc_type: phone, prefix or email
+        :param column: index of the column holding the entries
+        :return: SurvoxAPIDncIndex
+        """
+        with open(filename, newline='') as fh:
+            return cls.build(dnc_type, cls._entries(csv.reader(fh), column))
+
+    @staticmethod
+    def _entries(records, column=0):
+        first = True
+        for record in records:
+            if len(record) <= column:
+                continue
+            value = record[column]
+            if first:
+                first = False
+                if not any(c.isdigit() for c in value) and '@' not in value:
+                    # header line
+                    continue
+            yield value
+
+    def save(self, filename):
+        """
+        Write the index to disk for load()
+        :param filename: index file
+        :return: None
+        """
+        temp = filename + '.tmp'
+        with open(temp, 'wb') as fh:
+            fh.write(INDEX_HEADER.pack(INDEX_MAGIC, self.dnc_type.encode('ascii'), sys.byteorder.encode('ascii'),
+                                       len(self.keys), self._lengths))
+            fh.write(memoryview(self.keys).cast('B'))
+        os.replace(temp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Map an index saved by save() into memory, without reading it
+        :param filename: index file
+        :return: SurvoxAPIDncIndex
+        """
+        with open(filename, 'rb') as fh:
+            header = fh.read(INDEX_HEADER.size)
+            if len(header) < INDEX_HEADER.size:
+                raise SurvoxAPIRuntime('Not a DNC index: {f}'.format(f=filename))
+            magic, dnc_type, byteorder, count, lengths = INDEX_HEADER.unpack(header)
+            if magic != INDEX_MAGIC:
+                if magic.startswith(INDEX_MAGIC[:6]):
+                    raise SurvoxAPIRuntime('DNC index was written by another version, build it again: {f}'.format(
+                        f=filename))
+                raise SurvoxAPIRuntime('Not a DNC index: {f}'.format(f=filename))
+            if byteorder.rstrip(b'\0').decode('ascii') != sys.byteorder:
+                raise SurvoxAPIRuntime('DNC index was written on a machine with another byte order: {f}'.format(
+                    f=filename))
+            dnc_type = dnc_type.rstrip(b'\0').decode('ascii')
+            if not count:
+                return cls(dnc_type, array('Q'), lengths)
+            source = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        keys = memoryview(source)[INDEX_HEADER.size:INDEX_HEADER.size + count * 8].cast('Q')
+        return cls(dnc_type, keys, lengths, source)
+
+    def close(self):
+        if self._source is not None:
+            self.keys.release()
+            self._source.close()
+            self._source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def _lookup_type(self):
+        # sample values checked against a prefix list are whole phone numbers
+        return 'phone' if self.dnc_type == 'prefix' else self.dnc_type
+
+    def _candidates(self, value):
+        # the keys that would suppress a value: its own, or for prefix lists one per prefix length in the list
+        if self.dnc_type != 'prefix':
+            return [self.key(self.dnc_type, value)]
+        digits = phone_digits(value)
+        if len(digits) > MAX_DIGITS:
+            return []
+        return [n << PREFIX_SHIFT | int(digits[:n]) for n in self.lengths if n <= len(digits)]
+
+    def __contains__(self, value):
+        keys = self.keys
+        for k in self._candidates(value):
+            if k is not None:
+                i = bisect_left(keys, k)
+                if i < len(keys) and keys[i] == k:
+                    return True
+        return False
+
+    def contains_many(self, values):
+        """
+        Check a batch of values at once.  The lookups are sorted first, so each one searches only the part of the
+        index after the previous one and the index is walked once, in order.
+        :param values: list of phone numbers, or emails
+        :return: list of booleans, True for each value the DNC list suppresses
+        """
+        lookups = []
+        for i, value in enumerate(values):
+            for k in self._candidates(value):
+                if k is not None:
+                    lookups.append((k, i))
+        lookups.sort()
+        found = [False] * len(values)
+        keys = self.keys
+        size = len(keys)
+        lo = 0
+        for k, i in lookups:
+            lo = bisect_left(keys, k, lo)
+            if lo == size:
+                break
+            if keys[lo] == k:
+                found[i] = True
+        return found
+
+    def filter_csv(self, filename, output, column='phone', suppressed=None, batch_size=None):
+        """
+        Copy a sample csv file without the records the DNC list suppresses, e.g. before sample.upload()
+        :param filename: sample csv file with a header line
+        :param output: csv file to write the records to keep in
+        :param column: name of the column to check
+        :param suppressed: csv file to write the suppressed records in, if wanted
+        :param batch_size: records checked at a time
+        :return: {'records': records read, 'kept': records written, 'suppressed': records dropped, 'invalid': records
+                 kept because their value can't be on the list, e.g. a number of more than MAX_DIGITS digits}
+        """
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        counts = {'records': 0, 'kept': 0, 'suppressed': 0, 'invalid': 0}
+        with open(filename, newline='') as src, open(output, 'w', newline='') as dst:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if header is None:
+                return counts
+            if column not in header:
+                raise SurvoxAPIRuntime('No "{c}" column in {f}'.format(c=column, f=filename))
+            position = header.index(column)
+            writer = csv.writer(dst)
+            writer.writerow(header)
+            with open(suppressed or os.devnull, 'w', newline='') as dropped:
+                drop = csv.writer(dropped)
+                if suppressed:
+                    drop.writerow(header)
+                while True:
+                    batch = [r for r in (next(reader, None) for _ in range(batch_size)) if r is not None]
+                    if not batch:
+                        break
+                    values = [r[position] if len(r) > position else '' for r in batch]
+                    hits = self.contains_many(values)
+                    counts['invalid'] += sum(1 for v in values if self.key(self._lookup_type, v) is None)
+                    for record, hit in zip(batch, hits):
+                        (drop if hit else writer).writerow(record)
+                    counts['records'] += len(batch)
+                    counts['suppressed'] += sum(hits)
+        counts['kept'] = counts['records'] - counts['suppressed']
+        return counts
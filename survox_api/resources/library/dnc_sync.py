@@ -0,0 +1,127 @@
+import hashlib
+import heapq
+import os
+import tempfile
+
+from .dnc_index import SORT_RUN, phone_digits
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.survox_api', 'dnc')
+
+
+def normalize(dnc_type, value):
+    """
+    :param dnc_type: phone, prefix or email
+    :param value: DNC list entry
+    :return: the entry as it's compared between syncs, '' if it's empty
+    """
+    if dnc_type == 'email':
+        return value.strip().lower()
+    return phone_digits(value)
+
+
+def sorted_entries(dnc_type, values, directory):
+    """
+    Sort and de-duplicate DNC entries in runs of SORT_RUN written to temporary files, so a list of any size is
+    sorted in bounded memory
+    :param dnc_type: phone, prefix or email
+    :param values: iterable of entries
+    :param directory: directory for the run files, which are removed as soon as they're opened
+    :return: iterator of normalized entries in sorted order
+    """
+    runs = []
+    run = set()
+    for value in values:
+        value = normalize(dnc_type, value)
+        if value:
+            run.add(value)
+            if len(run) >= SORT_RUN:
+                runs.append(_write_run(run, directory))
+                run = set()
+    if not runs:
+        return iter(sorted(run))
+    if run:
+        runs.append(_write_run(run, directory))
+    return _unique(heapq.merge(*(_read_run(r) for r in runs)))
+
+
+def _write_run(run, directory):
+    fh = tempfile.TemporaryFile('w+', dir=directory)
+    fh.writelines(v + '\n' for v in sorted(run))
+    fh.seek(0)
+    return fh
+
+
+def _read_run(fh):
+    with fh:
+        for line in fh:
+            yield line[:-1]
+
+
+def _unique(values):
+    last = None
+    for value in values:
+        if value != last:
+            yield value
+            last = value
+
+
+def merge_diff(old, new):
+    """
+    Walk two sorted, de-duplicated iterators side by side
+    :param old: entries at the last sync
+    :param new: entries wanted now
+    :return: iterator of (entry, in_old, in_new)
+    """
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a < b):
+            yield a, True, False
+            a = next(old, None)
+        elif a is None or b < a:
+            yield b, False, True
+            b = next(new, None)
+        else:
+            yield a, True, True
+            a, b = next(old, None), next(new, None)
+
+
+class SurvoxAPIDncSyncState:
+    """
+    What a DNC list held after its last sync: its normalized entries, sorted, one per line, in a file per
+    (host, list) under ~/.survox_api/dnc
+    """
+
+    def __init__(self, base_url, name, directory=None):
+        self.directory = directory or DEFAULT_STATE_DIR
+        key = hashlib.sha1('{u} {n}'.format(u=base_url, n=name).encode('utf-8')).hexdigest()
+        self.filename = os.path.join(self.directory, key + '.state')
+
+    @property
+    def exists(self):
+        return os.path.isfile(self.filename)
+
+    def entries(self):
+        with open(self.filename) as fh:
+            for line in fh:
+                yield line[:-1]
+
+    def writer(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return open(self.filename + '.tmp', 'w')
+
+    def commit(self):
+        os.replace(self.filename + '.tmp', self.filename)
+
+    def discard(self):
+        try:
+            os.remove(self.filename + '.tmp')
+        except OSError:
+            pass
+
+    def clear(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
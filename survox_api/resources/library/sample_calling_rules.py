@@ -7,8 +7,8 @@ class SurvoxAPISampleCallingRulesList(SurvoxAPIBase):
     """
     Class that works with sample calling rules templates
     """
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleCallingRulesList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleCallingRulesList, self).__init__(base_url, headers, verbose, session)
         self.url = '/sample/calling-rules/'
 
     def list(self):
@@ -50,8 +50,8 @@ class SurvoxAPISampleCallingRules(SurvoxAPIBase):
     """
     Class to work with specific sample calling rule template
     """
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleCallingRules, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleCallingRules, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.url = '/sample/calling-rules/{name}/'.format(name=name)
 
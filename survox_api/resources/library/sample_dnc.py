@@ -1,9 +1,13 @@
+import csv
 import os
 import json
+import tempfile
 
 from ...resources.base import SurvoxAPIBase
 from ...resources.exception import SurvoxAPIRuntime, SurvoxAPINotFound
 from ...resources.valid import valid_url_field
+from .dnc_index import SurvoxAPIDncIndex
+from .dnc_sync import SurvoxAPIDncSyncState, merge_diff, sorted_entries
 
 
 class SurvoxAPIDncList(SurvoxAPIBase):
@@ -11,8 +15,8 @@ class SurvoxAPIDncList(SurvoxAPIBase):
     Class to manage DNC lists.
     """
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIDncList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIDncList, self).__init__(base_url, headers, verbose, session)
         self.url = '/sample/dnc/'
 
     def list(self):
@@ -55,7 +59,8 @@ class SurvoxAPIDncList(SurvoxAPIBase):
         if s and filename:
             if not os.path.isfile(filename):
                 raise SurvoxAPIRuntime('No such filename for Do-Not-Contact: {name)'.format(name=filename))
-            x = SurvoxAPIDnc(name, base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose)
+            x = SurvoxAPIDnc(name, base_url=self.base_url, headers=self.auth_headers,
+                             verbose=self.verbose, session=self.session)
             upload = x.upload(filename)
             s['upload_result'] = upload
         return s
@@ -73,8 +78,8 @@ class SurvoxAPIDnc(SurvoxAPIBase):
     Class for working with a specific DNC list
     """
 
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPIDnc, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPIDnc, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.url = '/sample/dnc/{name}/'.format(name=name)
         self.upload_url = "{base}upload/".format(base=self.url)
@@ -117,22 +122,137 @@ class SurvoxAPIDnc(SurvoxAPIBase):
         """
         return self.api_delete(endpoint=self.url)
 
-    def upload(self, filename, block_size=None):
+    def upload(self, filename, block_size=None, max_in_flight=None, resume=True):
         """
         Upload records into DNC list
         :param filename: file to upload
         :param block_size: block size of upload
+        :param max_in_flight: max blocks sent at the same time
+        :param resume: continue an interrupted upload of this file where it left off
         :return:
         """
-        return self.api_upload(self.upload_url, filename, block_size=block_size)
+        return self.api_upload(self.upload_url, filename, block_size=block_size, max_in_flight=max_in_flight,
+                               resume=resume)
 
-    def download(self, filename):
+    def _download_location(self):
+        download_location = self.api_get(self.download_url)
+        if not download_location:
+            raise SurvoxAPIRuntime('No DNC available for download: {name}'.format(name=self.name))
+        return download_location
+
+    def download(self, filename, buffer_size=None, resume=True, parallel=None, md5=None):
         """
         Download a dnc file in csv format
         :param filename: file to save as
+        :param buffer_size: bytes read from the socket at a time
+        :param resume: resume an interrupted download of this file
+        :param parallel: max byte ranges fetched at once, if the server supports ranges
+        :param md5: expected md5 hex digest of the file
         :return:
         """
-        download_location = self.api_get(self.download_url)
-        if not download_location:
-            raise SurvoxAPIRuntime('No DNC available for download: {name}'.format(name=self.name))
-        return self.api_download(download_location, filename)
+        return self.api_download(self._download_location(), filename, buffer_size=buffer_size, resume=resume,
+                                 parallel=parallel, md5=md5)
+
+    def iter_records(self, buffer_size=None):
+        """
+        Stream the dnc list in csv format without saving it
+        :param buffer_size: bytes read from the socket at a time
+        :return: iterator of csv records, each a list of fields
+        """
+        return csv.reader(self.api_iter_lines(self._download_location(), buffer_size=buffer_size))
+
+    def index(self, filename=None, dnc_type=None, buffer_size=None):
+        """
+        Build a local index of the dnc list, to check sample against it before uploading it
+        :param filename: save the index in this file too, SurvoxAPIDncIndex.load(filename) maps it back later
+        :param dnc_type: phone, prefix or email, looked up if not given
+        :param buffer_size: bytes read from the socket at a time
+        :return: SurvoxAPIDncIndex
+        """
+        if not dnc_type:
+            dnc = self.get()
+            if not dnc:
+                raise SurvoxAPIRuntime('No DNC available named: {name}'.format(name=self.name))
+            dnc_type = dnc['dnc_type']
+        index = SurvoxAPIDncIndex.build(dnc_type, SurvoxAPIDncIndex._entries(self.iter_records(buffer_size)))
+        if filename:
+            index.save(filename)
+        return index
+
+    def sync(self, filename, replace=False, state_dir=None, block_size=None, buffer_size=None):
+        """
+        Make the DNC list hold what's in a csv file, uploading only the entries added since the last sync.
+
+        What the list held after the last sync is kept under ~/.survox_api/dnc; the first sync reads it from the
+        list itself.  Both sides are sorted in runs and merged, so neither is ever held in memory whole.  The API
+        can't remove single entries, so entries missing from the file are only reported, and stay pending, unless
+        replace is True, in which case the list is deleted, created again with the same name, type, description and
+        account (any other settings of the list are not kept) and the whole file uploaded.
+        :param filename: csv file with the entries the list should hold, in its first column
+        :param replace: recreate the list when entries have to be removed
+        :param state_dir: directory to keep the sync state in
+        :param block_size: block size of the upload
+        :param buffer_size: bytes read from the socket at a time, when reading the list for the first sync
+        :return: {'added', 'removed', 'pending_removals', 'unchanged', 'uploaded_bytes', 'replaced'}
+        """
+        if not os.path.isfile(filename):
+            raise SurvoxAPIRuntime('No such filename for Do-Not-Contact: {name}'.format(name=filename))
+        dnc = self.get()
+        if not dnc:
+            raise SurvoxAPIRuntime('No DNC available named: {name}'.format(name=self.name))
+        dnc_type = dnc['dnc_type']
+        state = SurvoxAPIDncSyncState(self.base_url, self.name, state_dir)
+        result = {'added': 0, 'removed': 0, 'pending_removals': 0, 'unchanged': 0, 'uploaded_bytes': 0,
+                  'replaced': False}
+        with tempfile.TemporaryDirectory() as work:
+            if state.exists:
+                old = state.entries()
+            else:
+                old = sorted_entries(dnc_type, SurvoxAPIDncIndex._entries(self.iter_records(buffer_size)), work)
+            with open(filename, newline='') as fh:
+                new = sorted_entries(dnc_type, SurvoxAPIDncIndex._entries(csv.reader(fh)), work)
+                additions = os.path.join(work, 'additions.csv')
+                with open(additions, 'w', newline='') as out, state.writer() as kept:
+                    writer = csv.writer(out)
+                    writer.writerow([dnc_type])
+                    for entry, in_old, in_new in merge_diff(old, new):
+                        if in_new and not in_old:
+                            writer.writerow([entry])
+                            result['added'] += 1
+                        elif in_new:
+                            result['unchanged'] += 1
+                        else:
+                            result['pending_removals'] += 1
+                        # until removals are applied the list still holds them
+                        kept.write(entry + '\n')
+            try:
+                if result['pending_removals'] and replace:
+                    self.delete()
+                    # the saved state no longer matches the list, if the rest fails the next sync has to start from
+                    # what the server holds
+                    state.clear()
+                    SurvoxAPIDncList(base_url=self.base_url, headers=self.auth_headers, verbose=self.verbose,
+                                     session=self.session).create(self.name, dnc.get('description', ''), dnc_type,
+                                                                  dnc.get('account'))
+                    upload = full = os.path.join(work, 'full.csv')
+                    with state.writer() as kept, open(filename, newline='') as fh:
+                        with open(full, 'w', newline='') as out:
+                            writer = csv.writer(out)
+                            writer.writerow([dnc_type])
+                            for entry in sorted_entries(dnc_type, SurvoxAPIDncIndex._entries(csv.reader(fh)), work):
+                                writer.writerow([entry])
+                                kept.write(entry + '\n')
+                    result.update(added=result['added'] + result['unchanged'], unchanged=0,
+                                  removed=result['pending_removals'], pending_removals=0, replaced=True)
+                elif result['added']:
+                    upload = additions
+                else:
+                    upload = None
+                if upload:
+                    self.upload(upload, block_size=block_size, resume=False)
+                    result['uploaded_bytes'] = os.path.getsize(upload)
+            except BaseException:
+                state.discard()
+                raise
+            state.commit()
+        return result
@@ -7,8 +7,8 @@ class SurvoxAPISampleMapList(SurvoxAPIBase):
     """
     Class that works with sample setup rules templates
     """
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleMapList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleMapList, self).__init__(base_url, headers, verbose, session)
         self.url = '/sample/map/'
 
     def list(self):
@@ -49,8 +49,8 @@ class SurvoxAPISampleMap(SurvoxAPIBase):
     """
     Class to work with specific sample setup rule template
     """
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleMap, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleMap, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.url = '/sample/map/{name}/'.format(name=name)
 
@@ -7,8 +7,8 @@ class SurvoxAPISampleSetupRulesList(SurvoxAPIBase):
     """
     Class that works with sample setup rules templates
     """
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleSetupRulesList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleSetupRulesList, self).__init__(base_url, headers, verbose, session)
         self.url = '/sample/setup-rules/'
 
     def list(self):
@@ -49,8 +49,8 @@ class SurvoxAPISampleSetupRules(SurvoxAPIBase):
     """
     Class to work with specific sample setup rule template
     """
-    def __init__(self, name, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISampleSetupRules, self).__init__(base_url, headers, verbose)
+    def __init__(self, name, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISampleSetupRules, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.url = '/sample/setup-rules/{name}/'.format(name=name)
 
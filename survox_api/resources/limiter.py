@@ -0,0 +1,169 @@
+import asyncio
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class SurvoxAPITokenBucket:
+    """
+    Token bucket: allows bursts of up to burst requests, refilled at rate requests per second
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: requests per second
+        :param burst: max requests sent back to back, defaults to rate (at least 1)
+        """
+        self.rate = float(rate)
+        self.burst = float(max(1, burst if burst is not None else rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, going into debt if there isn't one
+        :return: seconds the caller has to wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class SurvoxAPIEndpointLimit:
+    """
+    Limits for one class of endpoints: a request rate and a max number of requests in flight at once
+    """
+
+    def __init__(self, name, pattern=None, rate=None, burst=None, max_in_flight=None):
+        """
+        :param name: name of the endpoint class, for statistics
+        :param pattern: regular expression searched for in the url path, None matches everything
+        :param rate: max requests per second, None for no limit
+        :param burst: max requests sent back to back before rate applies
+        :param max_in_flight: max requests waiting on a response at the same time, None for no limit
+        """
+        self.name = name
+        self.pattern = re.compile(pattern) if pattern else None
+        self.bucket = SurvoxAPITokenBucket(rate, burst) if rate else None
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._async_slots = None
+        self.stats = {'requests': 0, 'waited': 0.0}
+        self._lock = threading.Lock()
+
+    def matches(self, path):
+        return self.pattern is None or self.pattern.search(path) is not None
+
+    def _count(self, waited):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['waited'] += waited
+
+    @contextmanager
+    def acquire(self):
+        """
+        Wait for the rate limit and a free slot, use as "with limit.acquire():" around a request
+        """
+        started = time.monotonic()
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            wait = self.bucket.reserve() if self.bucket is not None else 0
+            if wait:
+                time.sleep(wait)
+            self._count(time.monotonic() - started)
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def acquire_async(self):
+        """
+        Async version of acquire(), use as "async with limit.acquire_async():"
+        """
+        # the semaphore has to belong to the running loop, so it's made on first use
+        if self.max_in_flight and self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_in_flight)
+        return _SurvoxAPIAsyncSlot(self)
+
+
+class _SurvoxAPIAsyncSlot:
+    def __init__(self, limit):
+        self.limit = limit
+
+    async def __aenter__(self):
+        if self.limit is None:
+            return
+        started = time.monotonic()
+        if self.limit._async_slots is not None:
+            await self.limit._async_slots.acquire()
+        wait = self.limit.bucket.reserve() if self.limit.bucket is not None else 0
+        if wait:
+            await asyncio.sleep(wait)
+        self.limit._count(time.monotonic() - started)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.limit is not None and self.limit._async_slots is not None:
+            self.limit._async_slots.release()
+
+
+def default_limits():
+    """
+    :return: the endpoint classes a session limits by default, most specific first
+    """
+    return [
+        # these tie up the account's survey server, keep them to a trickle
+        SurvoxAPIEndpointLimit('sample-import', r'/sample/(.*/)?import/', rate=1, burst=2, max_in_flight=2),
+        SurvoxAPIEndpointLimit('sample-rebuild', r'/(rebuild|repair|recover)/', rate=1, burst=2, max_in_flight=2),
+        SurvoxAPIEndpointLimit('quotas', r'/quotas', rate=100, burst=100, max_in_flight=16),
+        SurvoxAPIEndpointLimit('default', rate=50, burst=50, max_in_flight=10),
+    ]
+
+
+class SurvoxAPIRateLimiter:
+    """
+    Client side rate limits and concurrency caps shared by every request sent through a session, from any
+    thread.  Each request is counted against the first endpoint class whose pattern matches its path.
+    """
+
+    def __init__(self, limits=None):
+        """
+        :param limits: list of SurvoxAPIEndpointLimit, most specific first, defaults to default_limits()
+        """
+        self.limits = limits if limits is not None else default_limits()
+
+    def limit(self, url):
+        """
+        :param url: request url
+        :return: the SurvoxAPIEndpointLimit the url counts against, or None
+        """
+        path = urlparse(url).path
+        for limit in self.limits:
+            if limit.matches(path):
+                return limit
+        return None
+
+    @contextmanager
+    def acquire(self, url):
+        limit = self.limit(url)
+        if limit is None:
+            yield
+        else:
+            with limit.acquire():
+                yield
+
+    def acquire_async(self, url):
+        limit = self.limit(url)
+        return limit.acquire_async() if limit is not None else _SurvoxAPIAsyncSlot(None)
+
+    @property
+    def stats(self):
+        return {limit.name: dict(limit.stats) for limit in self.limits}
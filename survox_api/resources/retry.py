@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class SurvoxAPIRetryPolicy:
+    """
+    When and how long to wait before sending a request again after a transient failure: a connection error, or
+    a 429/502/503/504 response.  Waits grow exponentially with full jitter, and a Retry-After header is honored.
+
+    GET/PUT/DELETE are retried freely.  POST only is when the call passes an idempotency key, which is sent as
+    an Idempotency-Key header so the server can tell a repeat from a new request.
+    """
+
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30, jitter=True, max_retry_after=300,
+                 statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS):
+        """
+        :param max_attempts: max times a request is sent, 1 disables retries
+        :param backoff: seconds to wait before the first retry, doubled for each one after
+        :param max_backoff: longest wait between attempts, unless the server asks for longer with Retry-After
+        :param jitter: wait a random time between 0 and the backoff, so clients don't retry in lock step
+        :param max_retry_after: give up instead of waiting if Retry-After asks for longer than this many seconds
+        :param statuses: response status codes worth retrying
+        :param methods: methods retried without an idempotency key
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self.statuses = statuses
+        self.methods = methods
+        self.stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'gave_up': 0}
+        self._lock = threading.Lock()
+
+    def copy(self, **changes):
+        """
+        Make a policy with some settings changed, e.g. for a per-call override
+        :param changes: any of the constructor parameters
+        :return: SurvoxAPIRetryPolicy with its own counters
+        """
+        settings = {'max_attempts': self.max_attempts, 'backoff': self.backoff, 'max_backoff': self.max_backoff,
+                    'jitter': self.jitter, 'max_retry_after': self.max_retry_after, 'statuses': self.statuses,
+                    'methods': self.methods}
+        settings.update(changes)
+        return SurvoxAPIRetryPolicy(**settings)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def retryable(self, method, idempotency_key=None):
+        return method.upper() in self.methods or bool(idempotency_key)
+
+    @staticmethod
+    def retry_after(response):
+        """
+        :param response: response structure
+        :return: seconds the Retry-After header asks to wait, or None
+        """
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+    def delay(self, attempt, response=None):
+        """
+        Work out how long to wait before sending a request again
+        :param attempt: number of times the request has been sent so far
+        :param response: the failed response, or None after a connection error
+        :return: seconds to wait, or None to give up
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if response is not None and response.status_code not in self.statuses:
+            return None
+        wait = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        asked = self.retry_after(response)
+        if asked is not None:
+            if asked > self.max_retry_after:
+                return None
+            wait = max(wait, asked)
+        return wait
+
+
+class SurvoxAPINoRetry(SurvoxAPIRetryPolicy):
+    """
+    Policy that sends every request once
+    """
+
+    def __init__(self):
+        super(SurvoxAPINoRetry, self).__init__(max_attempts=1)
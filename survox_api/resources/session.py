@@ -0,0 +1,202 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .exception import SurvoxAPIRuntime
+from .retry import SurvoxAPIRetryPolicy, SurvoxAPINoRetry
+from .limiter import SurvoxAPIRateLimiter
+from .http_cache import SurvoxAPIHTTPCache
+from .instrument import SurvoxAPIInstrumentation
+from .cache import SurvoxAPITTLCache, SurvoxAPISnapshots, SurvoxAPIPreviews
+
+
+class SurvoxAPISession:
+    """
+    Pooled HTTP transport shared by a SurvoxAPI object and every resource created from it, so that
+    connections (and TLS handshakes) are reused across calls instead of being opened per request.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, survey_cache_ttl=60,
+                 status_refresh=30, retry=None, limiter=None, http_cache=None, preview_ttl=300):
+        """
+        :param pool_connections: number of per-host connection pools to keep around
+        :param pool_maxsize: max connections kept open to any single host
+        :param pool_block: if True, wait for a free connection when a host's pool is exhausted instead of opening
+                           a throw-away one
+        :param keep_alive: if False, ask the server to close the connection after every request
+        :param survey_cache_ttl: seconds a survey's details are trusted before navigating the resource tree checks
+                                 the survey exists again, 0 to always check
+        :param status_refresh: seconds a snapshot of /surveys-status/ or /accounts/ is used before it's fetched
+                               again, 0 to always fetch
+        :param retry: SurvoxAPIRetryPolicy for transient failures, False to never retry
+        :param limiter: SurvoxAPIRateLimiter capping request rates and concurrency per endpoint class, False for
+                        no limits
+        :param http_cache: SurvoxAPIHTTPCache revalidating GET responses with ETag/Last-Modified, False for none
+        :param preview_ttl: seconds a sample selection's list() preview is reused, e.g. by download(), 0 to never
+        """
+        self.retry = self._retry_policy(retry)
+        self.limiter = self._rate_limiter(limiter)
+        self.http_cache = self._http_cache(http_cache)
+        self.surveys = SurvoxAPITTLCache(survey_cache_ttl)
+        self.snapshots = SurvoxAPISnapshots(status_refresh)
+        self.previews = SurvoxAPIPreviews(preview_ttl)
+        self.instrumentation = SurvoxAPIInstrumentation()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.http = None
+        self._open()
+
+    def _open(self):
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        if not self.keep_alive:
+            self.http.headers['Connection'] = 'close'
+
+    @property
+    def closed(self):
+        return self.http is None
+
+    @staticmethod
+    def _retry_policy(retry):
+        if retry is None:
+            return SurvoxAPIRetryPolicy()
+        if retry is False:
+            return SurvoxAPINoRetry()
+        return retry
+
+    @staticmethod
+    def _rate_limiter(limiter):
+        if limiter is None:
+            return SurvoxAPIRateLimiter()
+        if limiter is False:
+            return SurvoxAPIRateLimiter([])
+        return limiter
+
+    @staticmethod
+    def _http_cache(http_cache):
+        if http_cache is None:
+            return SurvoxAPIHTTPCache()
+        if http_cache is False:
+            return None
+        return http_cache
+
+    @staticmethod
+    def cached_response(entry, response):
+        """
+        Turn a cache entry into a response, after the server answered 304 Not Modified
+        :param entry: SurvoxAPICacheEntry
+        :param response: the 304 response
+        :return: requests response structure
+        """
+        cached = requests.Response()
+        cached.status_code = entry.status_code
+        cached.headers = CaseInsensitiveDict(entry.headers)
+        cached._content = entry.content
+        cached.encoding = requests.utils.get_encoding_from_headers(cached.headers)
+        cached.url = response.url
+        cached.request = response.request
+        cached.attempts = getattr(response, 'attempts', 1)
+        cached.from_cache = True
+        return cached
+
+    def policy(self, retry=None):
+        """
+        :param retry: per-call override, None for the session's policy, False to send once, or a policy
+        :return: SurvoxAPIRetryPolicy to use
+        """
+        return self.retry if retry is None else self._retry_policy(retry)
+
+    def request(self, method, url, retry=None, idempotency_key=None, **kwargs):
+        """
+        Send a request over the pooled connections, retrying transient failures as the retry policy allows
+        :param method: HTTP method
+        :param url: full url of the request
+        :param retry: per-call retry override, None for the session's policy, False to send once, or a policy
+        :param idempotency_key: sent as the Idempotency-Key header, lets a POST be retried
+        :param kwargs: any other arguments accepted by requests
+        :return: requests response structure, its attempts attribute says how many times it was sent
+        """
+        hooks = self.instrumentation
+        if not hooks.subscribers:
+            return self._request(method, url, retry, idempotency_key, kwargs)
+        event = hooks.start(method, url)
+        started = time.perf_counter()
+        try:
+            r = self._request(method, url, retry, idempotency_key, kwargs)
+            hooks.response(event, r, streamed=kwargs.get('stream', False))
+            return r
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.latency = time.perf_counter() - started
+            hooks.end(event)
+
+    def _request(self, method, url, retry, idempotency_key, kwargs):
+        if self.closed:
+            raise SurvoxAPIRuntime('HTTP session is closed')
+        policy = self.policy(retry)
+        if idempotency_key:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Idempotency-Key': idempotency_key})
+        retryable = policy.retryable(method, idempotency_key)
+        body = kwargs.get('data')
+        policy.count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            policy.count('attempts')
+            if attempt > 1 and hasattr(body, 'seek'):
+                body.seek(0)
+            try:
+                with self.limiter.acquire(url):
+                    r = self.http.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                wait = policy.delay(attempt) if retryable else None
+                if wait is None:
+                    if retryable:
+                        policy.count('gave_up')
+                    raise
+            else:
+                wait = policy.delay(attempt, r) if retryable else None
+                if wait is None:
+                    if retryable and r.status_code in policy.statuses:
+                        policy.count('gave_up')
+                    r.attempts = attempt
+                    return r
+                r.close()
+            policy.count('retries')
+            time.sleep(wait)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """
+        Close every pooled connection.  Resources still holding this session can no longer make requests.
+        :return: None
+        """
+        if self.http is not None:
+            self.http.close()
+            self.http = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
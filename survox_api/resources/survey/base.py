@@ -10,8 +10,8 @@ class SurvoxAPISurveyList(SurvoxAPIBase):
     Class for survey list operations: api.surveys.xxx()
     """
 
-    def __init__(self, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveyList, self).__init__(base_url, headers, verbose)
+    def __init__(self, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveyList, self).__init__(base_url, headers, verbose, session)
         self.url = '/surveys/'
 
     def list(self):
@@ -20,11 +20,12 @@ class SurvoxAPISurveyList(SurvoxAPIBase):
         """
         return self.api_get(endpoint=self.url)
 
-    def status(self):
+    def status(self, refresh=False):
         """
         return a list of surveys statuses from the API
+        :param refresh: fetch the statuses even if the session's snapshot of them is still fresh
         """
-        return self.api_get(endpoint='/surveys-status/')
+        return self.api_get_snapshot('/surveys-status/', 'surveycode', self.url, refresh=refresh).rows
 
     def create(self, survey_info, exists_okay=False):
         """
@@ -43,68 +44,91 @@ class SurvoxAPISurveyList(SurvoxAPIBase):
         except SurvoxAPINotFound:
             pass
         s = self.api_post(endpoint=self.url, data=survey_info)
+        self.session.surveys.invalidate(self._cache_key(survey_info['surveycode']))
         return s
 
+    def _cache_key(self, sid):
+        return '{base}{url}{sid}/'.format(base=self.base_url, url=self.url, sid=sid)
+
 
 class SurvoxAPISurvey(SurvoxAPIBase):
     """
     Class for survey operations
     """
 
-    def __init__(self, sid, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurvey, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurvey, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.list_url = '/surveys/'
         self.survey_url = '/surveys/{sid}/'.format(sid=self.sid)
         self.deploy_endpoint = '{base}deploy/'.format(base=self.survey_url)
 
+    @property
+    def _cache_key(self):
+        return '{base}{url}'.format(base=self.base_url, url=self.survey_url)
+
     def get(self):
         """
         Retrieve the details of the given survey
         :return: survey details dictionary or None
         """
         try:
-            return self._get_required()
+            return self._get_required(refresh=True)
         except SurvoxAPINotFound:
             return None
 
-    def _get_required(self):
-        return self.api_get(endpoint=self.survey_url)
+    def _get_required(self, refresh=False):
+        # the details are cached on the shared session, so walking to sample/quotas/etc. only checks once per ttl
+        if not refresh:
+            survey = self.session.surveys.get(self._cache_key)
+            if survey is not None:
+                return survey
+        self.session.surveys.invalidate(self._cache_key)
+        return self.session.surveys.set(self._cache_key, self.api_get(endpoint=self.survey_url))
 
-    def status(self):
+    def delete(self):
+        """
+        Delete the survey
+        :return: api response data
+        """
+        self.session.surveys.invalidate(self._cache_key)
+        return self.api_delete(endpoint=self.survey_url)
+
+    def status(self, refresh=False):
         """
         Fetch status information about survey state
+        :param refresh: fetch the statuses even if the session's snapshot of them is still fresh
         :return: status dictionary
         """
-        l = self.api_get(endpoint='/surveys-status/')
-        for x in l:
-            if x['surveycode'] == self.sid:
-                return x
-        return {}
+        snapshot = self.api_get_snapshot('/surveys-status/', 'surveycode', self.list_url, refresh=refresh)
+        return snapshot.get(self.sid) or {}
 
     def deploy(self):
         self._get_required()
-        return self.api_post(endpoint=self.deploy_endpoint)
+        try:
+            return self.api_post(endpoint=self.deploy_endpoint)
+        finally:
+            self.session.surveys.invalidate(self._cache_key)
 
     @property
     def sample(self):
         self._get_required()
         return SurvoxAPISurveySample(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                     verbose=self.verbose)
+                                     verbose=self.verbose, session=self.session)
 
     @property
     def questionnaire(self):
         self._get_required()
         return SurvoxAPISurveyQuestionnaire(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                            verbose=self.verbose)
+                                            verbose=self.verbose, session=self.session)
 
     @property
     def quotas(self):
         self._get_required()
         return SurvoxAPISurveyQuotaList(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                        verbose=self.verbose)
+                                        verbose=self.verbose, session=self.session)
 
     def quota(self, name):
         self._get_required()
         return SurvoxAPISurveyQuota(name, sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                    verbose=self.verbose)
+                                    verbose=self.verbose, session=self.session)
@@ -3,16 +3,16 @@ from .modes import SurvoxAPISurveyQuestionnaireModeCati, SurvoxAPISurveyQuestion
 
 
 class SurvoxAPISurveyQuestionnaire(SurvoxAPISurveyQuestionnaireModeBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveyQuestionnaire, self).__init__(sid, base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveyQuestionnaire, self).__init__(sid, base_url, headers, verbose, session)
         self.sid = sid
 
     @property
     def cati(self):
         return SurvoxAPISurveyQuestionnaireModeCati(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                                    verbose=self.verbose)
+                                                    verbose=self.verbose, session=self.session)
 
     @property
     def online(self):
         return SurvoxAPISurveyQuestionnaireModeOnline(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                                      verbose=self.verbose)
+                                                      verbose=self.verbose, session=self.session)
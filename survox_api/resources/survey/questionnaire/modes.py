@@ -5,8 +5,8 @@ from ...exception import SurvoxAPINotFound
 class SurvoxAPISurveyQuestionnaireModeBase(SurvoxAPIBase):
     mode = 'cati'
 
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveyQuestionnaireModeBase, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveyQuestionnaireModeBase, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
 
     @property
@@ -23,8 +23,9 @@ class SurvoxAPISurveyQuestionnaireModeBase(SurvoxAPIBase):
         except SurvoxAPINotFound:
             return None
 
-    def upload(self, filename, block_size=100000):
-        return self.api_upload(endpoint=self.upload_endpoint, filename=filename, block_size=block_size)
+    def upload(self, filename, block_size=100000, max_in_flight=None, resume=True):
+        return self.api_upload(endpoint=self.upload_endpoint, filename=filename, block_size=block_size,
+                               max_in_flight=max_in_flight, resume=resume)
 
     def delete(self):
         return self.api_delete(endpoint=self.endpoint)
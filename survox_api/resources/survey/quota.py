@@ -1,5 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from ..exception import SurvoxAPIRuntime, SurvoxAPINotFound
 from ..base import SurvoxAPIBase
+from .quota_buffer import SurvoxAPIQuotaIncrementBuffer
+
+DEFAULT_SYNC_IN_FLIGHT = 8
 
 
 class SurvoxAPISurveyQuotaList(SurvoxAPIBase):
@@ -7,10 +12,10 @@ class SurvoxAPISurveyQuotaList(SurvoxAPIBase):
     Class to work with quota list for a survey
     """
 
-    def __init__(self, sid, base_url=None, headers=None, verbose=True):
+    def __init__(self, sid, base_url=None, headers=None, verbose=True, session=None):
         if not sid:
             raise SurvoxAPIRuntime('missing required parameter: sid')
-        super(SurvoxAPISurveyQuotaList, self).__init__(base_url, headers, verbose)
+        super(SurvoxAPISurveyQuotaList, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.endpoint = '/surveys/{sid}/quotas/'.format(sid=self.sid)
         self.reset_endpoint = '/surveys/{sid}/quotas-reset/'.format(sid=self.sid)
@@ -43,6 +48,84 @@ class SurvoxAPISurveyQuotaList(SurvoxAPIBase):
             return self.api_post(endpoint=self.endpoint, json=create)
         return []
 
+    def _sync_plan(self, quota_list, current):
+        """
+        Work out what sync() has to do
+        :param quota_list: quotas the survey should end up with
+        :param current: quotas the survey has now
+        :return: (quotas to create, quotas to update, quotas already matching)
+        """
+        if not isinstance(quota_list, list):
+            raise SurvoxAPIRuntime('specified quota_list is not type list')
+        current = {x['name']: x for x in current}
+        wanted = {}
+        for q in quota_list:
+            wanted[q['name']] = q
+        create, update, unchanged = [], [], []
+        for name, q in wanted.items():
+            if name not in current:
+                create.append(q)
+            elif SurvoxAPISurveyQuota._qfill(current[name]) != SurvoxAPISurveyQuota._qfill(q):
+                update.append(q)
+            else:
+                unchanged.append(current[name])
+        return create, update, unchanged
+
+    def _quota_endpoint(self, name):
+        return '{base}{quota}/'.format(base=self.endpoint, quota=name)
+
+    def _increment_endpoint(self, name):
+        return '{base}increment/'.format(base=self._quota_endpoint(name))
+
+    def increment_buffer(self, max_pending=None, max_delay=None, max_in_flight=None, on_flush=None):
+        """
+        Batch quota increments: returns a buffer whose increment(name, amount) calls are summed per quota and sent
+        in the background.  close() the buffer, or use it as a context manager, to send what's left.
+        :param max_pending: flush once this many increments are waiting
+        :param max_delay: flush once the oldest increment has waited this many seconds
+        :param max_in_flight: max increment requests sent at the same time during a flush
+        :param on_flush: called with flush statistics (quotas, increments, lag, duration, failed) after each flush
+        :return: SurvoxAPIQuotaIncrementBuffer
+        """
+        return SurvoxAPIQuotaIncrementBuffer(self, max_pending=max_pending, max_delay=max_delay,
+                                             max_in_flight=max_in_flight, on_flush=on_flush)
+
+    def sync(self, quota_list, max_in_flight=None):
+        """
+        Make the survey quotas match a list: quotas that don't exist are created in a single request, quotas whose
+        current/total/target differ are updated, max_in_flight at a time.  Quotas not in quota_list are left alone.
+        Every update is sent even if some fail; the failed ones are then raised as a SurvoxAPIRuntime whose
+        kwargs['report'] is the report below, so it is known which updates were applied.
+        :param quota_list: a list of quotas for the survey
+        :param max_in_flight: max updates sent at the same time
+        :return: {'created': [quotas], 'updated': [quotas], 'unchanged': [quotas], 'failed': []}
+        """
+        create, update, unchanged = self._sync_plan(quota_list, self.list())
+        created = self.api_post(endpoint=self.endpoint, json=create) if create else []
+
+        def put(q):
+            return self.api_put(endpoint=self._quota_endpoint(q['name']), data=SurvoxAPISurveyQuota._qfill(q))
+
+        report = {'created': created, 'updated': [], 'unchanged': unchanged, 'failed': []}
+        if update:
+            with ThreadPoolExecutor(max_workers=max(1, max_in_flight or DEFAULT_SYNC_IN_FLIGHT)) as pool:
+                futures = [(q, pool.submit(put, q)) for q in update]
+                for q, future in futures:
+                    try:
+                        report['updated'].append(future.result())
+                    except Exception as e:
+                        report['failed'].append({'quota': q, 'error': e})
+        return self._sync_report(report)
+
+    @staticmethod
+    def _sync_report(report):
+        if report['failed']:
+            raise SurvoxAPIRuntime('{n} of {total} quota updates failed: {errors}'.format(
+                n=len(report['failed']), total=len(report['failed']) + len(report['updated']),
+                errors='; '.join('{q} - {e}'.format(q=f['quota']['name'], e=f['error']) for f in report['failed'])),
+                report=report)
+        return report
+
     def reset(self):
         """
         reset the 'current' portion of all survey quotas
@@ -73,10 +156,10 @@ class SurvoxAPISurveyQuota(SurvoxAPIBase):
     Class to work with individual survey quotas
     """
 
-    def __init__(self, name, sid, base_url=None, headers=None, verbose=True):
+    def __init__(self, name, sid, base_url=None, headers=None, verbose=True, session=None):
         if not name:
             raise SurvoxAPIRuntime('missing required parameter: quota name')
-        super(SurvoxAPISurveyQuota, self).__init__(base_url, headers, verbose)
+        super(SurvoxAPISurveyQuota, self).__init__(base_url, headers, verbose, session)
         self.name = name
         self.sid = sid
         self.endpoint = '/surveys/{sid}/quotas/{quota}/'.format(sid=self.sid, quota=self.name)
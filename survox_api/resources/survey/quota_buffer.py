@@ -0,0 +1,224 @@
+import atexit
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..exception import SurvoxAPIException, SurvoxAPIRuntime
+
+DEFAULT_MAX_PENDING = 100
+DEFAULT_MAX_DELAY = 1.0
+DEFAULT_FLUSH_IN_FLIGHT = 4
+# client errors that may go away when the increment is sent again; any other 4xx (unknown quota, bad request) is
+# permanent and the increment is dropped
+RETRY_CLIENT_ERRORS = (408, 409, 425, 429)
+
+
+def permanent_failure(error):
+    """
+    :param error: exception raised sending an increment
+    :return: True if sending the same increment again can't succeed
+    """
+    return (isinstance(error, SurvoxAPIException) and 400 <= error.status_code < 500 and
+            error.status_code not in RETRY_CLIENT_ERRORS)
+
+
+class SurvoxAPIQuotaIncrementBuffer:
+    """
+    Gathers quota increments in memory and sends the summed amount per quota, so a burst of completes costs one
+    POST per quota cell instead of one per interview:
+
+        with api.survey('my_survey').quotas.increment_buffer() as quotas:
+            quotas.increment('q_male')
+
+    A background thread flushes once max_pending increments are waiting or the oldest has waited max_delay
+    seconds.  Whatever is still pending is flushed on close(), which also runs at interpreter exit.
+
+    Each quota's summed amount is sent with an idempotency key, so the request can be retried without counting
+    twice.  Increments that fail to send are kept, with their key, and sent again on the next flush; those the
+    server refuses for good (a 4xx such as an unknown quota) are dropped and listed in dropped instead.
+    """
+
+    def __init__(self, quotas, max_pending=None, max_delay=None, max_in_flight=None, on_flush=None):
+        """
+        :param quotas: SurvoxAPISurveyQuotaList the increments are for
+        :param max_pending: flush once this many increments are waiting
+        :param max_delay: flush once the oldest increment has waited this many seconds
+        :param max_in_flight: max increment requests sent at the same time during a flush
+        :param on_flush: called after every flush with a dictionary of quotas, increments, lag (seconds the oldest
+                         increment waited), duration (seconds the flush took), failed (quotas kept to send again)
+                         and dropped (quotas refused for good)
+        """
+        self.quotas = quotas
+        self.max_pending = max_pending or DEFAULT_MAX_PENDING
+        self.max_delay = max_delay or DEFAULT_MAX_DELAY
+        self.max_in_flight = max(1, max_in_flight or DEFAULT_FLUSH_IN_FLIGHT)
+        self.on_flush = on_flush
+        self.error = None
+        # {'quota', 'amount', 'increments', 'error'} of the sends the server refused for good
+        self.dropped = []
+        self._pending = defaultdict(int)
+        # increments queued per quota, so a failed send puts back as many as it held
+        self._counts = defaultdict(int)
+        # sends that failed, [name, amount, increments, idempotency key], sent again as they were
+        self._retries = []
+        self._count = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='quota-increment-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def increment(self, name, amount=1):
+        """
+        Queue an increment of a quota
+        :param name: quota name
+        :param amount: how much to increment, may be negative
+        :return: None
+        """
+        with self._lock:
+            if self._closed:
+                raise SurvoxAPIRuntime('quota increment buffer is closed')
+            self._pending[name] += int(amount)
+            self._counts[name] += 1
+            self._count += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = self._count >= self.max_pending
+        if full:
+            self._wake.set()
+
+    @property
+    def pending(self):
+        """
+        :return: dictionary of quota name to the amount not sent yet
+        """
+        with self._lock:
+            pending = defaultdict(int, self._pending)
+            for name, amount, _, _ in self._retries:
+                pending[name] += amount
+            return dict(pending)
+
+    def _take(self):
+        """
+        :return: (sends, increments, oldest): the failed sends of earlier flushes with their keys, then a new send
+                 with a new key per quota, each as [name, amount, increments, idempotency key]
+        """
+        with self._lock:
+            sends = self._retries
+            sends.extend([name, amount, self._counts[name], uuid.uuid4().hex]
+                         for name, amount in self._pending.items() if amount)
+            count, oldest = self._count, self._oldest
+            self._pending = defaultdict(int)
+            self._counts = defaultdict(int)
+            self._retries = []
+            self._count = 0
+            self._oldest = None
+        return sends, count, oldest
+
+    def _settle(self, sends, outcomes, oldest):
+        """
+        Keep the failed sends for the next flush, or drop them if they can't succeed
+        :param sends: what _take() returned
+        :param outcomes: result or exception of each send
+        :param oldest: when the oldest of the sends was queued
+        :return: (results, failed, dropped, last error)
+        """
+        results = []
+        failed = 0
+        dropped = 0
+        error = None
+        with self._lock:
+            for send, outcome in zip(sends, outcomes):
+                if not isinstance(outcome, Exception):
+                    results.append(outcome)
+                    continue
+                error = outcome
+                if permanent_failure(outcome):
+                    dropped += 1
+                    self.dropped.append({'quota': send[0], 'amount': send[1], 'increments': send[2],
+                                         'error': outcome})
+                    continue
+                failed += 1
+                self._retries.append(send)
+                self._count += send[2]
+                if self._oldest is None or oldest < self._oldest:
+                    self._oldest = oldest
+        return results, failed, dropped, error
+
+    def _send(self, name, amount, key):
+        return self.quotas.api_post(endpoint=self.quotas._increment_endpoint(name), data={'increment': amount},
+                                    idempotency_key=key)
+
+    def _sent(self, sends, count, oldest, started, failed, dropped):
+        if self.on_flush:
+            self.on_flush({'quotas': len(sends), 'increments': count, 'lag': started - oldest,
+                           'duration': time.monotonic() - started, 'failed': failed, 'dropped': dropped})
+
+    def flush(self):
+        """
+        Send everything pending now
+        :return: list of updated quotas
+        """
+        with self._flush_lock:
+            sends, count, oldest = self._take()
+            if not count:
+                return []
+            started = time.monotonic()
+            outcomes = []
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                futures = [pool.submit(self._send, name, amount, key) for (name, amount, _, key) in sends]
+                for future in futures:
+                    try:
+                        outcomes.append(future.result())
+                    except Exception as e:
+                        outcomes.append(e)
+            results, failed, dropped, error = self._settle(sends, outcomes, oldest)
+            self._sent(sends, count, oldest, started, failed, dropped)
+            if error is not None:
+                raise error
+            return results
+
+    def _due(self):
+        with self._lock:
+            if not self._count:
+                return False
+            return self._count >= self.max_pending or time.monotonic() - self._oldest >= self.max_delay
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.max_delay / 4)
+            self._wake.clear()
+            if self._closed:
+                break
+            if self._due():
+                try:
+                    self.flush()
+                    self.error = None
+                except Exception as e:
+                    # kept for the caller to inspect, the increments are retried on the next flush
+                    self.error = e
+
+    def close(self):
+        """
+        Stop the background flusher and send whatever is still pending
+        :return: None
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+        atexit.unregister(self.close)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
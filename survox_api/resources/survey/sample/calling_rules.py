@@ -3,8 +3,8 @@ from ...exception import SurvoxAPIRuntime, SurvoxAPINotFound
 
 
 class SurvoxAPISurveySampleCallingRules(SurvoxAPIBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveySampleCallingRules, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveySampleCallingRules, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.url = '/surveys/{sid}/sample/calling-rules/'.format(sid=self.sid)
 
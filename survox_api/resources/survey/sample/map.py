@@ -3,8 +3,8 @@ from ...exception import SurvoxAPIRuntime, SurvoxAPIMissingParameter, SurvoxAPIN
 
 
 class SurvoxAPISurveySampleMap(SurvoxAPIBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveySampleMap, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveySampleMap, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.url = '/surveys/{sid}/sample/map/'.format(sid=self.sid)
 
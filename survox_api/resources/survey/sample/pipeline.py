@@ -0,0 +1,137 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ...exception import SurvoxAPIRuntime, SurvoxAPINotFound
+
+DEFAULT_WORKERS = 4
+# sample configuration kept per survey: (results key, sample attribute, label)
+CONFIGS = (('sample_map_result', 'map', 'Sample map'),
+           ('sample_setup_rules_result', 'setup_rules', 'Sample setup rules'),
+           ('sample_calling_rules_result', 'calling_rules', 'Sample calling rules'))
+
+
+class SurvoxAPISamplePipeline:
+    """
+    Adds sample to surveys with the steps overlapped: the file upload runs while the survey's map, setup rules and
+    calling rules are checked (all three at once) and the missing ones created (all at once), and the import starts
+    as soon as both are done.
+
+    Every request step runs on one pool of workers, so a pipeline shared by many surveys caps the requests they
+    make at the same time.  Each survey is driven from its caller's thread (add) or from a separate pool of
+    coordinators (submit) that only wait, so surveys never hold workers while waiting on their own steps.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_surveys=None):
+        """
+        :param max_workers: max sample steps, across all surveys, run at the same time
+        :param max_surveys: max surveys submit() works on at the same time, 4 per worker by default
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_surveys = max_surveys or self.max_workers * 4
+        self._workers = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._coordinators = None
+
+    def close(self):
+        self._workers.shutdown()
+        if self._coordinators is not None:
+            self._coordinators.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _timed(timings, stage, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+    def _configure(self, sample, configs, exists_okay, timings):
+        # check all three at once, then create the missing ones at once
+        started = time.perf_counter()
+        resources = [getattr(sample, attr) for _, attr, _ in CONFIGS]
+        checks = [self._workers.submit(self._existing, r) for r in resources]
+        existing = [c.result() for c in checks]
+        timings['check'] = time.perf_counter() - started
+        if not exists_okay:
+            for (_, _, label), current in zip(CONFIGS, existing):
+                if current:
+                    raise SurvoxAPIRuntime('{label} already exist for survey: {sid}'.format(label=label,
+                                                                                            sid=sample.sid))
+        started = time.perf_counter()
+        creates = [None if current else self._workers.submit(r.api_post, endpoint=r.url, json=config)
+                   for r, config, current in zip(resources, configs, existing)]
+        results = {}
+        for (key, _, _), current, create in zip(CONFIGS, existing, creates):
+            results[key] = current if create is None else create.result()
+        timings['create'] = time.perf_counter() - started
+        return results
+
+    @staticmethod
+    def _existing(resource):
+        try:
+            return resource.get()
+        except SurvoxAPINotFound:
+            return None
+
+    def add(self, sample, filename, sample_map, setup_rules, calling_rules, exists_okay=False, block_size=100000):
+        """
+        Add sample to a survey, see SurvoxAPISurveySample.add()
+        :param sample: SurvoxAPISurveySample of the survey
+        :param filename: sample csv file
+        :param sample_map: sample map
+        :param setup_rules: sample setup rules
+        :param calling_rules: sample calling rules
+        :param exists_okay: keep the survey's map and rules if it already has them
+        :param block_size: block size of the upload
+        :return: results of each step, with 'timings': seconds per stage (upload, check, create, import, total)
+        """
+        configs = (sample_map, setup_rules, calling_rules)
+        for (_, _, label), config in zip(CONFIGS, configs):
+            if not config:
+                raise SurvoxAPIRuntime('missing required parameter: {p}'.format(p=label.lower()))
+        started = time.perf_counter()
+        timings = {}
+        if sample.verbose:
+            print('uploading sample file: {file}, sample map and rules'.format(file=filename))
+        upload = self._workers.submit(self._timed, timings, 'upload', sample.upload, filename=filename,
+                                      block_size=block_size)
+        try:
+            results = self._configure(sample, configs, exists_okay, timings)
+        except Exception:
+            # don't leave the upload running behind a failed configuration
+            wait([upload])
+            raise
+        results['sample_upload_result'] = upload.result()
+        if sample.verbose:
+            print('generating sample from file: {x}'.format(x=filename))
+        results['sample_import_result'] = self._workers.submit(self._timed, timings, 'import', sample.import_csv,
+                                                               filename).result()
+        timings['total'] = time.perf_counter() - started
+        results['timings'] = timings
+        return results
+
+    def submit(self, sample, filename, sample_map, setup_rules, calling_rules, exists_okay=False,
+               block_size=100000):
+        """
+        Start adding sample to a survey and return straight away, to work on many surveys at once
+        :return: Future of the add() results
+        """
+        if self._coordinators is None:
+            self._coordinators = ThreadPoolExecutor(max_workers=self.max_surveys)
+        return self._coordinators.submit(self.add, sample, filename, sample_map, setup_rules, calling_rules,
+                                         exists_okay, block_size)
+
+    def add_many(self, jobs):
+        """
+        Add sample to many surveys, sharing the workers
+        :param jobs: list of dictionaries of add() arguments: sample, filename, sample_map, setup_rules,
+                     calling_rules and optionally exists_okay, block_size
+        :return: list of add() results or the exception it raised, in the order of the jobs
+        """
+        futures = [self.submit(**job) for job in jobs]
+        return [f.exception() or f.result() for f in futures]
@@ -0,0 +1,130 @@
+import csv
+import os
+from itertools import islice
+
+from ...exception import SurvoxAPIRuntime
+from ...library.dnc_index import phone_digits
+
+DEFAULT_BATCH_SIZE = 10000
+MAX_ERRORS = 100
+# digits a valid number has, by setup rules calling_area; areas not listed only need some digits
+PHONE_DIGITS = {'us_canada': 10}
+
+
+class SurvoxAPISamplePreflight:
+    """
+    Checks a sample csv file against a sample map and setup rules before it's uploaded, the way import_csv would,
+    and writes a clean copy to upload instead.
+
+    The file is streamed in batches and each batch is checked a column at a time: phone numbers are reduced to
+    their digits, values longer than their map item's width are truncated (fix=True) or rejected, and unless the
+    setup rules allow duplicate phone numbers only the first record of each number is kept.
+    """
+
+    def __init__(self, sample_map, setup_rules=None, fix=False, batch_size=None, max_errors=MAX_ERRORS):
+        """
+        :param sample_map: sample map, as given to sample.map.create()
+        :param setup_rules: sample setup rules, as given to sample.setup_rules.create()
+        :param fix: truncate values that are too wide, rather than reject their records
+        :param batch_size: records checked at a time
+        :param max_errors: rejected records described in the report, at most
+        """
+        if not sample_map or not sample_map.get('items'):
+            raise SurvoxAPIRuntime('Sample map has no items')
+        setup_rules = setup_rules or {}
+        self.items = sample_map['items']
+        self.fix = fix
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.max_errors = max_errors
+        self.allow_duplicates = bool(setup_rules.get('allow_duplicate_phonenumbers', False))
+        self.phone_length = PHONE_DIGITS.get(setup_rules.get('calling_area'))
+
+    def _columns(self, header, filename):
+        # (position, input name, width, is the phone number) of every mapped column
+        columns = []
+        for item in self.items:
+            if item['input'] not in header:
+                raise SurvoxAPIRuntime('Sample map input "{i}" is not a column of {f}'.format(i=item['input'],
+                                                                                              f=filename))
+            columns.append((header.index(item['input']), item['input'], item.get('width'),
+                            item.get('survox') == 'phonenumber'))
+        return columns
+
+    def _valid_phone(self, digits):
+        if self.phone_length:
+            return len(digits) == self.phone_length
+        return bool(digits)
+
+    def run(self, filename, output, rejects=None):
+        """
+        :param filename: sample csv file with a header line
+        :param output: csv file to write the clean records in
+        :param rejects: csv file to write the rejected records in, with the reason as an extra last column
+        :return: {'records', 'written', 'rejected', 'malformed', 'invalid_phones', 'duplicates', 'truncated',
+                  'overflows': {column: values too wide}, 'errors': [(record number, reason)]}
+        """
+        report = {'records': 0, 'written': 0, 'rejected': 0, 'malformed': 0, 'invalid_phones': 0, 'duplicates': 0,
+                  'truncated': 0, 'overflows': {}, 'errors': []}
+        seen = set()
+        with open(filename, newline='') as src, open(output, 'w', newline='') as dst:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if header is None:
+                raise SurvoxAPIRuntime('Sample file is empty: {f}'.format(f=filename))
+            columns = self._columns(header, filename)
+            phones = None
+            if not self.allow_duplicates:
+                phones = next((position for position, _, _, phone in columns if phone), None)
+            report['overflows'] = {name: 0 for _, name, _, _ in columns}
+            writer = csv.writer(dst)
+            writer.writerow(header)
+            with open(rejects or os.devnull, 'w', newline='') as bad:
+                reject = csv.writer(bad)
+                if rejects:
+                    reject.writerow(header + ['reason'])
+                while True:
+                    batch = list(islice(reader, self.batch_size))
+                    if not batch:
+                        break
+                    reasons = [None] * len(batch)
+                    for n, record in enumerate(batch):
+                        if len(record) != len(header):
+                            reasons[n] = 'expected {e} fields, found {f}'.format(e=len(header), f=len(record))
+                            report['malformed'] += 1
+                    good = [n for n, r in enumerate(reasons) if r is None]
+                    for position, name, width, phone in columns:
+                        values = [batch[n][position] for n in good]
+                        if phone:
+                            values = list(map(phone_digits, values))
+                            for n, value in zip(good, values):
+                                batch[n][position] = value
+                            for n in [n for n, v in zip(good, values) if not self._valid_phone(v)]:
+                                reasons[n] = reasons[n] or 'invalid phone number'
+                                report['invalid_phones'] += 1
+                        if width:
+                            for n in [n for n, v in zip(good, values) if len(v) > width]:
+                                report['overflows'][name] += 1
+                                if self.fix:
+                                    batch[n][position] = batch[n][position][:width]
+                                    report['truncated'] += 1
+                                else:
+                                    reasons[n] = reasons[n] or '{c} is wider than {w}'.format(c=name, w=width)
+                    if phones is not None:
+                        for n in good:
+                            if reasons[n] is None:
+                                if batch[n][phones] in seen:
+                                    reasons[n] = 'duplicate phone number'
+                                    report['duplicates'] += 1
+                                else:
+                                    seen.add(batch[n][phones])
+                    for n, (record, reason) in enumerate(zip(batch, reasons)):
+                        if reason is None:
+                            writer.writerow(record)
+                            continue
+                        report['rejected'] += 1
+                        reject.writerow(record + [reason])
+                        if len(report['errors']) < self.max_errors:
+                            report['errors'].append((report['records'] + n + 1, reason))
+                    report['records'] += len(batch)
+        report['written'] = report['records'] - report['rejected']
+        return report
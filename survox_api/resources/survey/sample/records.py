@@ -0,0 +1,118 @@
+import csv
+import math
+from array import array
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 10000
+# sample field types, as sample.fields() reports them, stored in typed arrays; any other field is kept as str
+INTEGER_TYPES = ('int', 'integer', 'long', 'number', 'numeric', 'bool', 'boolean')
+FLOAT_TYPES = ('float', 'double', 'decimal', 'real')
+
+
+def column_types(fields):
+    """
+    :param fields: sample.fields() result, list of {'name', 'type'}
+    :return: {field name: array typecode, 'q' or 'd', or None for str}
+    """
+    types = {}
+    for field in fields or []:
+        kind = str(field.get('type', '')).lower()
+        types[field['name']] = 'q' if kind in INTEGER_TYPES else 'd' if kind in FLOAT_TYPES else None
+    return types
+
+
+class SurvoxAPIRecordBatch:
+    """
+    A batch of sample records, a column at a time: array('q') for integer fields, array('d') for float fields and
+    a list of str for everything else.  Blank or unreadable numbers are stored as 0 (NaN for floats) and their
+    row numbers listed in missing[field].
+    """
+    __slots__ = ('fields', 'columns', 'missing', 'length')
+
+    def __init__(self, fields, columns, missing, length):
+        self.fields = fields
+        self.columns = columns
+        self.missing = missing
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def rows(self):
+        """
+        :return: iterator of the records as dictionaries, with None for missing numbers
+        """
+        names = self.fields
+        missing = {f: set(rows) for f, rows in self.missing.items() if rows}
+        for n, values in enumerate(zip(*(self.columns[f] for f in names))):
+            row = dict(zip(names, values))
+            for f, gone in missing.items():
+                if n in gone:
+                    row[f] = None
+            yield row
+
+
+def _numbers(values, typecode):
+    convert = int if typecode == 'q' else float
+    blank = 0 if typecode == 'q' else math.nan
+    try:
+        return array(typecode, map(convert, values)), []
+    except (ValueError, OverflowError):
+        pass
+    column = array(typecode)
+    missing = []
+    for n, value in enumerate(values):
+        try:
+            column.append(convert(value))
+        except (ValueError, OverflowError):
+            column.append(blank)
+            missing.append(n)
+    return column, missing
+
+
+def make_batch(header, records, types=None):
+    """
+    :param header: field names
+    :param records: list of csv records, each a list of str
+    :param types: {field name: typecode} from column_types(), fields not in it are kept as str
+    :return: SurvoxAPIRecordBatch
+    """
+    types = types or {}
+    width = len(header)
+    # pad or cut ragged records, so every column has a value per row
+    rows = [r if len(r) == width else (r + [''] * width)[:width] for r in records if r]
+    columns = {}
+    missing = {}
+    for name, values in zip(header, zip(*rows) if rows else [()] * width):
+        typecode = types.get(name)
+        if typecode:
+            columns[name], missing[name] = _numbers(values, typecode)
+        else:
+            columns[name] = list(values)
+    return SurvoxAPIRecordBatch(header, columns, missing, len(rows))
+
+
+def iter_batches(lines, types=None, batch_size=None):
+    """
+    Decode csv lines into column batches
+    :param lines: iterable of csv lines, the first one the header
+    :param types: {field name: typecode} from column_types(), fields not in it are kept as str
+    :param batch_size: records per batch
+    :return: iterator of SurvoxAPIRecordBatch
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    while True:
+        records = list(islice(reader, batch_size))
+        if not records:
+            return
+        yield make_batch(header, records, types)
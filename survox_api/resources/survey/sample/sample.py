@@ -1,15 +1,20 @@
 import ntpath
+import os
+import tempfile
 
 from ...base import SurvoxAPIBase
 from .map import SurvoxAPISurveySampleMap
 from .setup_rules import SurvoxAPISurveySampleSetupRules
 from .calling_rules import SurvoxAPISurveySampleCallingRules
 from .selection import SurvoxAPISurveySampleSelection
+from .preflight import SurvoxAPISamplePreflight
+from .pipeline import SurvoxAPISamplePipeline
+from .timezones import SurvoxAPITimezoneSlots
 
 
 class SurvoxAPISurveySample(SurvoxAPIBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveySample, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveySample, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.endpoint = '/surveys/{sid}/sample/'.format(sid=self.sid)
         self.upload_endpoint = '{base}upload/'.format(base=self.endpoint)
@@ -25,8 +30,9 @@ class SurvoxAPISurveySample(SurvoxAPIBase):
     def delete(self):
         return self.api_delete(endpoint=self.endpoint)
 
-    def upload(self, filename, block_size=100000):
-        return self.api_upload(endpoint=self.upload_endpoint, filename=filename, block_size=block_size)
+    def upload(self, filename, block_size=100000, max_in_flight=None, resume=True):
+        return self.api_upload(endpoint=self.upload_endpoint, filename=filename, block_size=block_size,
+                               max_in_flight=max_in_flight, resume=resume)
 
     def import_csv(self, filename):
         return self.api_post(endpoint=self.import_endpoint, data={'samplefile': ntpath.basename(filename)})
@@ -47,43 +53,89 @@ class SurvoxAPISurveySample(SurvoxAPIBase):
     @property
     def map(self):
         return SurvoxAPISurveySampleMap(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                        verbose=self.verbose)
+                                        verbose=self.verbose, session=self.session)
 
     @property
     def setup_rules(self):
         return SurvoxAPISurveySampleSetupRules(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                               verbose=self.verbose)
+                                               verbose=self.verbose, session=self.session)
 
     @property
     def calling_rules(self):
         return SurvoxAPISurveySampleCallingRules(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                                 verbose=self.verbose)
+                                                 verbose=self.verbose, session=self.session)
 
     @property
     def selection(self):
         return SurvoxAPISurveySampleSelection(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
-                                              verbose=self.verbose)
-
-    def add(self, filename, sample_map, setup_rules, calling_rules, exists_okay=False, block_size=100000):
-        if self.verbose:
-            print('uploading sample file: {file}'.format(file=filename))
-        upload_results = self.upload(filename=filename, block_size=block_size)
-        if self.verbose:
-            print('uploading sample map: {x}'.format(x=sample_map))
-        map_results = self.map.create(sample_map, exists_okay=exists_okay)
-        if self.verbose:
-            print('uploading sample setup: {x}'.format(x=setup_rules))
-        setup_results = self.setup_rules.create(setup_rules, exists_okay=exists_okay)
-        if self.verbose:
-            print('uploading sample calling rules: {x}'.format(x=calling_rules))
-        calling_results = self.calling_rules.create(calling_rules, exists_okay=exists_okay)
-        if self.verbose:
-            print('generating sample from file: {x}'.format(x=filename))
-        import_results = self.import_csv(filename)
-        return {
-            'sample_upload_result': upload_results,
-            'sample_map_result': map_results,
-            'sample_setup_rules_result': setup_results,
-            'sample_calling_rules_result': calling_results,
-            'sample_import_result': import_results,
-        }
+                                              verbose=self.verbose, session=self.session)
+
+    def preflight(self, filename, output, sample_map=None, setup_rules=None, fix=False, rejects=None,
+                  batch_size=None):
+        """
+        Check a sample file the way import_csv would and write a clean copy of it, before anything is uploaded
+        :param filename: sample csv file
+        :param output: csv file to write the clean records in
+        :param sample_map: sample map to check against, the survey's own if not given
+        :param setup_rules: sample setup rules to check against, the survey's own if not given
+        :param fix: truncate values wider than the sample map allows, rather than reject their records
+        :param rejects: csv file to write the rejected records in, with the reason
+        :param batch_size: records checked at a time
+        :return: report, see SurvoxAPISamplePreflight.run()
+        """
+        if sample_map is None:
+            sample_map = self.map.get()
+        if setup_rules is None:
+            setup_rules = self.setup_rules.get()
+        checker = SurvoxAPISamplePreflight(sample_map, setup_rules, fix=fix, batch_size=batch_size)
+        return checker.run(filename, output, rejects=rejects)
+
+    def timezones(self, setup_rules=None, table=None):
+        """
+        Assign phone numbers to the survey's timezone slots locally, to forecast or sort sample before it's uploaded
+        :param setup_rules: sample setup rules giving the slots, the survey's own if not given
+        :param table: SurvoxAPITimezoneTable, the built-in area code table if not given
+        :return: SurvoxAPITimezoneSlots
+        """
+        if setup_rules is None:
+            setup_rules = self.setup_rules.get()
+        return SurvoxAPITimezoneSlots(setup_rules, table=table)
+
+    def add(self, filename, sample_map, setup_rules, calling_rules, exists_okay=False, block_size=100000,
+            preflight=False, fix=False, pipeline=None):
+        """
+        Upload a sample file with its map and rules, and import it.  The upload runs alongside checking and creating
+        the map and rules, see SurvoxAPISamplePipeline
+        :param filename: sample csv file
+        :param sample_map: sample map
+        :param setup_rules: sample setup rules
+        :param calling_rules: sample calling rules
+        :param exists_okay: keep the survey's map and rules if it already has them
+        :param block_size: block size of the upload
+        :param preflight: check the file first and upload a clean copy, see preflight()
+        :param fix: with preflight, truncate values that are too wide rather than drop their records
+        :param pipeline: SurvoxAPISamplePipeline to run the steps on, to share its workers with other surveys
+        :return: results of each step, and 'timings': seconds each stage took
+        """
+        with tempfile.TemporaryDirectory() as workdir:
+            preflight_results = None
+            if preflight:
+                # same name, so the import finds it under the name it was uploaded with
+                clean = os.path.join(workdir, ntpath.basename(filename))
+                preflight_results = self.preflight(filename, clean, sample_map=sample_map, setup_rules=setup_rules,
+                                                   fix=fix)
+                if self.verbose:
+                    print('sample preflight: {r} records, {w} clean, {x} rejected'.format(
+                        r=preflight_results['records'], w=preflight_results['written'],
+                        x=preflight_results['rejected']))
+                filename = clean
+            results = self._add(filename, sample_map, setup_rules, calling_rules, exists_okay, block_size, pipeline)
+        if preflight:
+            results['sample_preflight_result'] = preflight_results
+        return results
+
+    def _add(self, filename, sample_map, setup_rules, calling_rules, exists_okay, block_size, pipeline):
+        if pipeline is not None:
+            return pipeline.add(self, filename, sample_map, setup_rules, calling_rules, exists_okay, block_size)
+        with SurvoxAPISamplePipeline() as pipeline:
+            return pipeline.add(self, filename, sample_map, setup_rules, calling_rules, exists_okay, block_size)
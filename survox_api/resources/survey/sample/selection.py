@@ -1,22 +1,102 @@
 from ...base import SurvoxAPIBase
+from ...exception import SurvoxAPINotFound
+from .selection_batch import SurvoxAPISelectionBatch
+from .records import column_types, iter_batches
+from .store import SurvoxAPISampleStore
 
 
 class SurvoxAPISurveySampleSelection(SurvoxAPIBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveySampleSelection, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveySampleSelection, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.endpoint = '/surveys/{sid}/sample-selection/'.format(sid=self.sid)
+        # changes to anything under here make the survey's previews stale
+        self.preview_scope = '{base}/surveys/{sid}/sample'.format(base=self.base_url, sid=self.sid)
 
     def _selection_url(self, action):
         return '{base}{action}/'.format(base=self.endpoint, action=action)
 
     def list(self, selection):
-        return self.api_post(endpoint=self._selection_url('list'), json=selection)
+        preview = self.api_post(endpoint=self._selection_url('list'), json=selection)
+        return self.session.previews.set(self.preview_scope, selection, preview)
 
-    def download(self, selection, filename):
-        preview = self.list(selection)
-        download_link = '{base}list/download/?fid={fid}'.format(base=self.endpoint, fid=preview['fid'])
-        return self.api_download(endpoint=download_link, filename=filename)
+    def preview(self, selection, refresh=False):
+        """
+        The list() preview of a selection, reused while nothing changed the survey's sample
+        :param selection: selection dictionary
+        :param refresh: list the selection again even if a preview is cached
+        :return: {'fid', 'count'}
+        """
+        preview = None if refresh else self.session.previews.get(self.preview_scope, selection)
+        return preview or self.list(selection)
+
+    def _download_link(self, preview):
+        return '{base}list/download/?fid={fid}'.format(base=self.endpoint, fid=preview['fid'])
+
+    def download(self, selection, filename, buffer_size=None, resume=True, parallel=None):
+        preview = self.preview(selection)
+        try:
+            return self.api_download(endpoint=self._download_link(preview), filename=filename,
+                                     buffer_size=buffer_size, resume=resume, parallel=parallel)
+        except SurvoxAPINotFound:
+            # the server discarded the file of a cached preview
+            preview = self.preview(selection, refresh=True)
+            return self.api_download(endpoint=self._download_link(preview), filename=filename,
+                                     buffer_size=buffer_size, resume=resume, parallel=parallel)
+
+    @property
+    def sample(self):
+        # imported here, sample.py imports this module
+        from .sample import SurvoxAPISurveySample
+        return SurvoxAPISurveySample(sid=self.sid, base_url=self.base_url, headers=self.auth_headers,
+                                     verbose=self.verbose, session=self.session)
+
+    def _download_lines(self, selection, buffer_size=None):
+        preview = self.preview(selection)
+        try:
+            lines = iter(self.api_iter_lines(self._download_link(preview), buffer_size=buffer_size))
+            first = next(lines, None)
+        except SurvoxAPINotFound:
+            preview = self.preview(selection, refresh=True)
+            lines = iter(self.api_iter_lines(self._download_link(preview), buffer_size=buffer_size))
+            first = next(lines, None)
+        if first is not None:
+            yield first
+            yield from lines
+
+    def iter_records(self, selection, batch_size=None, fields=None, buffer_size=None):
+        """
+        Stream the records of a selection in column batches, decoding them as they arrive instead of saving the
+        file first
+        :param selection: selection dictionary
+        :param batch_size: records per batch
+        :param fields: sample.fields(system=True) result giving the field types, fetched if not given
+        :param buffer_size: bytes read from the socket at a time
+        :return: iterator of SurvoxAPIRecordBatch, with typed arrays for numeric fields
+        """
+        types = column_types(self.sample.fields(system=True) if fields is None else fields)
+        return iter_batches(self._download_lines(selection, buffer_size), types, batch_size)
+
+    def store(self, directory, selection=None, batch_size=None, fields=None):
+        """
+        Download a selection into a local columnar store, to count and select records without the server
+        :param directory: directory to write the store in
+        :param selection: selection dictionary, every record if None
+        :param batch_size: records decoded at a time
+        :param fields: sample.fields(system=True) result giving the field types, fetched if not given
+        :return: SurvoxAPISampleStore
+        """
+        fields = self.sample.fields(system=True) if fields is None else fields
+        return SurvoxAPISampleStore.build(directory, fields, self.iter_records(selection or {}, batch_size=batch_size,
+                                                                               fields=fields))
+
+    def batch(self, batch=None):
+        """
+        Queue selection actions on this survey to run together, see SurvoxAPISelectionBatch
+        :param batch: SurvoxAPISelectionBatch to add them to, shared by many surveys, a new one if None
+        :return: SurvoxAPISelectionQueue, whose hide(), resolve(), ... queue the action, and run() runs the batch
+        """
+        return (batch or SurvoxAPISelectionBatch()).queue(self)
 
     def hide(self, selection, name=None):
         select = {"hide": 'hide'}
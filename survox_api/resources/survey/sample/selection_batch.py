@@ -0,0 +1,172 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+DEFAULT_WORKERS = 8
+# actions that give the same result whatever order a run of them goes out in; every other action changes records
+# the next one may select (or, like hide/unhide with different names, undoes another) and runs alone, in order
+CONCURRENT = frozenset(['list', 'download', 'return_owned'])
+
+
+class SurvoxAPISelectionAction:
+    """
+    One queued selection action and, once the batch ran, its outcome
+    """
+    __slots__ = ('sid', 'action', 'selection', 'args', 'kwargs', 'status', 'result', 'count', 'seconds', 'error')
+
+    def __init__(self, sid, action, selection, args=(), kwargs=None):
+        self.sid = sid
+        self.action = action
+        self.selection = selection
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.status = 'pending'
+        self.result = None
+        self.count = None
+        self.seconds = None
+        self.error = None
+
+    def __repr__(self):
+        return 'SurvoxAPISelectionAction({s!r}, {a!r}, {st})'.format(s=self.sid, a=self.action, st=self.status)
+
+
+class SurvoxAPISelectionQueue:
+    """
+    The actions queued on one survey's sample selection, in order.  Every action method takes the same arguments
+    as the SurvoxAPISurveySampleSelection method of the same name and returns the queue, so calls chain.
+    """
+
+    def __init__(self, batch, resource):
+        self.batch = batch
+        self.resource = resource
+        self.actions = []
+
+    def _queue(self, action, selection, *args, **kwargs):
+        self.actions.append(SurvoxAPISelectionAction(self.resource.sid, action, selection, args, kwargs))
+        return self
+
+    def list(self, selection):
+        return self._queue('list', selection)
+
+    def download(self, selection, filename, **kwargs):
+        return self._queue('download', selection, filename, **kwargs)
+
+    def hide(self, selection, name=None):
+        return self._queue('hide', selection, name)
+
+    def unhide(self, selection, name=None):
+        return self._queue('unhide', selection, name)
+
+    def resolve(self, selection, resolution_code):
+        return self._queue('resolve', selection, resolution_code)
+
+    def gather_special(self, selection, sort_by_timeezone=False):
+        return self._queue('gather_special', selection, sort_by_timeezone)
+
+    def delete(self, selection):
+        return self._queue('delete', selection)
+
+    def remove_attempts(self, selection, attempts=None):
+        return self._queue('remove_attempts', selection, attempts)
+
+    def replicate(self, selection, replicate):
+        return self._queue('replicate', selection, replicate)
+
+    def return_owned(self, selection):
+        return self._queue('return_owned', selection)
+
+    def run(self):
+        return self.batch.run()
+
+    def steps(self):
+        """
+        :return: the actions grouped in the steps they run in: consecutive actions of the same kind that may run at
+                 the same time share a step, and a step starts once the previous one is over
+        """
+        steps = []
+        for action in self.actions:
+            if steps and action.action in CONCURRENT and steps[-1][0].action == action.action:
+                steps[-1].append(action)
+            else:
+                steps.append([action])
+        return steps
+
+
+class SurvoxAPISelectionBatch:
+    """
+    Runs queued sample selection actions, for any number of surveys, on a shared pool of workers.
+
+    The surveys are independent and run side by side.  Within a survey the queue order is kept wherever it
+    matters: actions that change which records later actions select (resolve, delete, replicate, ...) run one at a
+    time in order, and only runs of the same order-independent action (list, download, return_owned) go out at
+    once; lists and downloads see every change queued before them.  A download reuses the fid of a list() of the
+    same selection made since the sample last changed.  If an action fails, the rest of its survey's queue is
+    skipped.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_surveys=None):
+        """
+        :param max_workers: max selection requests, across all surveys, sent at the same time
+        :param max_surveys: max surveys worked on at the same time, 4 per worker by default
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_surveys = max_surveys or self.max_workers * 4
+        self.queues = []
+
+    def queue(self, resource):
+        """
+        :param resource: SurvoxAPISurveySampleSelection of a survey
+        :return: SurvoxAPISelectionQueue for that survey, the same one each time it's asked for
+        """
+        for q in self.queues:
+            if q.resource.sid == resource.sid and q.resource.base_url == resource.base_url:
+                return q
+        q = SurvoxAPISelectionQueue(self, resource)
+        self.queues.append(q)
+        return q
+
+    @staticmethod
+    def _call(resource, action):
+        started = time.perf_counter()
+        try:
+            action.result = getattr(resource, action.action)(action.selection, *action.args, **action.kwargs)
+            if isinstance(action.result, dict) and 'count' in action.result:
+                action.count = action.result['count']
+            action.status = 'done'
+        except Exception as e:
+            action.error = e
+            action.status = 'failed'
+        finally:
+            action.seconds = time.perf_counter() - started
+
+    def _run_queue(self, workers, q):
+        for step in q.steps():
+            wait([workers.submit(self._call, q.resource, action) for action in step])
+            if any(a.status == 'failed' for a in step):
+                break
+        for action in q.actions:
+            if action.status == 'pending':
+                action.status = 'skipped'
+
+    def run(self):
+        """
+        Run every queued action that hasn't run yet
+        :return: {'actions': list of SurvoxAPISelectionAction in queue order, 'counts': {action: records selected},
+                  'done', 'failed', 'skipped': numbers of actions, 'seconds': for the whole batch}
+        """
+        started = time.perf_counter()
+        pending = []
+        for q in self.queues:
+            q.actions = [a for a in q.actions if a.status == 'pending']
+            if q.actions:
+                pending.append(q)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as workers, \
+                ThreadPoolExecutor(max_workers=self.max_surveys) as surveys:
+            wait([surveys.submit(self._run_queue, workers, q) for q in pending])
+        actions = [a for q in pending for a in q.actions]
+        report = {'actions': actions, 'counts': {}, 'done': 0, 'failed': 0, 'skipped': 0,
+                  'seconds': time.perf_counter() - started}
+        for action in actions:
+            report[action.status] += 1
+            if action.count is not None:
+                report['counts'][action.action] = report['counts'].get(action.action, 0) + action.count
+        return report
@@ -3,8 +3,8 @@ from ...exception import SurvoxAPIRuntime, SurvoxAPINotFound
 
 
 class SurvoxAPISurveySampleSetupRules(SurvoxAPIBase):
-    def __init__(self, sid=None, base_url=None, headers=None, verbose=True):
-        super(SurvoxAPISurveySampleSetupRules, self).__init__(base_url, headers, verbose)
+    def __init__(self, sid=None, base_url=None, headers=None, verbose=True, session=None):
+        super(SurvoxAPISurveySampleSetupRules, self).__init__(base_url, headers, verbose, session)
         self.sid = sid
         self.url = '/surveys/{sid}/sample/setup-rules/'.format(sid=self.sid)
 
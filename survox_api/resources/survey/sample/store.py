@@ -0,0 +1,317 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections import Counter
+from itertools import compress
+
+from ...exception import SurvoxAPIRuntime
+from .records import column_types
+
+STORE_VERSION = 1
+META_FILE = 'meta.json'
+# string columns with at most this many distinct values keep one byte codes, which bytes.translate() can match
+BYTE_CODES = 256
+
+
+class SurvoxAPISampleStore:
+    """
+    Local, column by column copy of a survey's sample for answering questions about it (how many records of each
+    special_type, how many a selection would hit) without asking the server's selection endpoints.
+
+    Each field is a file in the store's directory holding a typed array, mapped back with mmap when the store is
+    opened: integers as 'q', floats as 'd', and strings dictionary encoded, as one byte codes when the field has
+    up to 256 distinct values and four byte codes otherwise, with the distinct values in meta.json.
+
+    Selections use the same dictionary shape as selection.list(): {field: value} picks the records whose field
+    equals value, a list of values matches any of them, and all the fields have to match.  A selection is
+    evaluated into a mask (bytes, 1 for each record it picks) a column at a time.
+    """
+
+    def __init__(self, directory, meta, columns, missing, sources=()):
+        self.directory = directory
+        self.meta = meta
+        self.rows = meta['rows']
+        self.fields = [f['name'] for f in meta['fields']]
+        self._info = {f['name']: f for f in meta['fields']}
+        self._columns = columns
+        self._missing = missing
+        self._sources = list(sources)
+        self._lookup = {}
+
+    def __len__(self):
+        return self.rows
+
+    @classmethod
+    def build(cls, directory, fields, batches):
+        """
+        Write a store from column batches
+        :param directory: directory to write the store in, created if needed
+        :param fields: sample.fields() result, giving the field types
+        :param batches: iterable of SurvoxAPIRecordBatch, e.g. from selection.iter_records()
+        :return: SurvoxAPISampleStore, opened from disk
+        """
+        writer = SurvoxAPISampleStoreWriter(directory, fields)
+        try:
+            for batch in batches:
+                writer.add(batch)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.finish()
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Open a store written by build(), mapping its columns into memory without reading them
+        :param directory: store directory
+        :return: SurvoxAPISampleStore
+        """
+        try:
+            with open(os.path.join(directory, META_FILE)) as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            raise SurvoxAPIRuntime('Not a sample store: {d}'.format(d=directory))
+        if meta.get('version') != STORE_VERSION:
+            raise SurvoxAPIRuntime('Unsupported sample store version: {d}'.format(d=directory))
+        if meta['byteorder'] != sys.byteorder:
+            raise SurvoxAPIRuntime('Sample store was written on a machine with another byte order: {d}'.format(
+                d=directory))
+        columns = {}
+        missing = {}
+        sources = []
+        for info in meta['fields']:
+            columns[info['name']], source = cls._map(os.path.join(directory, info['file']), info['typecode'])
+            sources.append(source)
+            if info.get('missing'):
+                with open(os.path.join(directory, info['missing']), 'rb') as fh:
+                    missing[info['name']] = array('Q', fh.read())
+        return cls(directory, meta, columns, missing, sources)
+
+    @staticmethod
+    def _map(filename, typecode):
+        with open(filename, 'rb') as fh:
+            if not os.fstat(fh.fileno()).st_size:
+                return array(typecode), None
+            source = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(source).cast(typecode), source
+
+    def close(self):
+        for name in list(self._columns):
+            if isinstance(self._columns[name], memoryview):
+                self._columns[name].release()
+        self._columns = {}
+        for source in self._sources:
+            if source is not None:
+                source.close()
+        self._sources = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _field(self, name):
+        if name not in self._info:
+            raise SurvoxAPIRuntime('No field "{f}" in sample store {d}'.format(f=name, d=self.directory))
+        return self._info[name]
+
+    def column(self, name):
+        """
+        :param name: field name
+        :return: the field's values, decoded, as a list
+        """
+        info = self._field(name)
+        if 'dictionary' in info:
+            return [info['dictionary'][c] for c in self._columns[name]]
+        return self._columns[name].tolist()
+
+    def _codes(self, name, values):
+        info = self._info[name]
+        if name not in self._lookup:
+            self._lookup[name] = {v: n for n, v in enumerate(info['dictionary'])}
+        lookup = self._lookup[name]
+        return {lookup[str(v)] for v in values if str(v) in lookup}
+
+    def _match(self, name, value):
+        info = self._field(name)
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        column = self._columns[name]
+        if 'dictionary' in info:
+            wanted = self._codes(name, values)
+            if info['typecode'] == 'B':
+                table = bytearray(256)
+                for code in wanted:
+                    table[code] = 1
+                return bytes(column).translate(table)
+            return bytes(map(wanted.__contains__, column))
+        convert = int if info['typecode'] == 'q' else float
+        wanted = set()
+        for v in values:
+            try:
+                wanted.add(convert(v))
+            except (TypeError, ValueError):
+                pass
+        mask = bytearray(map(wanted.__contains__, column))
+        for row in self._missing.get(name, ()):
+            mask[row] = 0
+        return bytes(mask)
+
+    def mask(self, selection=None):
+        """
+        :param selection: selection dictionary, as given to selection.list(), None or {} for every record
+        :return: bytes, 1 for each record the selection picks and 0 for the others
+        """
+        if not selection:
+            return b'\x01' * self.rows
+        bits = None
+        for name, value in selection.items():
+            mask = int.from_bytes(self._match(name, value), 'little')
+            bits = mask if bits is None else bits & mask
+        return bits.to_bytes(self.rows, 'little')
+
+    def count(self, selection=None):
+        """
+        :param selection: selection dictionary
+        :return: number of records the selection picks, what selection.list() would report
+        """
+        if not selection:
+            return self.rows
+        return self.mask(selection).count(1)
+
+    def select(self, selection=None):
+        """
+        :param selection: selection dictionary
+        :return: row numbers of the records the selection picks
+        """
+        return list(compress(range(self.rows), self.mask(selection)))
+
+    def records(self, selection=None, fields=None):
+        """
+        :param selection: selection dictionary
+        :param fields: fields to include, all of them by default
+        :return: iterator of the picked records as dictionaries
+        """
+        fields = fields or self.fields
+        mask = self.mask(selection)
+        columns = []
+        for name in fields:
+            info = self._field(name)
+            if 'dictionary' in info:
+                columns.append(map(info['dictionary'].__getitem__, compress(self._columns[name], mask)))
+            elif name in self._missing:
+                gone = set(self._missing[name])
+                columns.append(None if r in gone else v for r, v in compress(enumerate(self._columns[name]), mask))
+            else:
+                columns.append(compress(self._columns[name], mask))
+        for values in zip(*columns):
+            yield dict(zip(fields, values))
+
+    def counts(self, name, selection=None):
+        """
+        :param name: field to count the values of, e.g. special_type
+        :param selection: selection dictionary, to count only the records it picks
+        :return: {value: number of records}, numbers missing from the sample aren't counted
+        """
+        info = self._field(name)
+        column = self._columns[name]
+        if 'dictionary' in info:
+            dictionary = info['dictionary']
+            if info['typecode'] == 'B':
+                codes = bytes(compress(column, self.mask(selection))) if selection else bytes(column)
+                return {dictionary[c]: n for c in range(len(dictionary)) for n in [codes.count(c)] if n}
+            picked = compress(column, self.mask(selection)) if selection else column
+            return {dictionary[c]: n for c, n in Counter(picked).items()}
+        if not selection and name not in self._missing:
+            return dict(Counter(column))
+        mask = bytearray(self.mask(selection))
+        for row in self._missing.get(name, ()):
+            mask[row] = 0
+        return dict(Counter(compress(column, mask)))
+
+
+class SurvoxAPISampleStoreWriter:
+    """
+    Writes a SurvoxAPISampleStore a batch at a time, for callers that get their batches from an async iterator
+    """
+
+    def __init__(self, directory, fields):
+        """
+        :param directory: directory to write the store in, created if needed
+        :param fields: sample.fields() result, giving the field types
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.types = column_types(fields)
+        self.names = None
+        self.rows = 0
+        self._handles = []
+        self._codes = []
+        self._missing = []
+
+    def add(self, batch):
+        """
+        :param batch: SurvoxAPIRecordBatch
+        :return: None
+        """
+        if self.names is None:
+            self.names = list(batch.fields)
+            for n, name in enumerate(self.names):
+                self._handles.append(open(os.path.join(self.directory, '{n}.col'.format(n=n)), 'wb'))
+                self._missing.append(array('Q'))
+                self._codes.append(None if self.types.get(name) else {})
+        for n, name in enumerate(self.names):
+            column = batch[name]
+            if self._codes[n] is None:
+                column.tofile(self._handles[n])
+                self._missing[n].extend(self.rows + r for r in batch.missing.get(name, ()))
+            else:
+                dictionary = self._codes[n]
+                array('I', [dictionary.setdefault(v, len(dictionary)) for v in column]).tofile(self._handles[n])
+        self.rows += len(batch)
+
+    def abort(self):
+        for handle in self._handles:
+            handle.close()
+
+    def finish(self):
+        """
+        Write the store's meta data once every batch was added
+        :return: SurvoxAPISampleStore, opened from disk
+        """
+        self.abort()
+        meta = {'version': STORE_VERSION, 'byteorder': sys.byteorder, 'rows': self.rows, 'fields': []}
+        for n, name in enumerate(self.names or []):
+            info = {'name': name, 'file': '{n}.col'.format(n=n)}
+            if self._codes[n] is None:
+                info['typecode'] = self.types[name]
+                if self._missing[n]:
+                    info['missing'] = '{n}.missing'.format(n=n)
+                    with open(os.path.join(self.directory, info['missing']), 'wb') as fh:
+                        self._missing[n].tofile(fh)
+            else:
+                info['dictionary'] = list(self._codes[n])
+                info['typecode'] = 'I'
+                if len(self._codes[n]) <= BYTE_CODES:
+                    self._narrow(os.path.join(self.directory, info['file']))
+                    info['typecode'] = 'B'
+            meta['fields'].append(info)
+        temp = os.path.join(self.directory, META_FILE + '.tmp')
+        with open(temp, 'w') as fh:
+            json.dump(meta, fh)
+        os.replace(temp, os.path.join(self.directory, META_FILE))
+        return SurvoxAPISampleStore.load(self.directory)
+
+    @staticmethod
+    def _narrow(filename):
+        # rewrite four byte codes as one byte codes, a block at a time
+        temp = filename + '.tmp'
+        with open(filename, 'rb') as src, open(temp, 'wb') as dst:
+            while True:
+                block = src.read(4 * 1024 * 1024)
+                if not block:
+                    break
+                array('B', memoryview(block).cast('I')).tofile(dst)
+        os.replace(temp, filename)
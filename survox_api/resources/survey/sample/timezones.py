@@ -0,0 +1,292 @@
+import csv
+import os
+import re
+import tempfile
+from array import array
+from bisect import bisect_right
+from functools import partial
+
+from ...exception import SurvoxAPIRuntime
+from ...library.dnc_index import phone_digits
+
+DEFAULT_BATCH_SIZE = 10000
+CALLING_AREAS = ('us_canada',)
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+# offset of the NPA-NXX ranges no timezone is known for
+UNKNOWN = -32768
+# standard time UTC offsets, in minutes, of the US and Canadian area codes; an area code split between two zones
+# is listed under the one most of its numbers are in, load an NPA-NXX table with from_csv() to tell them apart
+AREA_CODES = {
+    -300: '201 202 203 207 212 215 216 220 223 226 227 229 231 234 239 240 248 249 252 260 263 267 269 272 276 283 '
+          '289 301 302 304 305 313 315 317 321 324 326 329 330 332 336 339 343 347 351 352 354 363 365 367 380 382 '
+          '386 401 404 407 410 412 413 416 418 419 423 434 436 437 438 440 443 445 448 450 463 468 470 472 475 478 '
+          '484 502 508 513 514 516 517 518 519 540 548 551 561 567 570 571 574 579 581 582 585 586 603 606 607 609 '
+          '610 613 614 616 617 624 631 640 645 646 647 656 667 678 679 680 681 683 689 703 704 705 706 716 717 718 '
+          '724 727 728 732 734 740 742 743 753 754 757 762 765 770 771 772 774 781 786 802 803 804 807 810 812 813 '
+          '814 819 826 828 835 838 839 843 845 848 850 854 856 857 858 859 860 862 863 864 865 873 878 904 905 906 '
+          '908 910 912 914 917 919 929 930 934 937 941 943 947 948 954 959 973 978 980 984 989',
+    -360: '204 205 210 214 217 218 219 224 225 228 235 251 254 256 262 270 274 281 306 308 309 312 314 316 318 319 '
+          '320 325 327 331 334 337 346 353 361 364 402 405 409 414 417 430 431 432 447 464 469 474 479 501 504 507 '
+          '512 515 531 534 539 557 563 572 573 580 584 601 605 608 612 615 618 620 629 630 636 639 641 651 659 660 '
+          '662 682 701 708 712 713 715 726 730 731 737 763 769 773 779 785 806 815 816 817 830 832 847 861 870 872 '
+          '901 903 913 918 920 931 936 938 940 945 952 956 972 979 985',
+    -420: '208 303 307 368 385 403 406 435 480 505 520 575 587 602 623 719 720 780 801 825 867 915 928 970 983 986',
+    -480: '206 209 213 236 250 253 257 279 310 323 341 350 360 369 408 415 424 425 442 458 503 509 510 530 541 559 '
+          '562 564 604 619 626 628 650 657 661 669 672 702 707 714 725 747 760 775 778 805 818 820 831 840 909 916 '
+          '925 949 951 971',
+    -540: '907',
+    -600: '808',
+    -240: '340 428 506 782 787 902 939',
+    -210: '709',
+    600: '670 671',
+    -660: '684',
+}
+
+
+def parse_offset(value):
+    """
+    :param value: setup rules timezone, e.g. GMT-05:00
+    :return: UTC offset in minutes, or None if the value is empty or not an offset
+    """
+    m = re.match(r'^\s*(?:GMT|UTC)?\s*([+-])(\d{1,2}):?(\d{2})?\s*$', value or '')
+    if not m:
+        return None
+    minutes = int(m.group(2)) * 60 + int(m.group(3) or 0)
+    return -minutes if m.group(1) == '-' else minutes
+
+
+def format_offset(minutes):
+    return 'GMT{s}{h:02d}:{m:02d}'.format(s='-' if minutes < 0 else '+', h=abs(minutes) // 60, m=abs(minutes) % 60)
+
+
+class SurvoxAPITimezoneTable:
+    """
+    UTC offsets of North American phone numbers by NPA-NXX (area code and exchange), kept as two sorted arrays:
+    the first NPA-NXX of each run of numbers with the same offset, and that offset.  Looking a number up is one
+    bisect of its first six digits, and lookups are mapped over whole columns at a time.
+    """
+
+    def __init__(self, starts, offsets):
+        """
+        :param starts: sorted array('L') of the first NPA-NXX of each run
+        :param offsets: array('h') of each run's offset in minutes, UNKNOWN if there's none
+        """
+        self.starts = starts
+        self.offsets = offsets
+        self._find = partial(bisect_right, starts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def build(cls, npas, exchanges=None):
+        """
+        :param npas: {area code: offset in minutes}
+        :param exchanges: {NPA-NXX as a six digit int: offset in minutes}, overriding their area code's offset
+        :return: SurvoxAPITimezoneTable
+        """
+        points = {}
+        for npa, offset in npas.items():
+            points[npa * 1000] = offset
+            points.setdefault((npa + 1) * 1000, UNKNOWN)
+        exchanges = exchanges or {}
+        for key, offset in exchanges.items():
+            points[key] = offset
+            if key + 1 not in exchanges:
+                after = key + 1
+                if after % 1000:
+                    points[after] = npas.get(key // 1000, UNKNOWN)
+                else:
+                    points.setdefault(after, npas.get(after // 1000, UNKNOWN))
+        starts = array('L', [0])
+        offsets = array('h', [UNKNOWN])
+        for key in sorted(points):
+            if points[key] == offsets[-1]:
+                continue
+            if key == starts[-1]:
+                offsets[-1] = points[key]
+            else:
+                starts.append(key)
+                offsets.append(points[key])
+        return cls(starts, offsets)
+
+    @classmethod
+    def default(cls):
+        """
+        :return: table of the area codes in AREA_CODES, by area code only
+        """
+        return cls.build({int(npa): offset for offset, npas in AREA_CODES.items() for npa in npas.split()})
+
+    @classmethod
+    def from_csv(cls, filename, base=True):
+        """
+        Load an NPA-NXX table, e.g. from a telephone numbering database export
+        :param filename: csv file with a header line and columns npa_nxx (or npa and nxx, or just npa) and offset,
+                         as GMT-05:00 or minutes; a row without a readable offset raises SurvoxAPIRuntime
+        :param base: fall back on the default area code table for the numbers the file doesn't cover
+        :return: SurvoxAPITimezoneTable
+        """
+        npas = {int(npa): offset for offset, codes in AREA_CODES.items() for npa in codes.split()} if base else {}
+        exchanges = {}
+        with open(filename, newline='') as fh:
+            reader = csv.DictReader(fh)
+            for row in reader:
+                offset = (row.get('offset') or '').strip()
+                try:
+                    minutes = int(offset)
+                except ValueError:
+                    minutes = parse_offset(offset)
+                if minutes is None:
+                    raise SurvoxAPIRuntime('Invalid offset "{o}" on line {n} of {f}'.format(
+                        o=offset, n=reader.line_num, f=filename))
+                prefix = phone_digits(row.get('npa_nxx') or (row.get('npa', '') + row.get('nxx', '')))
+                if len(prefix) == 6:
+                    exchanges[int(prefix)] = minutes
+                elif len(prefix) == 3:
+                    npas[int(prefix)] = minutes
+        return cls.build(npas, exchanges)
+
+    def offsets_of(self, phones):
+        """
+        :param phones: iterable of phone numbers, in any format
+        :return: array('h') of their UTC offsets in minutes, UNKNOWN for numbers not in the table
+        """
+        keys = [int(d[:6]) if len(d) == 10 else 0 for d in map(phone_digits, phones)]
+        return array('h', map(self.offsets.__getitem__, [i - 1 for i in map(self._find, keys)]))
+
+
+class SurvoxAPITimezoneSlots:
+    """
+    Assigns phone numbers to the timezone slots of a survey's sample setup rules (timezone1 .. timezoneN of
+    num_timezones), as the import does, so the spread of a sample over calling windows is known before it's
+    uploaded.  Slot 0 holds the numbers whose offset isn't one of the slots.
+    """
+
+    def __init__(self, setup_rules, table=None):
+        """
+        :param setup_rules: sample setup rules, with calling_area, num_timezones and timezoneN
+        :param table: SurvoxAPITimezoneTable, the default area code table if not given
+        """
+        area = setup_rules.get('calling_area')
+        if area not in CALLING_AREAS:
+            raise SurvoxAPIRuntime('Timezone slots only known for calling areas {a}, not "{c}"'.format(
+                a=', '.join(CALLING_AREAS), c=area))
+        self.table = table or SurvoxAPITimezoneTable.default()
+        self.timezones = {}
+        self._slot = {}
+        for n in range(1, int(setup_rules.get('num_timezones') or 0) + 1):
+            offset = parse_offset(setup_rules.get('timezone{n}'.format(n=n)))
+            if offset is not None:
+                self.timezones[n] = format_offset(offset)
+                self._slot.setdefault(offset, n)
+
+    def assign(self, phones):
+        """
+        :param phones: iterable of phone numbers, e.g. a csv column or a record batch's phone column
+        :return: array('B') of the slot of each number, 0 if it has none
+        """
+        slot = self._slot.get
+        return array('B', [slot(o, 0) for o in self.table.offsets_of(phones)])
+
+    def forecast(self, phones, calling_rules=None):
+        """
+        How a sample spreads over the timezone slots
+        :param phones: iterable of phone numbers, or of record batches' phone columns
+        :param calling_rules: sample calling rules, to add each slot's weight and its calling hours in UTC
+        :return: list of {'slot', 'timezone', 'records', 'share'} per slot, with 'weight' and 'windows': {weekday:
+                 (open, shut) in UTC} given calling rules
+        """
+        counts = [0] * 256
+        for column in _columns(phones):
+            for slot, n in enumerate(_histogram(self.assign(column))):
+                counts[slot] += n
+        total = sum(counts)
+        forecast = []
+        for slot in [0] + sorted(self.timezones):
+            if slot == 0 and not counts[0]:
+                continue
+            entry = {'slot': slot, 'timezone': self.timezones.get(slot), 'records': counts[slot],
+                     'share': counts[slot] / float(total) if total else 0.0}
+            if calling_rules and slot:
+                entry['weight'] = calling_rules.get('timezone{n}_weight'.format(n=slot))
+                entry['windows'] = self._windows(calling_rules, parse_offset(self.timezones[slot]))
+            forecast.append(entry)
+        return forecast
+
+    @staticmethod
+    def _windows(calling_rules, offset):
+        windows = {}
+        for day in WEEKDAYS:
+            hours = [calling_rules.get('{w}_{d}'.format(w=w, d=day)) for w in ('open', 'shut')]
+            if all(hours):
+                windows[day] = tuple(_utc(h, offset) for h in hours)
+        return windows
+
+    def sort_csv(self, filename, output, column='phone', slot_column=None, batch_size=None):
+        """
+        Copy a sample csv file with its records grouped by timezone slot, in slot order and otherwise in the order
+        they were in, as gather_special(sort_by_timezone=True) orders records on the server
+        :param filename: sample csv file with a header line
+        :param output: csv file to write
+        :param column: name of the phone number column
+        :param slot_column: add the slot in a column of this name, if given
+        :param batch_size: records assigned at a time
+        :return: {slot: number of records}
+        """
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        counts = {}
+        with open(filename, newline='') as src, tempfile.TemporaryDirectory() as work:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if header is None:
+                raise SurvoxAPIRuntime('Sample file is empty: {f}'.format(f=filename))
+            if column not in header:
+                raise SurvoxAPIRuntime('No "{c}" column in {f}'.format(c=column, f=filename))
+            position = header.index(column)
+            # one spill file per slot, so records never have to be held in memory all at once
+            spills = {}
+            while True:
+                batch = [r for r in (next(reader, None) for _ in range(batch_size)) if r is not None]
+                if not batch:
+                    break
+                slots = self.assign(r[position] if len(r) > position else '' for r in batch)
+                for record, slot in zip(batch, slots):
+                    if slot not in spills:
+                        spills[slot] = open(os.path.join(work, '{s}.csv'.format(s=slot)), 'w+', newline='')
+                    csv.writer(spills[slot]).writerow(record + [slot] if slot_column else record)
+                    counts[slot] = counts.get(slot, 0) + 1
+            with open(output, 'w', newline='') as dst:
+                csv.writer(dst).writerow(header + [slot_column] if slot_column else header)
+                for slot in sorted(spills, key=lambda s: (s == 0, s)):
+                    fh = spills[slot]
+                    fh.seek(0)
+                    for block in iter(lambda: fh.read(1024 * 1024), ''):
+                        dst.write(block)
+                    fh.close()
+        return counts
+
+
+def _columns(phones):
+    # a flat iterable of numbers, or an iterable of columns of them
+    column = []
+    for value in phones:
+        if isinstance(value, str):
+            column.append(value)
+            if len(column) >= DEFAULT_BATCH_SIZE:
+                yield column
+                column = []
+        else:
+            yield value
+    if column:
+        yield column
+
+
+def _histogram(slots):
+    data = slots.tobytes()
+    return [data.count(n) for n in range(max(slots) + 1)] if slots else []
+
+
+def _utc(local, offset):
+    hours, minutes = (int(x) for x in local.split(':'))
+    utc = (hours * 60 + minutes - offset) % (24 * 60)
+    return '{h:02d}:{m:02d}'.format(h=utc // 60, m=utc % 60)
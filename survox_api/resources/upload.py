@@ -0,0 +1,337 @@
+import hashlib
+import mmap
+import os
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .instrument import log
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser('~'), '.survox_api', 'uploads')
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+class SurvoxAPIUploadJournal:
+    """
+    On-disk record of how far each chunked upload got, so an interrupted upload can pick up from the last byte
+    range the server acknowledged.  One small json file per (endpoint, file) pair.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_JOURNAL_DIR
+
+    def _path(self, endpoint, filename):
+        key = json.dumps([endpoint, os.path.abspath(filename)])
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def _fingerprint(filename):
+        st = os.stat(filename)
+        return {'file_size': st.st_size, 'mtime': st.st_mtime}
+
+    def load(self, endpoint, filename):
+        """
+        Fetch the saved state of an upload
+        :param endpoint: upload endpoint the file was being sent to
+        :param filename: file being uploaded
+        :return: {'url': next chunk url, 'offset': acknowledged bytes}, or None if there's nothing to resume
+        """
+        try:
+            with open(self._path(endpoint, filename)) as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        fingerprint = self._fingerprint(filename)
+        if any(state.get(k) != v for (k, v) in fingerprint.items()):
+            # file changed since the upload started, can't resume it
+            self.clear(endpoint, filename)
+            return None
+        return state
+
+    def save(self, endpoint, filename, url, offset):
+        """
+        Record the acknowledged state of an upload
+        :param endpoint: upload endpoint the file is being sent to
+        :param filename: file being uploaded
+        :param url: url the next chunk goes to
+        :param offset: number of bytes the server has acknowledged
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        state = self._fingerprint(filename)
+        state.update({'endpoint': endpoint, 'filename': os.path.abspath(filename), 'url': url, 'offset': offset})
+        path = self._path(endpoint, filename)
+        temp = path + '.tmp'
+        with open(temp, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(temp, path)
+
+    def clear(self, endpoint, filename):
+        try:
+            os.remove(self._path(endpoint, filename))
+        except OSError:
+            pass
+
+
+class SurvoxAPIFileChunks:
+    """
+    Memory-mapped view of a file handed out as memoryview slices, so blocks can be hashed and written to the
+    socket without ever being copied into python bytes objects.  Use as a context manager.
+    """
+
+    def __init__(self, filename, block_size):
+        self.filename = filename
+        self.block_size = block_size
+        self.size = os.path.getsize(filename)
+        self._file = None
+        self._map = None
+        self.view = memoryview(b'')
+
+    def open(self):
+        self._file = open(self.filename, 'rb')
+        if self.size:
+            # mmap can't map an empty file
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self._map)
+        return self
+
+    def blocks(self, offset=0, end=None):
+        """
+        Iterate over the file in blocks
+        :param offset: byte to start at
+        :param end: byte to stop at, defaults to the end of the file
+        :return: iterator of (offset, memoryview) pairs
+        """
+        end = self.size if end is None else min(end, self.size)
+        for start in range(offset, end, self.block_size):
+            yield start, self.view[start:min(start + self.block_size, end)]
+
+    def close(self):
+        try:
+            self.view.release()
+            if self._map is not None:
+                self._map.close()
+        except BufferError:
+            # a slice is still referenced somewhere, the map is closed when it's garbage collected
+            pass
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SurvoxAPIMultipartBody:
+    """
+    multipart/form-data request body for one upload block.  requests streams it through read(), which hands out
+    slices of the block's memoryview rather than building the whole body in memory.
+    """
+
+    def __init__(self, fields, file_field, file_name, content):
+        """
+        :param fields: dictionary of plain form fields
+        :param file_field: form field name of the file
+        :param file_name: file name sent for the file
+        :param content: bytes-like content of the file
+        """
+        self.boundary = uuid.uuid4().hex
+        head = ''
+        for k, v in fields.items():
+            head += '--{b}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.format(b=self.boundary, k=k,
+                                                                                                 v=v)
+        head += ('--{b}\r\nContent-Disposition: form-data; name="{f}"; filename="{n}"\r\n'
+                 'Content-Type: application/octet-stream\r\n\r\n').format(b=self.boundary, f=file_field, n=file_name)
+        tail = '\r\n--{b}--\r\n'.format(b=self.boundary)
+        self.parts = [memoryview(head.encode('utf-8')), memoryview(content), memoryview(tail.encode('utf-8'))]
+        self.length = sum(len(p) for p in self.parts)
+        self.position = 0
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary={b}'.format(b=self.boundary)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.parts)
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.length
+        self.position = max(0, min(offset, self.length))
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        start = self.position
+        for part in self.parts:
+            if start < len(part):
+                piece = part[start:start + size]
+                self.position += len(piece)
+                return piece
+            start -= len(part)
+        return b''
+
+
+class SurvoxAPIUpload:
+    """
+    Chunked upload of a file to the Survox API.
+
+    Every chunk response carries the url the next chunk goes to (content['data']['url']).  Chunks are sent one at
+    a time until that url stops changing, after which up to max_in_flight chunks are sent at once over the pooled
+    connections.  If the server refuses an out of order chunk the upload drops back to one chunk at a time from
+    the last acknowledged byte.  Progress is saved to the journal after every acknowledged chunk.
+    """
+
+    def __init__(self, api, endpoint, filename, block_size=None, max_in_flight=None, journal=None):
+        """
+        :param api: SurvoxAPIBase used to send the chunks
+        :param endpoint: upload endpoint
+        :param filename: name of the file to upload
+        :param block_size: max size of a file block to send at a time
+        :param max_in_flight: max chunks sent at the same time
+        :param journal: SurvoxAPIUploadJournal to resume from and record progress in, or None
+        """
+        self.api = api
+        self.endpoint = endpoint
+        self.filename = filename
+        self.block_size = block_size or 1000000
+        self.max_in_flight = max(1, max_in_flight or DEFAULT_MAX_IN_FLIGHT)
+        self.journal = journal
+        self.file_size = os.path.getsize(filename)
+        self.upload_name = os.path.basename(filename)
+        self.journal_key = '{base}{endpoint}'.format(base=api.base_url, endpoint=endpoint)
+
+    def _send(self, url, block, offset):
+        chunk_end = offset + len(block)
+        my_headers = {
+            'CONTENT-RANGE': "bytes {offset}-{chunk_end}/{filesize}".format(offset=offset, chunk_end=chunk_end,
+                                                                            filesize=self.file_size)
+        }
+        body = SurvoxAPIMultipartBody({'filename': self.upload_name}, 'file', self.upload_name, block)
+        my_headers['Content-Type'] = body.content_type
+        res = self.api.api_put(endpoint=url, headers=my_headers, data=body, full_response=True)
+        return self.api._upload_content(res)['data']['url']
+
+    def _hash(self, start, block):
+        # blocks can be re-sent after a fallback, only feed the hasher bytes it hasn't seen
+        end = start + len(block)
+        if end > self.hashed:
+            self.hash_md5.update(block[max(0, self.hashed - start):])
+            self.hashed = end
+
+    def _acknowledge(self, url, offset):
+        self.url = url
+        self.acked = offset
+        if self.journal:
+            self.journal.save(self.journal_key, self.filename, url, offset)
+
+    def _resume(self, chunks):
+        """
+        Pick up an interrupted upload of the file from the journal
+        :param chunks: open SurvoxAPIFileChunks of the file
+        :return: the offset resumed from, 0 if starting from the beginning
+        """
+        state = self.journal.load(self.journal_key, self.filename) if self.journal else None
+        if not state or not state.get('offset'):
+            return 0
+        # hashlib can't persist its state in the journal, so re-hash what the server already has
+        for start, block in chunks.blocks(0, state['offset']):
+            self._hash(start, block)
+        self.url = state['url']
+        self.acked = state['offset']
+        log.info('Resuming upload of %s at byte %s', self.filename, self.acked)
+        return self.acked
+
+    def _start(self):
+        self.hash_md5 = hashlib.md5()
+        self.hashed = 0
+        self.url = self.endpoint
+        self.acked = 0
+
+    def run(self):
+        """
+        Send every chunk of the file then finalize the upload
+        :return: api response data of the finalize request
+        """
+        self._start()
+        with SurvoxAPIFileChunks(self.filename, self.block_size) as chunks:
+            resumed = self._resume(chunks)
+            try:
+                return self._upload(chunks)
+            except RuntimeError:
+                if not resumed or self.acked != resumed:
+                    raise
+            # the server refused the first request of the resumed upload, most likely because the upload session
+            # expired: forget it and send the whole file again
+            log.info('Upload of %s could not be resumed, starting again', self.filename)
+            self.journal.clear(self.journal_key, self.filename)
+            self._start()
+            return self._upload(chunks)
+
+    def _upload(self, chunks):
+        parallel = False
+        while not self._send_blocks(chunks, parallel):
+            # a parallel chunk was refused, carry on one at a time from what the server acknowledged
+            parallel = None
+
+        # Finalize this thing
+        cur_data = {"md5": "{hash}".format(hash=self.hash_md5.hexdigest())}
+        res = self.api.api_post(endpoint=self.url, data=cur_data, full_response=True)
+        result = self.api._upload_content(res)['data']
+        if self.journal:
+            self.journal.clear(self.journal_key, self.filename)
+        return result
+
+    def _send_blocks(self, chunks, parallel):
+        """
+        Send the blocks from the acknowledged offset on
+        :param chunks: open SurvoxAPIFileChunks of the file being uploaded
+        :param parallel: False until the chunk url is seen to be stable, None once parallel sends are ruled out
+        :return: True when every block was acknowledged, False if a parallel send was refused
+        """
+        done = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for start, block in chunks.blocks(self.acked):
+                self._hash(start, block)
+                if not parallel or self.max_in_flight == 1:
+                    url = self._send(self.url, block, start)
+                    if parallel is False and url == self.url:
+                        parallel = True
+                    self._acknowledge(url, start + len(block))
+                    continue
+                if len(pending) >= self.max_in_flight:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    if not self._collect(finished, pending, done):
+                        self._collect(list(pending), pending, done)
+                        return False
+                pending[pool.submit(self._send, self.url, block, start)] = (start, start + len(block))
+            return self._collect(list(pending), pending, done)
+
+    def _collect(self, finished, pending, done):
+        ok = True
+        for future in finished:
+            start, end = pending.pop(future)
+            try:
+                future.result()
+                done[start] = end
+            except RuntimeError:
+                ok = False
+        acked = self.acked
+        while acked in done:
+            acked = done.pop(acked)
+        self._acknowledge(self.url, acked)
+        return ok
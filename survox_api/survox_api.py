@@ -1,8 +1,8 @@
-import requests
 from urllib.parse import urlparse
 
 from .resources.valid import valid_url_field
 from .resources.base import SurvoxAPIBase
+from .resources.session import SurvoxAPISession
 from .resources.account.base import SurvoxAPIAccountList, SurvoxAPIAccount
 from .resources.client.base import SurvoxAPIClientList, SurvoxAPIClient
 from .resources.exception import SurvoxAPIRuntime
@@ -15,7 +15,30 @@ from .resources.exception import SurvoxAPIException
 class SurvoxAPI:
     api_version = 'v0'
 
-    def __init__(self, host=None, api_key=None, username=None, password=None, verbose=True):
+    def __init__(self, host=None, api_key=None, username=None, password=None, verbose=True, session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, survey_cache_ttl=60,
+                 status_refresh=30, retry=None, limiter=None, http_cache=None, preview_ttl=300):
+        """
+        :param host: Survox API host
+        :param api_key: api key to authenticate with
+        :param username: username to log in with, if no api_key
+        :param password: password to log in with, if no api_key
+        :param verbose: print requests and responses
+        :param session: SurvoxAPISession to share, otherwise one is created from the pool parameters
+        :param pool_connections: number of per-host connection pools to keep around
+        :param pool_maxsize: max connections kept open to any single host
+        :param pool_block: if True, wait for a free connection when the pool for a host is exhausted
+        :param keep_alive: if False, ask the server to close the connection after every request
+        :param survey_cache_ttl: seconds a survey is known to exist before api.survey(sid).quotas etc. check again
+        :param status_refresh: seconds survey statuses and account details are reused before they're fetched again
+        :param retry: SurvoxAPIRetryPolicy for transient failures (default 4 attempts with backoff), False to never
+                      retry
+        :param limiter: SurvoxAPIRateLimiter for per endpoint class rate and concurrency limits (default tight for
+                        sample import/rebuild, loose for quotas), False for no limits
+        :param http_cache: SurvoxAPIHTTPCache to revalidate GETs with ETag/Last-Modified instead of fetching them
+                           again (default in memory, 16MB), False for none
+        :param preview_ttl: seconds a sample selection's preview is reused, so download() needn't list it again
+        """
 
         if not host:
             raise SurvoxAPIRuntime('Parameter "host" is required')
@@ -25,6 +48,13 @@ class SurvoxAPI:
         self.verbose = verbose
         self.oauth2_token = None
         self.headers = None
+        if session is None:
+            session = SurvoxAPISession(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                       pool_block=pool_block, keep_alive=keep_alive,
+                                       survey_cache_ttl=survey_cache_ttl, status_refresh=status_refresh, retry=retry,
+                                       limiter=limiter, http_cache=http_cache, preview_ttl=preview_ttl)
+        self.session = session
+        self._base_api = None
         if api_key:
             self.set_authorization_header('ApiKey', api_key)
         elif username and password:
@@ -57,6 +87,27 @@ class SurvoxAPI:
             url = url[:-1]
         return url
 
+    def close(self):
+        """
+        Close the pooled connections shared by this object and every resource created from it
+        :return: None
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def _api(self):
+        if self._base_api is None or self._base_api.auth_headers is not self.headers:
+            self._base_api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers,
+                                           verbose=self.verbose, session=self.session)
+        self._base_api.verbose = self.verbose
+        return self._base_api
+
     def set_authorization_header(self, token_type, token_value):
         self.headers = {'Authorization': '{type} {value}'.format(type=token_type, value=token_value)}
 
@@ -69,9 +120,9 @@ class SurvoxAPI:
 
         login_url = "{}/auth/login/".format(self.base_url)
         if username and password:
-            response = requests.post(url=login_url, data={'username': username, 'password': password})
+            response = self.session.post(url=login_url, data={'username': username, 'password': password})
         elif refresh_token:
-            response = requests.post(url=login_url, data={'refresh_token': refresh_token})
+            response = self.session.post(url=login_url, data={'refresh_token': refresh_token})
         else:
             raise SurvoxAPIRuntime("Missing login credentials")
 
@@ -89,69 +140,70 @@ class SurvoxAPI:
         return response
 
     def get(self, endpoint):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        return api.api_get(endpoint=endpoint)
+        return self._api.api_get(endpoint=endpoint)
 
-    def post(self, endpoint, data=None, json=None):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        return api.api_post(endpoint=endpoint, data=data, json=json)
+    def post(self, endpoint, data=None, json=None, idempotency_key=None):
+        return self._api.api_post(endpoint=endpoint, data=data, json=json, idempotency_key=idempotency_key)
 
     def put(self, endpoint, data=None, json=None):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        return api.api_put(endpoint=endpoint, data=data, json=json)
+        return self._api.api_put(endpoint=endpoint, data=data, json=json)
 
     def delete(self, endpoint):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        return api.api_delete(endpoint=endpoint)
+        return self._api.api_delete(endpoint=endpoint)
 
     def health(self):
         return self.status()
 
     def swagger(self):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        r = api.api_get(endpoint='/swagger/', full_response=True)
+        r = self._api.api_get(endpoint='/swagger/', full_response=True)
         if r.status_code != 200:
             raise SurvoxAPIException('GET', '/swagger/', r)
         return r.json()
 
     def status(self):
-        api = SurvoxAPIBase(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
-        return api.api_get(endpoint='/status/')
+        return self._api.api_get(endpoint='/status/')
 
     @property
     def accounts(self):
-        return SurvoxAPIAccountList(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPIAccountList(base_url=self.base_url, headers=self.headers,
+                                    verbose=self.verbose, session=self.session)
 
     def account(self, name):
         valid, msg = valid_url_field('Account name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPIAccount(name, base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPIAccount(name, base_url=self.base_url, headers=self.headers,
+                                verbose=self.verbose, session=self.session)
 
     @property
     def clients(self):
-        return SurvoxAPIClientList(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPIClientList(base_url=self.base_url, headers=self.headers,
+                                   verbose=self.verbose, session=self.session)
 
     def client(self, name):
         valid, msg = valid_url_field('Client name', name, 1, 256)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPIClient(name, base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPIClient(name, base_url=self.base_url, headers=self.headers,
+                               verbose=self.verbose, session=self.session)
 
     @property
     def surveys(self):
-        return SurvoxAPISurveyList(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPISurveyList(base_url=self.base_url, headers=self.headers,
+                                   verbose=self.verbose, session=self.session)
 
     def survey(self, sid):
         valid, msg = valid_url_field('Survey surveycode', sid, 1, 28)
         if not valid:
             raise SurvoxAPIRuntime(msg)
-        return SurvoxAPISurvey(sid=sid, base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPISurvey(sid=sid, base_url=self.base_url, headers=self.headers,
+                               verbose=self.verbose, session=self.session)
 
     @property
     def library(self):
-        return SurvoxAPILibrary(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPILibrary(base_url=self.base_url, headers=self.headers,
+                                verbose=self.verbose, session=self.session)
 
     @property
     def admin(self):
-        return SurvoxAPIAdmin(base_url=self.base_url, headers=self.headers, verbose=self.verbose)
+        return SurvoxAPIAdmin(base_url=self.base_url, headers=self.headers, verbose=self.verbose, session=self.session)